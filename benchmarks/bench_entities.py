@@ -0,0 +1,56 @@
+# Bytes per entity and creation throughput for Player, Hazard and Upgrade.
+#
+#   python benchmarks/bench_entities.py [count]
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+def measure(factory, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Subtract the list holding the entities
+    bytes_per_entity = (after - before - sys.getsizeof(entities)) / count
+    del entities
+
+    start = time.perf_counter()
+    entities = [factory() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    return {"bytes_per_entity": round(bytes_per_entity, 1), "created_per_sec": round(count / elapsed)}
+
+
+def main_bench(count):
+    # Cycle the types so every kind is measured, not just one per count
+    hazard_types = itertools.cycle(main.HAZARDS)
+    upgrade_types = itertools.cycle(main.UPGRADES)
+    results = {
+        "player": measure(main.Player, count),
+        "hazard": measure(lambda: main.Hazard(next(hazard_types)), count),
+        "upgrade": measure(lambda: main.Upgrade(next(upgrade_types)), count),
+    }
+    # Move the entities so positions become floats, as they are mid-game
+    hazards = [main.Hazard("homing") for _ in range(count)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for hazard in hazards:
+        hazard.update((400.5, 300.5))
+    results["hazard_after_update"] = {"extra_bytes_per_entity": round((tracemalloc.get_traced_memory()[0] - before) / count, 1)}
+    tracemalloc.stop()
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(json.dumps(main_bench(count), indent=2))
@@ -0,0 +1,40 @@
+# Env-steps per second of VectorSpaceDodgerEnv with random actions, and game
+# ticks per second when each step covers several ticks (frame_skip).
+#
+#   python benchmarks/bench_env.py [steps]
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from env import VectorSpaceDodgerEnv
+
+
+def measure(num_envs, steps, obs_mode, frame_skip=1):
+    env = VectorSpaceDodgerEnv(num_envs, obs_mode=obs_mode, seed=0, frame_skip=frame_skip)
+    rng = np.random.default_rng(1)
+    actions = rng.integers(0, 3, (steps, num_envs))
+    env.reset()
+    # Outside the timing, so compiled kernels are already loaded
+    env.step(actions[0])
+    start = time.perf_counter()
+    for t in range(steps):
+        env.step(actions[t])
+    elapsed = time.perf_counter() - start
+    return round(num_envs * steps * frame_skip / elapsed)
+
+
+if __name__ == "__main__":
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    results = {}
+    for obs_mode in ("entities", "grid"):
+        for num_envs in (1, 64, 1024, 8192):
+            results[f"{obs_mode}/{num_envs}"] = measure(num_envs, steps, obs_mode)
+    ticks = {}
+    for frame_skip in (1, 2, 4, 8):
+        ticks[f"entities/1024/frame_skip={frame_skip}"] = measure(1024, steps, "entities", frame_skip)
+    print(json.dumps({"env_steps_per_sec": results, "env_ticks_per_sec": ticks}, indent=2))
@@ -0,0 +1,110 @@
+# Per-tick cost of hazard motion, magnet pull and collision tests at large
+# hazard counts: the interpreter loops over Hazard objects in main.py against
+# the NumPy and (when Numba is installed) compiled kernels in kernels.py.
+#
+#   python benchmarks/bench_kernels.py [counts...]
+import json
+import os
+import random
+import sys
+import time
+import timeit
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYTEST_CURRENT_TEST", "bench")  # quiet main's prints
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kernels
+import main
+from rules import HAZARD_TYPES, HAZARD_SIZES, MAGNET_PULL, MAGNET_RANGE, height, width
+
+PLAYER_X = width // 2
+PLAYER_Y = height - 2 * main.PLAYER_SIZE
+
+
+def best_of(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def objects_tick(hazards, upgrades, player):
+    player_pos = (player.x, player.y)
+    hits = 0
+    for hazard in hazards:
+        hazard.update(player_pos)
+    for hazard in hazards:
+        if main.detect_collision(player_pos, (hazard.x, hazard.y), player.size, hazard.size):
+            hits += 1
+    for upgrade in upgrades:
+        dx = player.x - upgrade.x
+        dy = player.y - upgrade.y
+        dist = (dx**2 + dy**2)**0.5
+        if dist < MAGNET_RANGE:
+            upgrade.x += dx / dist * MAGNET_PULL
+            upgrade.y += dy / dist * MAGNET_PULL
+    return hits
+
+
+def kernel_tick(move_hazards, pull_upgrades, hazard_hits, state):
+    x, y, speed, cooldown, kind, active, size, ux, uy, uactive = state
+    x0 = x[0].copy()
+    y0 = y[0].copy()
+    move_hazards(x, y, speed, cooldown, kind, active, np.array([PLAYER_X], dtype=float), PLAYER_Y, 1)
+    player = np.full(x.shape[1], float(PLAYER_X))
+    hits = hazard_hits(player, player, PLAYER_Y, np.full(x.shape[1], 50.0), x0, y0, x[0], y[0], size)
+    pull_upgrades(ux, uy, uactive, np.ones(1, dtype=bool), np.array([PLAYER_X], dtype=float), PLAYER_Y, MAGNET_PULL)
+    return hits
+
+
+def make_state(count, seed=0):
+    rng = np.random.default_rng(seed)
+    kind = rng.integers(0, len(HAZARD_TYPES), (1, count))
+    return [rng.uniform(0, width - 60, (1, count)), rng.uniform(0, height, (1, count)),
+            rng.uniform(3, 9, (1, count)), rng.integers(0, 60, (1, count)), kind, np.ones((1, count), dtype=bool),
+            np.array(HAZARD_SIZES, dtype=float)[kind[0]],
+            rng.uniform(0, width, (1, count)), rng.uniform(0, height, (1, count)), np.ones((1, count), dtype=bool)]
+
+
+def measure(count):
+    random.seed(0)
+    state = make_state(count)
+    # The same hazards and upgrades as objects, with plain float positions as in the game
+    x, y, speed, cooldown, kind = (a[0].tolist() for a in state[:5])
+    hazards = []
+    for i in range(count):
+        hazard = main.Hazard(HAZARD_TYPES[kind[i]])
+        hazard.x, hazard.y, hazard.speed, hazard.homing_cooldown = x[i], y[i], speed[i], cooldown[i]
+        hazards.append(hazard)
+    upgrades = []
+    for ux, uy in zip(state[7][0].tolist(), state[8][0].tolist()):
+        upgrade = main.Upgrade("magnet", ux)
+        upgrade.y = uy
+        upgrades.append(upgrade)
+    player = main.Player()
+    number = max(1, 200000 // count)
+
+    result = {"objects_us": round(best_of(lambda: objects_tick(hazards, upgrades, player), max(1, number // 20)), 1)}
+    numpy_state = [a.copy() for a in state]
+    result["numpy_us"] = round(best_of(lambda: kernel_tick(kernels.move_hazards_numpy, kernels.pull_upgrades_numpy,
+                                                           kernels.hazard_hits_numpy, numpy_state), number), 1)
+    result["numpy_speedup"] = round(result["objects_us"] / result["numpy_us"], 1)
+    if kernels.JIT:
+        jit_state = [a.copy() for a in state]
+        result["jit_us"] = round(best_of(lambda: kernel_tick(kernels.move_hazards, kernels.pull_upgrades,
+                                                             kernels.hazard_hits, jit_state), number), 1)
+        result["jit_speedup"] = round(result["objects_us"] / result["jit_us"], 1)
+    return result
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000, 100000]
+    results = {"jit": kernels.JIT}
+    if kernels.JIT:
+        # First calls compile, or load the cached compiled code
+        start = time.perf_counter()
+        kernel_tick(kernels.move_hazards, kernels.pull_upgrades, kernels.hazard_hits, make_state(10))
+        results["jit_first_call_s"] = round(time.perf_counter() - start, 2)
+    results["per_tick"] = {count: measure(count) for count in counts}
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,96 @@
+# Cost of the collision mask tests in masks.py next to the bounding box tests
+# they refine, and how many box hits the masks turn away in real play.
+#
+#   python benchmarks/bench_masks.py [--ticks 20000]
+#
+# Per-call timings are microseconds for one candidate pair; batch timings are
+# microseconds per candidate over arrays of them, as env.py calls them. The
+# play section runs the same seeded games with and without masks and times
+# Game.step in each.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import timeit
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYTEST_CURRENT_TEST", "bench")  # quiet main's prints
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import masks
+from rules import HAZARD_SIZES, LEFT, RIGHT
+
+
+def best_of(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def per_call():
+    table = masks.hazard_table(2, 60)
+    return {
+        "detect_collision_us": round(best_of(lambda: main.detect_collision((0, 0), (10, 20), 50, 60), 100000), 3),
+        "swept_collision_us": round(best_of(
+            lambda: main.swept_collision((0, 0), (5, 0), 50, (10, 10), (10, 20), 60), 100000), 3),
+        "overlaps_us": round(best_of(lambda: masks.overlaps(table, 10, 20, 0, 0, 50), 100000), 3),
+        "swept_overlaps_us": round(best_of(
+            lambda: masks.swept_overlaps(table, (10, 10), (10, 20), (0, 0), (5, 0), 50), 20000), 3),
+    }
+
+
+def batch(count, seed=0):
+    rng = np.random.default_rng(seed)
+    kind = rng.integers(0, len(HAZARD_SIZES), count)
+    sizes = np.array(HAZARD_SIZES, dtype=float)[kind]
+    x0, y0 = rng.uniform(-40, 40, count), rng.uniform(-60, 40, count)
+    x1, y1 = x0 + rng.uniform(-3, 3, count), y0 + rng.uniform(4, 8, count)
+    px0 = rng.uniform(-10, 10, count)
+    px1 = px0 + rng.uniform(-10, 10, count)
+    psize = np.full(count, 50.0)
+    tables = masks.hazard_tables()
+    number = max(1, 100000 // count)
+    return {
+        "overlaps_batch_us": round(best_of(
+            lambda: masks.overlaps_batch(tables, kind, sizes, x1, y1, px1, 0.0, psize), number) / count, 4),
+        "swept_overlaps_batch_us": round(best_of(
+            lambda: masks.swept_overlaps_batch(tables, kind, sizes, x0, y0, x1, y1, px0, 0.0, px1, 0.0, psize),
+            number) / count, 4),
+    }
+
+
+class CountingGame(main.Game):
+    # Counts hits and lives for ever, so both runs see the same number of ticks
+    def step(self, controls):
+        health, shield = self.player.health, self.player.shield
+        alive = super().step(controls)
+        self.hits += (self.player.health < health) + (shield and not self.player.shield)
+        self.player.health = 3
+        self.player.shield = False
+        return alive
+
+
+def play(ticks, masked, seed=1):
+    controls = random.Random(seed)
+    game = main.current_game = CountingGame(seed, masked=masked)
+    game.hits = 0
+    inputs = [controls.choice((0, LEFT, RIGHT, LEFT, RIGHT)) for _ in range(ticks)]
+    start = time.perf_counter()
+    for control in inputs:
+        game.step(control)
+    elapsed = time.perf_counter() - start
+    return {"hits": game.hits, "step_us": round(elapsed / ticks * 1e6, 2)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the collision mask tests")
+    parser.add_argument("--ticks", type=int, default=20000, help="ticks of play with and without masks")
+    args = parser.parse_args()
+
+    results = {"per_call": per_call(), "batch": {count: batch(count) for count in (100, 10000)}}
+    results["play"] = {"boxes": play(args.ticks, False), "masks": play(args.ticks, True)}
+    print(json.dumps(results, indent=2))
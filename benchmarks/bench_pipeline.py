@@ -0,0 +1,121 @@
+# Sequential game_loop against pipelined_game_loop under the dummy video
+# driver, with key presses posted from a feeder thread.
+#
+#   python benchmarks/bench_pipeline.py [--seconds 5] [--flip-ms 0] [--draw-ms 0]
+#
+# Paced runs play at FPS and report input-to-flip latency and the jitter of
+# the physics tick interval; unpaced runs pass frame_time=0, which lifts the
+# frame cap but leaves the game's rules alone, and report simulation ticks
+# and drawn frames per second. --flip-ms and --draw-ms add
+# that much blocking (GIL-free) time to every flip and draw, standing in for
+# a display that waits on vsync or a heavy frame.
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYTEST_CURRENT_TEST", "bench")  # quiet main's prints
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from controls import LatencyMeter
+from soak import percentile
+
+pygame = main.pygame
+step_times = []
+
+
+class BenchGame(main.Game):
+    # Never dies, so every run lasts the full duration
+    def step(self, controls):
+        step_times.append(time.perf_counter())
+        self.player.health = 3
+        return super().step(controls)
+
+
+def feed(seconds, seed=0):
+    rng = random.Random(seed)
+    end = time.perf_counter() + seconds
+    key = None
+    while time.perf_counter() < end:
+        time.sleep(rng.uniform(0.02, 0.08))
+        if key is None:
+            key = rng.choice((pygame.K_LEFT, pygame.K_RIGHT))
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+        else:
+            pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key))
+            key = None
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+
+def slowed(func, seconds):
+    if not seconds:
+        return func
+
+    def wrapper(*args):
+        result = func(*args)
+        time.sleep(seconds)
+        return result
+    return wrapper
+
+
+def run(loop, seconds, paced, flip_ms, draw_ms):
+    frames = [0]
+    flip = pygame.display.flip
+
+    def counted_flip():
+        frames[0] += 1
+        return flip()
+
+    main.latency_meter = LatencyMeter(1 << 20)
+    pygame.display.flip = slowed(counted_flip, flip_ms / 1000)
+    draw_frame = main.draw_frame
+    main.draw_frame = slowed(draw_frame, draw_ms / 1000)
+    main.Game = BenchGame
+    del step_times[:]
+    pygame.event.clear()
+    feeder = threading.Thread(target=feed, args=(seconds,), daemon=True)
+    try:
+        feeder.start()
+        start = time.perf_counter()
+        loop(frame_time=1 / main.FPS if paced else 0)
+        elapsed = time.perf_counter() - start
+    finally:
+        main.Game = BenchGame.__bases__[0]
+        main.draw_frame = draw_frame
+        pygame.display.flip = flip
+        feeder.join()
+
+    intervals = [(b - a) * 1000 for a, b in zip(step_times, step_times[1:])]
+    result = {
+        "ticks_per_sec": round(len(step_times) / elapsed, 1),
+        "frames_per_sec": round(frames[0] / elapsed, 1),
+    }
+    if paced:
+        result["latency"] = main.latency_meter.summary()
+        result["tick_interval_ms"] = {
+            "p50": round(percentile(intervals, 0.50), 3),
+            "p99": round(percentile(intervals, 0.99), 3),
+            "max": round(max(intervals), 3),
+        }
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the sequential and pipelined game loops")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--flip-ms", type=float, default=0.0, help="extra blocking time per flip")
+    parser.add_argument("--draw-ms", type=float, default=0.0, help="extra blocking time per draw")
+    args = parser.parse_args()
+
+    results = {"config": vars(args)}
+    for paced in (True, False):
+        for name, loop in (("sequential", main.game_loop), ("pipelined", main.pipelined_game_loop)):
+            results[f"{name}_{'paced' if paced else 'unpaced'}"] = run(loop, args.seconds, paced, args.flip_ms,
+                                                                       args.draw_ms)
+    print(json.dumps(results, indent=2))
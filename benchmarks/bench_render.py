@@ -0,0 +1,177 @@
+# Draw cost of each part of a frame under the SDL dummy video driver, on
+# canned scenes that are the same on every run and every commit.
+#
+#   python benchmarks/bench_render.py [--hazards 5] [--out render.json]
+#   python benchmarks/bench_render.py --compare before.json after.json [--threshold 0.15]
+#
+# Each scene has the given number of hazards of every type, all upgrade
+# glyphs, a full trail, a shield and several particle bursts. Timings are
+# microseconds per call, best and median of many short repeats. --compare
+# prints the change in every timing between two result files and exits 1
+# when any best time got slower by more than the threshold.
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYTEST_CURRENT_TEST", "bench")  # quiet main's prints
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main
+
+pygame = main.pygame
+REPEAT = 40
+# Hazards per type in each scene; bursts are create_particles calls of 20
+SCENES = {"light": {"hazards": 1, "bursts": 1}, "busy": {"hazards": 5, "bursts": 4},
+          "swarm": {"hazards": 20, "bursts": 10}}
+
+
+def build_scene(hazards_per_type, bursts, seed=0):
+    random.seed(seed)
+    main.score = 1234
+    main.level = 3
+    main.particle_list = []
+    game = main.current_game = main.Game(seed)
+    player = game.player
+    player.shield = True
+    for i in range(main.TRAIL_LENGTH):
+        main.player_trail.push(player.x - 8 * i, player.y)
+
+    game.hazards = []
+    types = main.HAZARD_TYPES
+    for i in range(hazards_per_type * len(types)):
+        hazard = main.Hazard(types[i % len(types)], main.level)
+        hazard.x = (i * 97) % (main.width - hazard.size)
+        hazard.y = (i * 53) % (main.height - hazard.size)
+        game.hazards.append(hazard)
+    game.upgrades = []
+    for i, upgrade_type in enumerate(main.UPGRADE_TYPES):
+        upgrade = main.Upgrade(upgrade_type)
+        upgrade.x = 60 + i * 140
+        upgrade.y = 200
+        game.upgrades.append(upgrade)
+    for i in range(bursts):
+        main.create_particles(100 + i * 60, 300 + (i % 3) * 40, main.HAZARD_COLORS[i % len(main.HAZARD_COLORS)])
+    for upgrade_type in main.TIMED_UPGRADES:
+        game.effects.activate(upgrade_type, 600)
+    return game
+
+
+def timed(funcs):
+    # Short runs of about 2ms, taken round-robin across all the timings so
+    # a slow spell on the machine hits each of them alike
+    numbers = {name: max(1, timeit.Timer(func).autorange()[0] // 100) for name, func in funcs.items()}
+    times = {name: [] for name in funcs}
+    for _ in range(REPEAT):
+        for name, func in funcs.items():
+            times[name].append(timeit.timeit(func, number=numbers[name]) / numbers[name] * 1e6)
+    return {name: {"best_us": round(min(samples), 2), "median_us": round(statistics.median(samples), 2)}
+            for name, samples in times.items()}
+
+
+def bench_scene(hazards, bursts):
+    game = build_scene(hazards, bursts)
+    window = main.window
+    player = game.player
+    frame = game.frame()
+
+    def draw_hazards():
+        for hazard in game.hazards:
+            hazard.draw()
+
+    def draw_upgrades():
+        for upgrade in game.upgrades:
+            upgrade.draw()
+
+    def hud_unchanged():
+        main.hud.update(frame.score, frame.level, frame.star_system, frame.player.health, frame.power_ups)
+        main.hud.draw(window)
+
+    def hud_redrawn():
+        # A fresh layer has nothing cached, as when every field changes
+        main.hud = main.Hud()
+        hud_unchanged()
+
+    results = timed({
+        "background": lambda: window.blit(main.background, (0, 0)),
+        "draw_player": lambda: main.draw_player(player, main.player_trail),
+        "hazard_draw": draw_hazards,
+        "upgrade_draw": draw_upgrades,
+        "draw_particles": lambda: main.draw_particles(frame.particles),
+        "draw_text": lambda: main.draw_text(f"Score: {main.score}", main.white, 10, 10),
+        "hud_unchanged": hud_unchanged,
+        "hud_redrawn": hud_redrawn,
+        "frame_snapshot": game.frame,
+        "full_frame": game.draw,
+    })
+    main.hud = main.Hud()
+    return {"entities": {"hazards": len(game.hazards), "upgrades": len(game.upgrades),
+                         "particles": len(main.particle_list), "trail": len(main.player_trail)},
+            "timings": results}
+
+
+def describe():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "pygame": pygame.version.ver,
+            "sdl": ".".join(map(str, pygame.get_sdl_version())), "video_driver": pygame.display.get_driver(),
+            "machine": platform.machine()}
+
+
+def run(scenes):
+    return {"meta": describe(), "scenes": {name: bench_scene(**scene) for name, scene in scenes.items()}}
+
+
+def compare(before, after, threshold):
+    rows = []
+    regressions = []
+    for scene, result in after["scenes"].items():
+        old = before["scenes"].get(scene, {}).get("timings", {})
+        for name, timing in result["timings"].items():
+            if name not in old:
+                continue
+            change = timing["best_us"] / old[name]["best_us"] - 1
+            rows.append(f"{scene:>6} {name:<15} {old[name]['best_us']:>10.2f} {timing['best_us']:>10.2f} {change:>+8.1%}")
+            if change > threshold:
+                regressions.append(f"{scene}/{name}")
+    header = f"{'scene':>6} {'timing':<15} {before['meta'].get('commit') or 'before':>10} {after['meta'].get('commit') or 'after':>10}   change"
+    return "\n".join([header] + rows), regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time Space Dodger's draw calls on canned scenes")
+    parser.add_argument("--hazards", type=int, default=None, help="hazards per type, for a single custom scene")
+    parser.add_argument("--out", default=None, help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), default=None)
+    parser.add_argument("--threshold", type=float, default=0.15, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            before = json.load(f)
+        with open(args.compare[1]) as f:
+            after = json.load(f)
+        table, regressions = compare(before, after, args.threshold)
+        print(table)
+        for regression in regressions:
+            print(f"SLOWER: {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+    scenes = SCENES if args.hazards is None else {"custom": {"hazards": args.hazards, "bursts": 4}}
+    text = json.dumps(run(scenes), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
@@ -0,0 +1,92 @@
+# Memory and per-tick cost of the instant replay buffer in replay.py.
+#
+#   python benchmarks/bench_replay.py [--ticks 5000]
+#
+# play runs a seeded game that never dies and reports record sizes, how much
+# of the run the default budget holds, and the capture cost next to the step
+# and frame snapshot it rides on. scenes encodes bench_render's canned scenes,
+# the heavier end of what a record holds. Times are microseconds per tick.
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYTEST_CURRENT_TEST", "bench")  # quiet main's prints
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import replay
+from bench_render import SCENES, build_scene
+from rules import FPS, LEFT, RIGHT, width, height
+
+SURFACE_BYTES = width * height * 4
+
+
+def best_of(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def play(ticks, seed=1):
+    controls = random.Random(seed)
+    game = main.current_game = main.Game(seed)
+    buffer = replay.ReplayBuffer()
+    sizes = []
+    step_time = frame_time = capture_time = 0.0
+    clock = time.perf_counter
+    for _ in range(ticks):
+        game.player.health = 3
+        start = clock()
+        game.step(controls.choice((0, LEFT, RIGHT)))
+        stepped = clock()
+        frame = game.frame()
+        framed = clock()
+        buffer.capture(frame)
+        captured = clock()
+        step_time += stepped - start
+        frame_time += framed - stepped
+        capture_time += captured - framed
+        sizes.append(len(buffer.records[-1]))
+
+    start = clock()
+    frames = list(buffer.frames())
+    decode_time = clock() - start
+    return {
+        "record_bytes": {"mean": round(statistics.mean(sizes), 1), "max": max(sizes)},
+        "buffer": {"ticks": len(buffer), "seconds": round(len(buffer) / FPS, 2), "bytes": buffer.size,
+                   "budget": buffer.budget, "as_surfaces_bytes": len(buffer) * SURFACE_BYTES},
+        "step_us": round(step_time / ticks * 1e6, 2),
+        "frame_us": round(frame_time / ticks * 1e6, 2),
+        "capture_us": round(capture_time / ticks * 1e6, 2),
+        "decode_all_ms": round(decode_time * 1000, 2),
+        "decoded_frames": len(frames),
+    }
+
+
+def scenes():
+    results = {}
+    for name, scene in SCENES.items():
+        game = build_scene(scene["hazards"], scene["bursts"])
+        frame = game.frame()
+        record = replay.encode(frame)
+        results[name] = {
+            "entities": {"hazards": len(frame.hazards), "upgrades": len(frame.upgrades),
+                         "particles": len(frame.particles)},
+            "record_bytes": len(record),
+            "encode_us": round(best_of(lambda: replay.encode(frame), 2000), 2),
+            "decode_us": round(best_of(lambda: replay.decode(record), 2000), 2),
+            "seconds_in_budget": round(replay.REPLAY_BUDGET / sys.getsizeof(record) / FPS, 1),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the replay buffer's memory and capture cost")
+    parser.add_argument("--ticks", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps({"surface_bytes": SURFACE_BYTES, "play": play(args.ticks), "scenes": scenes()}, indent=2))
@@ -0,0 +1,54 @@
+# Snapshot/restore cost and size against pickling the same state.
+#
+#   python benchmarks/bench_snapshot.py [ticks]
+import json
+import os
+import pickle
+import random
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from snapshot import snapshot, restore
+
+
+def play(ticks):
+    game = main.Game(42)
+    inputs = random.Random(0)
+    for _ in range(ticks):
+        game.player.health = 3
+        game.step(inputs.choice([0, main.LEFT, main.RIGHT]))
+    return game
+
+
+def pickle_state(game):
+    return pickle.dumps((game, main.score, main.level, main.particle_list, main.player_trail),
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def best_of(func, number=2000):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+if __name__ == "__main__":
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 1200
+    game = play(ticks)
+    data = snapshot(game)
+    pickled = pickle_state(game)
+    results = {
+        "hazards": len(game.hazards),
+        "upgrades": len(game.upgrades),
+        "particles": len(main.particle_list),
+        "inputs": len(game.inputs),
+        "snapshot_bytes": len(data),
+        "snapshot_us": round(best_of(lambda: snapshot(game)), 1),
+        "restore_us": round(best_of(lambda: restore(data)), 1),
+        "pickle_bytes": len(pickled),
+        "pickle_dumps_us": round(best_of(lambda: pickle_state(game)), 1),
+        "pickle_loads_us": round(best_of(lambda: pickle.loads(pickled)), 1),
+    }
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,2 @@
+# pytest loads this before collecting any test module
+import testsupport
@@ -0,0 +1,90 @@
+from collections import deque
+
+from rules import LEFT, RIGHT, SPECIAL, MOVE_SHIFT, MOVE_STEPS
+
+# Turns timestamped key presses and releases into one controls byte per tick.
+# Movement keys count for the share of the tick they were actually down, so
+# a tap shorter than a frame still moves the player part of a step, and a
+# SPECIAL tap fires even when it is released before the tick is sampled.
+class ControlSampler:
+    def __init__(self, now, held=0):
+        self.down_since = {bit: now if held & bit else None for bit in (LEFT, RIGHT, SPECIAL)}
+        self.held_time = {LEFT: 0.0, RIGHT: 0.0}
+        self.pressed = 0  # bits pressed at any point since the last sample
+        self.last_sample = now
+        self.pending = []  # event timestamps not yet sampled
+        self.sampled = []  # event timestamps behind the last sample
+
+    def press(self, bit, now):
+        # Key repeat sends more presses while the key stays down
+        if self.down_since[bit] is None:
+            self.down_since[bit] = now
+        self.pressed |= bit
+        self.pending.append(now)
+
+    def release(self, bit, now):
+        since = self.down_since[bit]
+        if since is None:
+            return
+        if bit in self.held_time:
+            self.held_time[bit] += now - max(since, self.last_sample)
+        self.down_since[bit] = None
+        self.pending.append(now)
+
+    def _held_fraction(self, bit, now):
+        held = self.held_time[bit]
+        since = self.down_since[bit]
+        if since is not None:
+            held += now - max(since, self.last_sample)
+        frame = now - self.last_sample
+        if frame <= 0:
+            return 1.0 if since is not None else 0.0
+        return min(held / frame, 1.0)
+
+    def sample(self, now):
+        left = self._held_fraction(LEFT, now)
+        right = self._held_fraction(RIGHT, now)
+        controls = 0
+        if self.down_since[SPECIAL] is not None or self.pressed & SPECIAL:
+            controls |= SPECIAL
+        if left >= 1.0 and right >= 1.0:
+            controls |= LEFT | RIGHT
+        else:
+            net = right - left
+            if not net:
+                # A press and release with the same timestamp still counts
+                tapped = self.pressed & (LEFT | RIGHT)
+                if tapped in (LEFT, RIGHT):
+                    net = 1 / MOVE_STEPS if tapped == RIGHT else -1 / MOVE_STEPS
+            if net:
+                controls |= RIGHT if net > 0 else LEFT
+                steps = max(1, round(abs(net) * MOVE_STEPS))
+                if steps < MOVE_STEPS:
+                    controls |= steps << MOVE_SHIFT
+
+        self.held_time[LEFT] = self.held_time[RIGHT] = 0.0
+        self.pressed = 0
+        self.last_sample = now
+        self.sampled, self.pending = self.pending, []
+        return controls
+
+# Time from each input event to the flip that first showed its effect
+class LatencyMeter:
+    def __init__(self, capacity=4096):
+        self.samples = deque(maxlen=capacity)
+
+    def record(self, stamps, flipped):
+        self.samples.extend(flipped - stamp for stamp in stamps)
+
+    def summary(self):
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {
+            "count": len(ordered),
+            "p50_ms": round(ordered[int(0.50 * last)] * 1000, 2),
+            "p95_ms": round(ordered[int(0.95 * last)] * 1000, 2),
+            "p99_ms": round(ordered[int(0.99 * last)] * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
@@ -1,63 +1,263 @@
+import argparse
+import atexit
+import csv
+import json
+import os
 import sqlite3
+import sys
+from datetime import datetime
+from itertools import islice
 
 # Global connection variable
 conn = None
 
-def init_db(db_name='game_data.db'):
-    global conn
-    conn = sqlite3.connect(db_name)
-    c = conn.cursor()
+# Optional leaderboard client; when set, scores go to the shared leaderboard
+# server instead of the local database
+backend = None
+# Where close_db keeps the scores the leaderboard could not take
+local_db_name = 'game_data.db'
+
+# SQL for a new run id
+NEW_RUN = "lower(hex(randomblob(16)))"
+
+def open_db(db_name='game_data.db'):
+    connection = sqlite3.connect(db_name)
+    c = connection.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS high_scores
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
                   score INTEGER NOT NULL,
-                  date TEXT NOT NULL)''')
-    conn.commit()
+                  date TEXT NOT NULL,
+                  run TEXT)''')
+    # Every row carries a random run id, which is what imports dedupe on;
+    # dates only have whole seconds. Older databases get the column here.
+    if "run" not in [column[1] for column in c.execute("PRAGMA table_info(high_scores)")]:
+        c.execute("ALTER TABLE high_scores ADD COLUMN run TEXT")
+        c.execute(f"UPDATE high_scores SET run = {NEW_RUN}")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS high_scores_by_run ON high_scores (run)")
+    # Keeps the top-score queries cheap once bulk imports make the table large
+    c.execute("CREATE INDEX IF NOT EXISTS high_scores_by_score ON high_scores (score)")
+    connection.commit()
+    return connection
 
-def insert_score(score):
-    global conn
-    c = conn.cursor()
-    
+def init_db(db_name='game_data.db', leaderboard_address=None):
+    global conn, backend, local_db_name
+    if leaderboard_address:
+        from leaderboard import LeaderboardClient
+        backend = LeaderboardClient(leaderboard_address)
+        local_db_name = db_name
+        return
+    conn = open_db(db_name)
+
+def _insert_score(c, score):
     # Get the current number of scores
     c.execute("SELECT COUNT(*) FROM high_scores")
     count = c.fetchone()[0]
-    
-    if count < 5:
-        # If we have less than 5 scores, just insert the new score
-        c.execute("INSERT INTO high_scores (score, date) VALUES (?, datetime('now'))", (score,))
-    else:
+
+    if count == 5:
         # Get the lowest score
         c.execute("SELECT MIN(score) FROM high_scores")
         lowest_score = c.fetchone()[0]
-        
-        if score > lowest_score:
-            # If the new score is higher than the lowest score, replace it
-            c.execute("DELETE FROM high_scores WHERE score = (SELECT MIN(score) FROM high_scores)")
-            c.execute("INSERT INTO high_scores (score, date) VALUES (?, datetime('now'))", (score,))
-    
-    conn.commit()
 
-def get_high_score():
-    global conn
-    c = conn.cursor()
+        if score <= lowest_score:
+            return
+        # If the new score is higher than the lowest score, replace one row holding it
+        c.execute("DELETE FROM high_scores WHERE id = (SELECT id FROM high_scores ORDER BY score, id LIMIT 1)")
+    # With fewer than 5 scores, just insert the new score. With more, an
+    # import has made the table a history of runs, which keeps every score.
+    c.execute(f"INSERT INTO high_scores (score, date, run) VALUES (?, datetime('now'), {NEW_RUN})", (score,))
+
+# Insert a batch of scores in one transaction
+def store_scores(connection, scores):
+    c = connection.cursor()
+    for score in scores:
+        _insert_score(c, score)
+    connection.commit()
+
+def query_high_score(connection):
+    c = connection.cursor()
     c.execute("SELECT MAX(score) FROM high_scores")
     result = c.fetchone()[0]
     return result if result is not None else 0
 
-def get_top_scores(limit=5):
-    global conn
-    c = conn.cursor()
+def query_top_scores(connection, limit=5):
+    c = connection.cursor()
     c.execute("SELECT score, date FROM high_scores ORDER BY score DESC LIMIT ?", (limit,))
     return c.fetchall()
 
-def get_highest_score():
-    global conn
-    c = conn.cursor()
+def query_highest_score(connection):
+    c = connection.cursor()
     c.execute("SELECT score, date FROM high_scores ORDER BY score DESC LIMIT 1")
     result = c.fetchone()
     return result if result else (0, "N/A")
 
+def insert_score(score):
+    if backend is not None:
+        return backend.insert_score(score)
+    store_scores(conn, (score,))
+
+def insert_scores(scores):
+    if backend is not None:
+        return backend.insert_scores(scores)
+    store_scores(conn, scores)
+
+def get_high_score():
+    if backend is not None:
+        return backend.get_high_score()
+    return query_high_score(conn)
+
+def get_top_scores(limit=5):
+    if backend is not None:
+        return backend.get_top_scores(limit)
+    return query_top_scores(conn, limit)
+
+def get_highest_score():
+    if backend is not None:
+        return backend.get_highest_score()
+    return query_highest_score(conn)
+
+# Bulk export/import. Rows stream through in chunks so memory use does not
+# depend on table size. Format is "csv" or "jsonl", by default taken from
+# the file extension.
+EXPORT_CHUNK_SIZE = 10000
+FORMATS = ("csv", "jsonl")
+
+def _format_for(path, fmt):
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; use one of {', '.join(FORMATS)}")
+    return fmt
+
+def export_scores(path, fmt=None, connection=None, chunk_size=EXPORT_CHUNK_SIZE):
+    fmt = _format_for(path, fmt)
+    c = (connection or conn).cursor()
+    c.arraysize = chunk_size
+    c.execute("SELECT score, date, run FROM high_scores ORDER BY id")
+    count = 0
+    with open(path, "w", newline="") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(("score", "date", "run"))
+        while True:
+            rows = c.fetchmany()
+            if not rows:
+                break
+            if fmt == "csv":
+                writer.writerows(rows)
+            else:
+                f.writelines(json.dumps({"score": score, "date": date, "run": run}) + "\n" for score, date, run in rows)
+            count += len(rows)
+    return count
+
+# Rows are (score, date, run). Files from before run ids have no run
+# column, and their rows come back with None.
+def _read_rows(f, fmt):
+    if fmt == "csv":
+        for row in csv.reader(f):
+            if row[:2] == ["score", "date"]:
+                continue
+            if len(row) == 2:
+                row.append("")
+            try:
+                score, date, run = row
+                score = int(score)
+            except ValueError:
+                score = date = run = None
+            yield score, date, run or None
+    else:
+        decode = json.JSONDecoder().decode
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = decode(line)
+                yield record["score"], record["date"], record.get("run")
+            except (ValueError, KeyError, TypeError, AttributeError):
+                yield None, None, None
+
+# Dates are stored as SQLite's datetime('now'), e.g. "2024-05-01 12:00:00"
+def _valid_row(score, date, run):
+    try:
+        # Not int(score), which would take 3.7 and true from JSON
+        if type(score) is not int or score < 0 or not isinstance(date, str) or len(date) != 19 or date[10] != " ":
+            return None
+        if run is not None and not (isinstance(run, str) and 0 < len(run) <= 64):
+            return None
+        datetime.fromisoformat(date)
+    except (TypeError, ValueError):
+        return None
+    return score, date, run
+
+# Returns (imported, duplicates, invalid). A row whose run id is already in
+# the table or earlier in the file is a duplicate. Rows without a run id get
+# a new one, since runs that end in the same second with the same score are
+# still separate runs. The whole import is one transaction.
+def import_scores(path, fmt=None, connection=None, chunk_size=EXPORT_CHUNK_SIZE):
+    fmt = _format_for(path, fmt)
+    connection = connection or conn
+    c = connection.cursor()
+    valid = invalid = imported = 0
+    try:
+        with open(path, newline="") as f:
+            rows = _read_rows(f, fmt)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                checked = [row for row in map(_valid_row, *zip(*chunk)) if row is not None]
+                invalid += len(chunk) - len(checked)
+                valid += len(checked)
+                c.executemany(f"INSERT OR IGNORE INTO high_scores (score, date, run) "
+                              f"VALUES (?, ?, coalesce(?, {NEW_RUN}))", checked)
+                imported += c.rowcount
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    return imported, valid - imported, invalid
+
 def close_db():
-    global conn
+    global conn, backend
+    if backend:
+        try:
+            backend.close()
+        except (OSError, RuntimeError) as e:
+            # This is the last flush, so keep what the leaderboard did not
+            # take in the local database rather than lose it
+            unsent = backend.unsent()
+            print(f"Leaderboard unavailable ({e}); keeping {len(unsent)} scores in {local_db_name}", file=sys.stderr)
+            connection = open_db(local_db_name)
+            try:
+                store_scores(connection, unsent)
+            finally:
+                connection.close()
+        backend = None
     if conn:
         conn.close()
         conn = None
+
+# Sends any scores a leaderboard client still holds before the game exits.
+# Registered here rather than in init_db, which may run more than once.
+atexit.register(close_db)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import Space Dodger scores")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path")
+    parser.add_argument("--db", default="game_data.db")
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    connection = open_db(args.db)
+    try:
+        if args.command == "export":
+            count = export_scores(args.path, args.format, connection, args.chunk_size)
+            print(f"Exported {count} scores to {args.path}")
+        else:
+            imported, duplicates, invalid = import_scores(args.path, args.format, connection, args.chunk_size)
+            print(f"Imported {imported} scores ({duplicates} duplicates, {invalid} invalid rows skipped)")
+    finally:
+        connection.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
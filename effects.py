@@ -0,0 +1,46 @@
+import heapq
+
+# Timed effects keyed by name. Each effect registers (apply, expire) callbacks
+# that receive the target; expiry ticks live in a min-heap so advancing a frame
+# only touches the effects that actually run out.
+class EffectScheduler:
+    __slots__ = ("target", "effects", "tick", "expiries", "heap")
+
+    def __init__(self, target, effects):
+        self.target = target
+        self.effects = effects
+        self.tick = 0
+        self.expiries = {}  # name -> expiry tick of the active effect
+        self.heap = []  # (expiry tick, name), may hold stale entries
+
+    def activate(self, name, duration=None):
+        apply, expire = self.effects[name]
+        if apply is not None:
+            apply(self.target)
+        if duration is None or expire is None:
+            return
+        expiry = self.tick + duration
+        self.expiries[name] = expiry
+        heapq.heappush(self.heap, (expiry, name))
+
+    def advance(self, ticks=1):
+        self.tick += ticks
+        heap = self.heap
+        while heap and heap[0][0] <= self.tick:
+            expiry, name = heapq.heappop(heap)
+            # Re-activating an effect leaves its earlier entry behind; skip it
+            if self.expiries.get(name) != expiry:
+                continue
+            del self.expiries[name]
+            self.effects[name][1](self.target)
+
+    def is_active(self, name):
+        return name in self.expiries
+
+    def remaining(self, name):
+        expiry = self.expiries.get(name)
+        return 0 if expiry is None else expiry - self.tick
+
+    def clear(self):
+        self.expiries.clear()
+        self.heap.clear()
@@ -0,0 +1,403 @@
+# Gym-style environments for training dodging agents without pygame.
+#
+# VectorSpaceDodgerEnv holds N independent games in shared NumPy arrays and
+# steps all of them in one call. The rules mirror game_loop in main.py.
+# Actions are a bitmask of LEFT and RIGHT, like holding the arrow keys, and
+# may carry a partial-tick move fraction the same way recorded controls do.
+#
+# Each game's spawns come from a timeline drawn in bulk, SPAWN_CHUNK ticks at
+# a time for all games at once, rather than from rolls every step. With
+# lookahead > 0, reset and step report the next lookahead ticks of it in
+# info["upcoming_hazards"] and info["upcoming_upgrades"], as (kind, x) per
+# tick with kind -1 for no spawn. Hazards are forecast at the level the next
+# step plays at, so a later level-up can add or drop some, and a spawn that
+# finds every slot full is skipped; like Game.upcoming_spawns, lookahead is
+# a forecast, not a promise. The timelines do not match Game's spawns.
+import numpy as np
+
+from rules import (
+    width, height, FPS, HAZARDS, UPGRADES, PLAYER_SIZE, PLAYER_SPEED, PLAYER_HEALTH,
+    MAX_PLAYER_SPEED, MIN_PLAYER_SIZE, LEVEL_THRESHOLD, LEVEL_SPEEDUP,
+    UPGRADE_SIZE, UPGRADE_SPEED, UPGRADE_SPAWN_RATE, MAGNET_PULL,
+    HAZARD_TYPES, HAZARD_SIZES, UPGRADE_TYPES, TIMED_UPGRADES, LEFT, RIGHT,
+    MOVE_SHIFT, MOVE_STEPS,
+)
+from kernels import move_hazards, pull_upgrades, hazard_hits
+from masks import hazard_tables, upgrade_table, overlaps_batch, swept_overlaps_batch
+
+NOOP = 0
+
+PLAYER_Y = height - 2 * PLAYER_SIZE
+
+# Grid observation cell values
+EMPTY = 0
+HAZARD_CELL = 1
+UPGRADE_CELL = 2
+PLAYER_CELL = 3
+
+# Ticks of spawn draws made at a time
+SPAWN_CHUNK = 64
+
+HAZARD_SIZE_TABLE = np.array(HAZARD_SIZES, dtype=np.float64)
+MAX_HAZARD_SIZE = max(HAZARD_SIZES)
+HAZARD_SPEED_TABLE = np.array([HAZARDS[hazard_type]["speed"] for hazard_type in HAZARD_TYPES], dtype=np.float64)
+# Collision masks from masks.py, shared with Game.step
+HAZARD_MASKS = hazard_tables()
+UPGRADE_MASKS = np.array([upgrade_table(UPGRADE_SIZE)], dtype=np.int32)
+
+# Timers are stored per timed upgrade, in TIMED_UPGRADES order
+SPEED_TIMER = TIMED_UPGRADES.index("speed")
+SHRINK_TIMER = TIMED_UPGRADES.index("shrink")
+INVINCIBILITY_TIMER = TIMED_UPGRADES.index("invincibility")
+MAGNET_TIMER = TIMED_UPGRADES.index("magnet")
+UPGRADE_TIMER_SLOT = np.array([TIMED_UPGRADES.index(t) if t in TIMED_UPGRADES else -1 for t in UPGRADE_TYPES])
+UPGRADE_DURATION_TICKS = np.array([UPGRADES[t].get("duration", 0) * FPS for t in UPGRADE_TYPES])
+
+# spawn_rate_for_level for an array of levels
+def spawn_rates(level):
+    return np.minimum(0.05 * (1 + level * 0.05), 0.3)
+
+class VectorSpaceDodgerEnv:
+    def __init__(self, num_envs, max_hazards=32, max_upgrades=4, obs_mode="entities",
+                 grid_cell=40, autoreset=True, max_ticks=None, seed=None, frame_skip=1, masked=True, lookahead=0):
+        if obs_mode not in ("entities", "grid"):
+            raise ValueError(f"Unknown obs_mode: {obs_mode}")
+        if frame_skip < 1:
+            raise ValueError(f"frame_skip must be at least 1, got {frame_skip}")
+        self.num_envs = num_envs
+        self.max_hazards = max_hazards
+        self.max_upgrades = max_upgrades
+        self.obs_mode = obs_mode
+        self.grid_cell = grid_cell
+        self.grid_shape = (-(-height // grid_cell), -(-width // grid_cell))
+        self.autoreset = autoreset
+        self.max_ticks = max_ticks
+        # Each step advances frame_skip ticks in one move; swept collisions
+        # keep fast hazards from skipping past the player
+        self.frame_skip = frame_skip
+        # Hits need the drawn shapes to touch, as in Game.step; masked=False
+        # makes any overlap of the bounding boxes a hit
+        self.masked = masked
+        self.lookahead = lookahead
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(num_envs)
+        # Spawn draws for every game from tick timeline_start on, as
+        # (hazard roll, hazard kind, hazard x, upgrade spawns, upgrade kind,
+        # upgrade x) arrays of shape (num_envs, ticks). spawn_tick is the
+        # first tick the next step plays; games that reset carry on along
+        # their timeline. Drawn when first needed.
+        self.spawn_draws = None
+        self.timeline_start = self.spawn_tick = 0
+
+        n, h, u = num_envs, max_hazards, max_upgrades
+        self.player_x = np.zeros(n)
+        self.player_size = np.zeros(n)
+        self.player_speed = np.zeros(n)
+        self.health = np.zeros(n, dtype=np.int64)
+        self.shield = np.zeros(n, dtype=bool)
+        self.timers = np.zeros((n, len(TIMED_UPGRADES)), dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.zeros(n, dtype=np.int64)
+        self.combo = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+
+        self.hazard_x = np.zeros((n, h))
+        self.hazard_y = np.zeros((n, h))
+        self.hazard_size = np.zeros((n, h))
+        self.hazard_speed = np.zeros((n, h))
+        self.hazard_kind = np.zeros((n, h), dtype=np.int64)
+        self.hazard_cooldown = np.zeros((n, h), dtype=np.int64)
+        self.hazard_active = np.zeros((n, h), dtype=bool)
+
+        self.upgrade_x = np.zeros((n, u))
+        self.upgrade_y = np.zeros((n, u))
+        self.upgrade_kind = np.zeros((n, u), dtype=np.int64)
+        self.upgrade_active = np.zeros((n, u), dtype=bool)
+
+        self._reset_envs(np.ones(n, dtype=bool))
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+            self.spawn_draws = None
+            self.timeline_start = self.spawn_tick
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._observe(), self._upcoming() if self.lookahead else {}
+
+    def _reset_envs(self, mask):
+        self.player_x[mask] = width // 2
+        self.player_size[mask] = PLAYER_SIZE
+        self.player_speed[mask] = PLAYER_SPEED
+        self.health[mask] = PLAYER_HEALTH
+        self.shield[mask] = False
+        self.timers[mask] = 0
+        self.score[mask] = 0
+        self.level[mask] = 0
+        self.combo[mask] = 0
+        self.ticks[mask] = 0
+        self.hazard_active[mask] = False
+        self.upgrade_active[mask] = False
+
+    def step(self, actions):
+        actions = np.broadcast_to(np.asarray(actions), (self.num_envs,))
+        previous_score = self.score.copy()
+        ticks = self.frame_skip
+        self.ticks += ticks
+
+        player_start = self.player_x.copy()
+        self._move_player(actions)
+
+        # Level up check
+        self.level += self.score >= (self.level + 1) * LEVEL_THRESHOLD
+
+        hazard_roll, hazard_kind, hazard_x, upgrade_spawns, upgrade_kind, upgrade_x = self._timeline(ticks)
+        self.spawn_tick += ticks
+        self._spawn_hazards(hazard_roll < spawn_rates(self.level)[:, None], hazard_kind, hazard_x)
+        self._spawn_upgrades(upgrade_spawns, upgrade_kind, upgrade_x)
+        crossing = self._crossing_hazards()
+        self._update_hazards()
+        self._update_upgrades()
+        self._collide_hazards(player_start, crossing)
+        self._collect_upgrades()
+        self._advance_timers()
+        self._pull_upgrades()
+
+        rewards = (self.score - previous_score).astype(np.float32)
+        terminated = self.health <= 0
+        if self.max_ticks is None:
+            truncated = np.zeros(self.num_envs, dtype=bool)
+        else:
+            truncated = self.ticks >= self.max_ticks
+        info = {}
+        done = terminated | truncated
+        if self.autoreset and done.any():
+            info["final_score"] = np.where(done, self.score, -1)
+            self._reset_envs(done)
+        if self.lookahead:
+            info.update(self._upcoming())
+        return self._observe(), rewards, terminated, truncated, info
+
+    def _move_player(self, actions):
+        x = self.player_x
+        move = actions >> MOVE_SHIFT
+        speed = np.where(move > 0, self.player_speed * move / MOVE_STEPS, self.player_speed) * self.frame_skip
+        left = ((actions & LEFT) != 0) & (x > 0)
+        x -= np.where(left, speed, 0)
+        right = ((actions & RIGHT) != 0) & (x < width - self.player_size)
+        x += np.where(right, speed, 0)
+
+    # The next ticks of every game's spawn draws, drawing more as needed
+    def _timeline(self, ticks):
+        start = self.spawn_tick - self.timeline_start
+        if self.spawn_draws is None or start + ticks > self.spawn_draws[0].shape[1]:
+            fresh = self._draw_spawns(max(SPAWN_CHUNK, ticks))
+            if self.spawn_draws is not None:
+                fresh = [np.concatenate((drawn[:, start:], new), axis=1) for drawn, new in zip(self.spawn_draws, fresh)]
+            self.spawn_draws = fresh
+            self.timeline_start = self.spawn_tick
+            start = 0
+        return [drawn[:, start:start + ticks] for drawn in self.spawn_draws]
+
+    def _draw_spawns(self, ticks):
+        rng = self.rng
+        shape = (self.num_envs, ticks)
+        # Hazard rolls are kept, as the rate they are held to depends on the level
+        hazard_roll = rng.random(shape, dtype=np.float32)
+        hazard_kind = rng.integers(0, len(HAZARD_TYPES), shape, dtype=np.int8)
+        hazard_x = np.floor(rng.random(shape) * (width - HAZARD_SIZE_TABLE[hazard_kind] + 1)).astype(np.int16)
+        upgrade_spawns = rng.random(shape) < UPGRADE_SPAWN_RATE
+        upgrade_kind = rng.integers(0, len(UPGRADE_TYPES), shape, dtype=np.int8)
+        upgrade_x = np.floor(rng.random(shape) * (width - UPGRADE_SIZE + 1)).astype(np.int16)
+        return [hazard_roll, hazard_kind, hazard_x, upgrade_spawns, upgrade_kind, upgrade_x]
+
+    def _upcoming(self):
+        hazard_roll, hazard_kind, hazard_x, upgrade_spawns, upgrade_kind, upgrade_x = self._timeline(self.lookahead)
+        # The level the next step will play at
+        level = self.level + (self.score >= (self.level + 1) * LEVEL_THRESHOLD)
+        hazards = np.where(hazard_roll < spawn_rates(level)[:, None], hazard_kind, -1)
+        upgrades = np.where(upgrade_spawns, upgrade_kind, -1)
+        return {"upcoming_hazards": np.stack([hazards, hazard_x], axis=-1).astype(np.float32),
+                "upcoming_upgrades": np.stack([upgrades, upgrade_x], axis=-1).astype(np.float32)}
+
+    # spawns, kinds and xs are (num_envs, frame_skip) slices of the timeline.
+    # Each tick's spawns go into a game's first free slot. All of a step's
+    # spawns move frame_skip ticks in _update_hazards, so one from a later
+    # tick starts higher up by the ticks it missed.
+    def _spawn_hazards(self, spawns, kinds, xs):
+        for tick in np.nonzero(spawns.any(axis=0))[0]:
+            slot = np.argmin(self.hazard_active, axis=1)
+            rows = np.nonzero(spawns[:, tick] & ~self.hazard_active[self.rows, slot])[0]
+            if not len(rows):
+                continue
+            slot = slot[rows]
+            kind = kinds[rows, tick].astype(np.int64)
+            size = HAZARD_SIZE_TABLE[kind]
+            speed = HAZARD_SPEED_TABLE[kind] + LEVEL_SPEEDUP * self.level[rows]
+            self.hazard_x[rows, slot] = xs[rows, tick]
+            self.hazard_y[rows, slot] = -size - speed * tick
+            self.hazard_size[rows, slot] = size
+            self.hazard_speed[rows, slot] = speed
+            self.hazard_kind[rows, slot] = kind
+            self.hazard_cooldown[rows, slot] = 0
+            self.hazard_active[rows, slot] = True
+
+    def _spawn_upgrades(self, spawns, kinds, xs):
+        for tick in np.nonzero(spawns.any(axis=0))[0]:
+            slot = np.argmin(self.upgrade_active, axis=1)
+            rows = np.nonzero(spawns[:, tick] & ~self.upgrade_active[self.rows, slot])[0]
+            if not len(rows):
+                continue
+            slot = slot[rows]
+            self.upgrade_x[rows, slot] = xs[rows, tick]
+            self.upgrade_y[rows, slot] = -UPGRADE_SIZE - UPGRADE_SPEED * tick
+            self.upgrade_kind[rows, slot] = kinds[rows, tick]
+            self.upgrade_active[rows, slot] = True
+
+    def _update_hazards(self):
+        move_hazards(self.hazard_x, self.hazard_y, self.hazard_speed, self.hazard_cooldown, self.hazard_kind,
+                     self.hazard_active, self.player_x, PLAYER_Y, self.frame_skip)
+
+        # Dodged hazards score a point, and every tenth in a row adds a bonus
+        dodged = self.hazard_active & (self.hazard_y > height)
+        self.hazard_active &= ~dodged
+        count = dodged.sum(axis=1)
+        before = self.combo // 10
+        self.combo += count
+        after = self.combo // 10
+        self.score += count + (after * (after + 1) - before * (before + 1)) // 2
+
+    def _update_upgrades(self):
+        self.upgrade_y += np.where(self.upgrade_active, UPGRADE_SPEED * self.frame_skip, 0)
+        self.upgrade_active &= self.upgrade_y <= height
+
+    # Hazards close enough to the player's row to touch the player this step,
+    # with their positions before moving. Only these need collision tests.
+    def _crossing_hazards(self):
+        reach = self.hazard_speed.max() * self.frame_skip + 2 * MAX_HAZARD_SIZE
+        y = self.hazard_y
+        rows, slots = np.nonzero(self.hazard_active & (y > PLAYER_Y - reach) & (y < PLAYER_Y + reach))
+        return rows, slots, self.hazard_x[rows, slots], y[rows, slots]
+
+    def _collide_hazards(self, player_start, crossing):
+        rows, slots, start_x, start_y = crossing
+        if not len(rows):
+            return
+        # Overlapping now, or passed through the player on the way here
+        hit = self.hazard_active[rows, slots] & hazard_hits(
+            player_start[rows], self.player_x[rows], PLAYER_Y, self.player_size[rows], start_x, start_y,
+            self.hazard_x[rows, slots], self.hazard_y[rows, slots], self.hazard_size[rows, slots])
+        if self.masked and hit.any():
+            rows, slots, start_x, start_y = rows[hit], slots[hit], start_x[hit], start_y[hit]
+            hit = swept_overlaps_batch(
+                HAZARD_MASKS, self.hazard_kind[rows, slots], self.hazard_size[rows, slots], start_x, start_y,
+                self.hazard_x[rows, slots], self.hazard_y[rows, slots], player_start[rows], PLAYER_Y,
+                self.player_x[rows], PLAYER_Y, self.player_size[rows])
+        rows = rows[hit]
+        self.hazard_active[rows, slots[hit]] = False
+        hits = np.where(self.timers[:, INVINCIBILITY_TIMER] > 0, 0, np.bincount(rows, minlength=self.num_envs))
+        # The shield soaks up the first hit
+        shielded = self.shield & (hits > 0)
+        self.shield &= ~shielded
+        damage = hits - shielded
+        self.health -= damage
+        self.combo[damage > 0] = 0
+
+    def _collect_upgrades(self):
+        px = self.player_x[:, None]
+        size = self.player_size[:, None]
+        collected = (self.upgrade_active
+                     & (self.upgrade_x < px + size) & (px < self.upgrade_x + UPGRADE_SIZE)
+                     & (self.upgrade_y < PLAYER_Y + size) & (PLAYER_Y < self.upgrade_y + UPGRADE_SIZE))
+        if not collected.any():
+            return
+        if self.masked:
+            rows, slots = np.nonzero(collected)
+            missed = ~overlaps_batch(UPGRADE_MASKS, 0, UPGRADE_SIZE, self.upgrade_x[rows, slots],
+                                     self.upgrade_y[rows, slots], self.player_x[rows], PLAYER_Y,
+                                     self.player_size[rows])
+            collected[rows[missed], slots[missed]] = False
+        self.upgrade_active &= ~collected
+        # Collections are rare, so apply them one at a time
+        for row, slot in zip(*np.nonzero(collected)):
+            kind = self.upgrade_kind[row, slot]
+            upgrade_type = UPGRADE_TYPES[kind]
+            if upgrade_type == "shield":
+                self.shield[row] = True
+            elif upgrade_type == "speed":
+                self.player_speed[row] = min(self.player_speed[row] * 1.5, MAX_PLAYER_SPEED)
+            elif upgrade_type == "shrink":
+                self.player_size[row] = max(self.player_size[row] * 0.8, MIN_PLAYER_SIZE)
+            if UPGRADE_TIMER_SLOT[kind] >= 0:
+                self.timers[row, UPGRADE_TIMER_SLOT[kind]] = UPGRADE_DURATION_TICKS[kind]
+
+    def _advance_timers(self):
+        running = self.timers > 0
+        self.timers -= np.minimum(self.timers, self.frame_skip)
+        expired = running & (self.timers == 0)
+        self.player_speed[expired[:, SPEED_TIMER]] = PLAYER_SPEED
+        self.player_size[expired[:, SHRINK_TIMER]] = PLAYER_SIZE
+
+    def _pull_upgrades(self):
+        magnet = self.timers[:, MAGNET_TIMER] > 0
+        if not magnet.any():
+            return
+        pull_upgrades(self.upgrade_x, self.upgrade_y, self.upgrade_active, magnet, self.player_x, PLAYER_Y,
+                      MAGNET_PULL * self.frame_skip)
+
+    def _observe(self):
+        if self.obs_mode == "grid":
+            return self._observe_grid()
+        hazards = np.stack([self.hazard_x, self.hazard_y, np.where(self.hazard_active, self.hazard_kind, -1)], axis=-1)
+        upgrades = np.stack([self.upgrade_x, self.upgrade_y, np.where(self.upgrade_active, self.upgrade_kind, -1)], axis=-1)
+        player = np.stack([self.player_x, self.player_size, self.health, self.shield], axis=-1)
+        return {
+            "player": player.astype(np.float32),
+            "effects": self.timers.astype(np.float32),
+            "hazards": hazards.astype(np.float32),
+            "upgrades": upgrades.astype(np.float32),
+        }
+
+    def _observe_grid(self):
+        grid = np.zeros((self.num_envs,) + self.grid_shape, dtype=np.uint8)
+        self._paint(grid, self.hazard_x, self.hazard_y, self.hazard_size, self.hazard_active, HAZARD_CELL)
+        self._paint(grid, self.upgrade_x, self.upgrade_y, np.full(self.upgrade_x.shape, UPGRADE_SIZE),
+                    self.upgrade_active, UPGRADE_CELL)
+        self._paint(grid, self.player_x[:, None], np.full((self.num_envs, 1), PLAYER_Y),
+                    self.player_size[:, None], np.ones((self.num_envs, 1), dtype=bool), PLAYER_CELL)
+        return grid
+
+    def _paint(self, grid, x, y, size, active, value):
+        # Mark every cell a box overlaps; boxes span at most a few cells
+        rows_count, cols_count = self.grid_shape
+        cell = self.grid_cell
+        col0 = np.floor(x / cell).astype(np.int64)
+        col1 = np.floor((x + size - 1) / cell).astype(np.int64)
+        row0 = np.floor(y / cell).astype(np.int64)
+        row1 = np.floor((y + size - 1) / cell).astype(np.int64)
+        span = int(max(HAZARD_SIZES + (PLAYER_SIZE,)) // cell) + 2
+        env = np.broadcast_to(self.rows[:, None], x.shape)
+        flat = grid.reshape(self.num_envs, -1)
+        for dr in range(span):
+            row = row0 + dr
+            for dc in range(span):
+                col = col0 + dc
+                mask = (active & (row <= row1) & (col <= col1)
+                        & (row >= 0) & (row < rows_count) & (col >= 0) & (col < cols_count))
+                flat[env[mask], row[mask] * cols_count + col[mask]] = value
+
+class SpaceDodgerEnv:
+    def __init__(self, **kwargs):
+        self.envs = VectorSpaceDodgerEnv(1, autoreset=False, **kwargs)
+
+    def reset(self, seed=None):
+        obs, info = self.envs.reset(seed)
+        return self._first(obs), self._first(info)
+
+    def step(self, action):
+        obs, rewards, terminated, truncated, info = self.envs.step(action)
+        return self._first(obs), float(rewards[0]), bool(terminated[0]), bool(truncated[0]), self._first(info)
+
+    def _first(self, obs):
+        if isinstance(obs, dict):
+            return {key: value[0] for key, value in obs.items()}
+        return obs[0]
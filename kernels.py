@@ -0,0 +1,156 @@
+# Numeric kernels for the array-backed hazard and upgrade state in env.py:
+# homing and falling motion, magnet pull, and the box overlap tests for
+# collisions. State is (envs, slots) arrays with one player per row.
+#
+# Every kernel has a NumPy version and a loop version doing the same
+# arithmetic in the same order, so both give identical results. When Numba
+# is installed the loop versions are compiled and used; they skip inactive
+# slots and avoid NumPy's temporaries. Set SPACE_DODGER_JIT=0 to use the
+# NumPy versions anyway.
+import os
+
+import numpy as np
+
+from rules import HOMING, HOMING_COOLDOWN, MAGNET_RANGE
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Swept box overlap, like swept_collision in main.py, for broadcast arrays of
+# boxes moving in straight lines from (x0, y0) to (x1, y1) over one step
+def swept_overlap(ax0, ay0, ax1, ay1, asize, bx0, by0, bx1, by1, bsize):
+    enter = np.full(np.broadcast(ax0, bx0).shape, -np.inf)
+    leave = np.full(enter.shape, np.inf)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for a0, a1, b0, b1 in ((ax0, ax1, bx0, bx1), (ay0, ay1, by0, by1)):
+            # a relative to b overlaps while -asize < offset < bsize
+            offset = a0 - b0
+            velocity = (a1 - a0) - (b1 - b0)
+            t0 = (-asize - offset) / velocity
+            t1 = (bsize - offset) / velocity
+            still = velocity == 0
+            inside = (-asize < offset) & (offset < bsize)
+            enter = np.maximum(enter, np.where(still, np.where(inside, -np.inf, np.inf), np.minimum(t0, t1)))
+            leave = np.minimum(leave, np.where(still, np.where(inside, np.inf, -np.inf), np.maximum(t0, t1)))
+    return (enter < leave) & (enter < 1) & (leave > 0)
+
+# Moves hazards on by `ticks` ticks in place. A homing hazard whose cooldown
+# has run out steers towards the player for one tick and falls for the rest.
+def move_hazards_numpy(x, y, speed, cooldown, kind, active, player_x, player_y, ticks):
+    homing = active & (kind == HOMING)
+    seek = homing & (cooldown <= 0)
+    fall = speed if ticks == 1 else speed * ticks
+    if seek.any():
+        dx = player_x[:, None] - x
+        dy = player_y - y
+        step = speed * 0.5 / np.maximum(1, np.hypot(dx, dy))
+        x += np.where(seek, dx * step, 0)
+        seek_y = dy * step
+        if ticks > 1:
+            seek_y += speed * (ticks - 1)
+        y += np.where(seek, seek_y, np.where(active, fall, 0))
+        cooldown[seek] = HOMING_COOLDOWN - (ticks - 1)
+    else:
+        y += np.where(active, fall, 0)
+    waiting = homing & ~seek
+    cooldown -= waiting if ticks == 1 else waiting * ticks
+
+def move_hazards_loop(x, y, speed, cooldown, kind, active, player_x, player_y, ticks):
+    for i in range(x.shape[0]):
+        for j in range(x.shape[1]):
+            if not active[i, j]:
+                continue
+            if kind[i, j] != HOMING:
+                y[i, j] += speed[i, j] * ticks
+            elif cooldown[i, j] <= 0:
+                dx = player_x[i] - x[i, j]
+                dy = player_y - y[i, j]
+                step = speed[i, j] * 0.5 / max(1.0, np.hypot(dx, dy))
+                x[i, j] += dx * step
+                seek_y = dy * step
+                if ticks > 1:
+                    seek_y += speed[i, j] * (ticks - 1)
+                y[i, j] += seek_y
+                cooldown[i, j] = HOMING_COOLDOWN - (ticks - 1)
+            else:
+                y[i, j] += speed[i, j] * ticks
+                cooldown[i, j] -= ticks
+
+# Pulls active upgrades within MAGNET_RANGE towards the player by `pull`,
+# in rows where the magnet is on
+def pull_upgrades_numpy(x, y, active, magnet, player_x, player_y, pull):
+    dx = player_x[:, None] - x
+    dy = player_y - y
+    dist = np.hypot(dx, dy)
+    pulled = magnet[:, None] & active & (dist < MAGNET_RANGE) & (dist > 0)
+    scale = np.where(pulled, pull / np.where(pulled, dist, 1), 0)
+    x += dx * scale
+    y += dy * scale
+
+def pull_upgrades_loop(x, y, active, magnet, player_x, player_y, pull):
+    for i in range(x.shape[0]):
+        if not magnet[i]:
+            continue
+        for j in range(x.shape[1]):
+            if not active[i, j]:
+                continue
+            dx = player_x[i] - x[i, j]
+            dy = player_y - y[i, j]
+            dist = np.hypot(dx, dy)
+            if 0 < dist < MAGNET_RANGE:
+                scale = pull / dist
+                x[i, j] += dx * scale
+                y[i, j] += dy * scale
+
+# For candidate hazards, given as flat arrays: whether each overlaps the
+# player now or passed through it while both moved from their start
+# positions. The player's row stays at player_y.
+def hazard_hits_numpy(player_x0, player_x, player_y, player_size, x0, y0, x, y, size):
+    return (((x < player_x + player_size) & (player_x < x + size)
+             & (y < player_y + player_size) & (player_y < y + size))
+            | swept_overlap(player_x0, player_y, player_x, player_y, player_size, x0, y0, x, y, size))
+
+def hazard_hits_loop(player_x0, player_x, player_y, player_size, x0, y0, x, y, size):
+    hits = np.zeros(len(x), dtype=np.bool_)
+    for k in range(len(x)):
+        psize = player_size[k]
+        if x[k] < player_x[k] + psize and player_x[k] < x[k] + size[k] and y[k] < player_y + psize and player_y < y[k] + size[k]:
+            hits[k] = True
+            continue
+        # The player only moves sideways
+        enter, leave = -np.inf, np.inf
+        offset = player_x0[k] - x0[k]
+        velocity = (player_x[k] - player_x0[k]) - (x[k] - x0[k])
+        if velocity == 0:
+            if not -psize < offset < size[k]:
+                continue
+        else:
+            t0 = (-psize - offset) / velocity
+            t1 = (size[k] - offset) / velocity
+            enter = max(enter, min(t0, t1))
+            leave = min(leave, max(t0, t1))
+        offset = player_y - y0[k]
+        velocity = (player_y - player_y) - (y[k] - y0[k])
+        if velocity == 0:
+            if not -psize < offset < size[k]:
+                continue
+        else:
+            t0 = (-psize - offset) / velocity
+            t1 = (size[k] - offset) / velocity
+            enter = max(enter, min(t0, t1))
+            leave = min(leave, max(t0, t1))
+        hits[k] = enter < leave and enter < 1 and leave > 0
+    return hits
+
+JIT = numba is not None and os.environ.get("SPACE_DODGER_JIT", "1") != "0"
+
+if JIT:
+    move_hazards = numba.njit(cache=True)(move_hazards_loop)
+    pull_upgrades = numba.njit(cache=True)(pull_upgrades_loop)
+    hazard_hits = numba.njit(cache=True)(hazard_hits_loop)
+else:
+    move_hazards = move_hazards_numpy
+    pull_upgrades = pull_upgrades_numpy
+    hazard_hits = hazard_hits_numpy
@@ -0,0 +1,259 @@
+# Shared leaderboard for many game clients.
+#
+# The server owns the SQLite store and speaks newline-delimited JSON over TCP:
+#
+#     python leaderboard.py --db game_data.db --port 8765
+#
+# Games use it by setting SPACE_DODGER_LEADERBOARD=host:port, which makes
+# database.insert_score/get_top_scores/... go through LeaderboardClient.
+# The client keeps a small pool of connections and pipelines requests. It
+# sends submitted scores in batches and caches reads for a short TTL.
+import argparse
+import asyncio
+import json
+import queue
+import socket
+import threading
+import time
+
+from database import open_db, store_scores, query_high_score, query_top_scores, query_highest_score
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+def parse_address(address):
+    if isinstance(address, tuple):
+        return address
+    host, _, port = address.rpartition(":")
+    return (host or DEFAULT_HOST, int(port))
+
+class LeaderboardServer:
+    def __init__(self, db_name='game_data.db', host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.db_name = db_name
+        self.host = host
+        self.port = port
+        self.address = None
+        self.conn = None
+        self._loop = None
+        self._stopping = None
+        # Open connections: each writer and the task handling it
+        self._connections = {}
+        self._ready = threading.Event()
+        self._thread = None
+
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "submit":
+            scores = [int(score) for score in request["scores"]]
+            store_scores(self.conn, scores)
+            return len(scores)
+        if op == "top":
+            return query_top_scores(self.conn, int(request.get("limit", 5)))
+        if op == "high":
+            return query_high_score(self.conn)
+        if op == "highest":
+            return query_highest_score(self.conn)
+        raise ValueError(f"Unknown op: {op}")
+
+    async def _handle(self, reader, writer):
+        # Requests on one connection are answered in order, so clients may
+        # write several before reading any replies
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = {"ok": True, "result": self.dispatch(json.loads(line))}
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+    async def _serve(self):
+        # The event loop thread is the only one that touches SQLite
+        self.conn = open_db(self.db_name)
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.address = server.sockets[0].getsockname()[:2]
+        self._ready.set()
+        try:
+            async with server:
+                await self._stopping.wait()
+                # Hang up on the clients still connected, so their handlers
+                # read the end of the stream and return instead of being
+                # cancelled when the loop shuts down
+                server.close()
+                handlers = list(self._connections.values())
+                for writer in list(self._connections):
+                    writer.close()
+                await asyncio.gather(*handlers)
+        finally:
+            self.conn.close()
+            self.conn = None
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self.address
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._loop = None
+
+class LeaderboardClient:
+    def __init__(self, address, pool_size=4, batch_size=32, flush_interval=1.0, cache_ttl=2.0, timeout=5.0):
+        self.address = parse_address(address)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(pool_size)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._cache = {}
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile("rb")
+
+    # Send all requests in one write, then read the replies in order
+    def request(self, *requests):
+        data = b"".join(json.dumps(request).encode() + b"\n" for request in requests)
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+            responses = self._exchange(connection, data, len(requests))
+        else:
+            try:
+                responses = self._exchange(connection, data, len(requests))
+            except ConnectionError:
+                # The server may have closed a pooled connection since, as
+                # it does when it restarts; try once more on a new one
+                connection = self._connect()
+                responses = self._exchange(connection, data, len(requests))
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            sock, reader = connection
+            reader.close()
+            sock.close()
+        for response in responses:
+            if not response["ok"]:
+                raise RuntimeError(f"Leaderboard error: {response['error']}")
+        return [response["result"] for response in responses]
+
+    # Closes the connection if anything goes wrong
+    def _exchange(self, connection, data, count):
+        sock, reader = connection
+        try:
+            sock.sendall(data)
+            responses = []
+            for _ in range(count):
+                line = reader.readline()
+                if not line:
+                    raise ConnectionError("Leaderboard server closed the connection")
+                responses.append(json.loads(line))
+        except Exception:
+            reader.close()
+            sock.close()
+            raise
+        return responses
+
+    def insert_score(self, score):
+        self.insert_scores((score,))
+
+    def insert_scores(self, scores):
+        with self._lock:
+            self._pending.extend(int(score) for score in scores)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if pending:
+            try:
+                self.request({"op": "submit", "scores": pending})
+            except Exception:
+                # Keep the batch for the next flush, ahead of newer scores
+                with self._lock:
+                    self._pending[:0] = pending
+                raise
+            self._cache.clear()
+
+    # Scores waiting to be sent, including any a failed flush kept
+    def unsent(self):
+        with self._lock:
+            return list(self._pending)
+
+    def _cached(self, key, request):
+        # Reads see this client's own submissions
+        self.flush()
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+        result, = self.request(request)
+        self._cache[key] = (now + self.cache_ttl, result)
+        return result
+
+    def get_top_scores(self, limit=5):
+        return [tuple(row) for row in self._cached(("top", limit), {"op": "top", "limit": limit})]
+
+    def get_high_score(self):
+        return self._cached("high", {"op": "high"})
+
+    def get_highest_score(self):
+        return tuple(self._cached("highest", {"op": "highest"}))
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            while True:
+                try:
+                    sock, reader = self._pool.get_nowait()
+                except queue.Empty:
+                    break
+                reader.close()
+                sock.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the shared Space Dodger leaderboard server")
+    parser.add_argument("--db", default="game_data.db")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    server = LeaderboardServer(args.db, args.host, args.port)
+    host, port = server.start()
+    print(f"Leaderboard serving {args.db} on {host}:{port}")
+    try:
+        while server._thread.is_alive():
+            server._thread.join(0.5)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,26 @@ import sys
 import random
 from datetime import datetime
 from database import init_db, insert_score, get_high_score, get_top_scores, get_highest_score
+from effects import EffectScheduler
+from controls import ControlSampler, LatencyMeter
+from spawns import SpawnScheduler
+from masks import hazard_table, upgrade_table, swept_overlaps
+from rules import (
+    width, height, FPS, black, white, red, blue, green, yellow, purple,
+    STAR_SYSTEMS, HAZARDS, UPGRADES, PLAYER_SIZE, PLAYER_SPEED, PLAYER_HEALTH,
+    MAX_PLAYER_SPEED, MIN_PLAYER_SIZE, LEVEL_THRESHOLD, UPGRADE_SIZE, UPGRADE_SPEED,
+    UPGRADE_SPAWN_RATE, MAGNET_RANGE, MAGNET_PULL,
+    HAZARD_TYPES, HAZARD_CODES, HAZARD_SIZES, HAZARD_COLORS, HOMING,
+    UPGRADE_TYPES, UPGRADE_CODES, UPGRADE_COLORS, TIMED_UPGRADES,
+    LEFT, RIGHT, SPECIAL, MOVE_SHIFT, MOVE_STEPS, hazard_speed, spawn_rate_for_level,
+)
+from recording import save_recording
+from replay import FrameSnapshot, PlayerFrame, ReplayBuffer, save_replay
 import os
 import math
+import threading
+import time
+from array import array
 
 # Disable print statements during testing
 if 'PYTEST_CURRENT_TEST' in os.environ:
@@ -13,22 +31,13 @@ if 'PYTEST_CURRENT_TEST' in os.environ:
 
 # Initialize Pygame and the database
 pygame.init()
-init_db()
+init_db(leaderboard_address=os.environ.get("SPACE_DODGER_LEADERBOARD"))
 
 # Set up display
-width, height = 800, 600
+BACKGROUND_SEED = 2024
 window = pygame.display.set_mode((width, height))
 pygame.display.set_caption("Space Dodger")
 
-# Set up colors
-black = (0, 0, 0)
-white = (255, 255, 255)
-red = (255, 60, 60)
-blue = (0, 100, 255)
-green = (0, 255, 100)
-yellow = (255, 255, 0)
-purple = (200, 0, 200)
-
 # Load and scale background image
 try:
     background = pygame.image.load("space_background.png")
@@ -37,59 +46,71 @@ except FileNotFoundError:
     print("Warning: space_background.png not found. Using a simple starfield background.")
     background = pygame.Surface((width, height))
     background.fill((0, 0, 0))  # Black background
+    # Fixed seed so every process, including offline renderers, draws the same sky
+    starfield = random.Random(BACKGROUND_SEED)
     for _ in range(200):  # Add 200 stars
-        x = random.randint(0, width - 1)
-        y = random.randint(0, height - 1)
+        x = starfield.randint(0, width - 1)
+        y = starfield.randint(0, height - 1)
         pygame.draw.circle(background, (255, 255, 255), (x, y), 1)
 
-# New game variables
-STAR_SYSTEMS = [
-    "Sol", "Alpha Centauri", "Sirius", "Betelgeuse", "Andromeda", 
-    "Orion", "Pleiades", "Cygnus", "Cassiopeia", "Galactic Core",
-    "Nebula X", "Quasar Y", "Black Hole Z", "Supernova Remnant",
-    "Neutron Star Cluster", "Gamma Ray Burst", "Dark Matter Cloud"
-]
-HAZARDS = {
-    "asteroid": {"speed": 5, "size": 50, "color": (139, 69, 19)},
-    "comet": {"speed": 7, "size": 40, "color": (100, 149, 237)},
-    "alien": {"speed": 6, "size": 60, "color": (50, 205, 50)},
-    "homing": {"speed": 4, "size": 45, "color": (255, 0, 0)},
-    "splitting": {"speed": 5, "size": 55, "color": (255, 165, 0)},
-}
-
-# Add this after the HAZARDS dictionary
-UPGRADES = {
-    "shield": {"color": yellow},  # Remove duration for shield
-    "speed": {"color": blue, "duration": 7},
-    "shrink": {"color": green, "duration": 12},
-    "invincibility": {"color": white, "duration": 5},
-    "magnet": {"color": (128, 128, 128), "duration": 15},
-}
-
 # Game variables
 player_size = 50
 enemy_size = 50
 power_up_size = 30
 enemy_speed = 5
 power_up_speed = 3
-player_trail = []
 particle_list = []
+current_game = None
 stars = [(random.randint(0, width), random.randint(0, height), random.random()) for _ in range(100)]
 score = 0
 
-# Add this constant near the top of the file, with other game variables
-MAX_PLAYER_SPEED = 15  # Reduced from 20
-MIN_PLAYER_SIZE = 30  # Minimum size the player can shrink to
+TRAIL_LENGTH = 10
+
+# Fixed-size ring buffer of recent player positions, iterated newest first
+class Trail:
+    __slots__ = ("xs", "ys", "head", "length")
+
+    def __init__(self, capacity=TRAIL_LENGTH):
+        self.xs = array("d", bytes(8 * capacity))
+        self.ys = array("d", bytes(8 * capacity))
+        self.head = 0
+        self.length = 0
+
+    def push(self, x, y):
+        self.head = (self.head - 1) % len(self.xs)
+        self.xs[self.head] = x
+        self.ys[self.head] = y
+        if self.length < len(self.xs):
+            self.length += 1
+
+    def clear(self):
+        self.head = 0
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        capacity = len(self.xs)
+        for i in range(self.length):
+            j = (self.head + i) % capacity
+            yield self.xs[j], self.ys[j]
+
+player_trail = Trail()
 
 class Player:
+    __slots__ = ("size", "x", "y", "speed", "health", "shield", "invincible",
+                 "multi_shot", "magnet", "special_charge", "combo")
+
     def __init__(self):
         self.reset()
 
     def reset(self):
-        self.size = 50
-        self.pos = [width // 2, height - 2 * self.size]
-        self.speed = 10
-        self.health = 3
+        self.size = PLAYER_SIZE
+        self.x = width // 2
+        self.y = height - 2 * self.size
+        self.speed = PLAYER_SPEED
+        self.health = PLAYER_HEALTH
         self.shield = False
         self.invincible = False
         self.multi_shot = False
@@ -97,6 +118,15 @@ class Player:
         self.special_charge = 0
         self.combo = 0
 
+    # pos is a copy; move the player through x and y
+    @property
+    def pos(self):
+        return [self.x, self.y]
+
+    @pos.setter
+    def pos(self, pos):
+        self.x, self.y = pos
+
     def increase_speed(self):
         self.speed = min(self.speed * 1.5, MAX_PLAYER_SPEED)
 
@@ -104,7 +134,7 @@ class Player:
         self.size = max(self.size * 0.8, MIN_PLAYER_SIZE)
 
     def draw(self):
-        pygame.draw.rect(window, white, (*self.pos, self.size, self.size))
+        pygame.draw.rect(window, white, (self.x, self.y, self.size, self.size))
 
     def take_damage(self):
         if not self.shield:
@@ -125,114 +155,143 @@ class Player:
         return False
 
 class Hazard:
-    def __init__(self, hazard_type):
-        self.type = hazard_type
-        self.size = HAZARDS[hazard_type]["size"]
-        self.speed = HAZARDS[hazard_type]["speed"]
-        self.color = HAZARDS[hazard_type]["color"]
-        self.pos = [random.randint(0, width - self.size), -self.size]
+    __slots__ = ("kind", "speed", "x", "y", "homing_cooldown")
+
+    def __init__(self, hazard_type, level=0, x=None, rng=random):
+        self.kind = HAZARD_CODES[hazard_type]
+        self.speed = hazard_speed(hazard_type, level)
+        size = HAZARD_SIZES[self.kind]
+        self.x = rng.randint(0, width - size) if x is None else x
+        self.y = -size
         self.homing_cooldown = 0
 
+    @property
+    def type(self):
+        return HAZARD_TYPES[self.kind]
+
+    @property
+    def size(self):
+        return HAZARD_SIZES[self.kind]
+
+    @property
+    def color(self):
+        return HAZARD_COLORS[self.kind]
+
+    # pos is a copy; move the hazard through x and y
+    @property
+    def pos(self):
+        return [self.x, self.y]
+
+    @pos.setter
+    def pos(self, pos):
+        self.x, self.y = pos
+
     def update(self, player_pos):
-        if self.type == "homing":
+        if self.kind == HOMING:
             if self.homing_cooldown <= 0:
-                dx = player_pos[0] - self.pos[0]
-                dy = player_pos[1] - self.pos[1]
+                dx = player_pos[0] - self.x
+                dy = player_pos[1] - self.y
                 dist = max(1, (dx**2 + dy**2)**0.5)
-                self.pos[0] += dx / dist * self.speed * 0.5  # Reduced homing speed
-                self.pos[1] += dy / dist * self.speed * 0.5
+                self.x += dx / dist * self.speed * 0.5  # Reduced homing speed
+                self.y += dy / dist * self.speed * 0.5
                 self.homing_cooldown = 60  # Set cooldown to 1 second (assuming 60 FPS)
             else:
-                self.pos[1] += self.speed
+                self.y += self.speed
                 self.homing_cooldown -= 1
         else:
-            self.pos[1] += self.speed
+            self.y += self.speed
 
     def draw(self):
-        draw_space_invader(window, self.pos[0], self.pos[1], self.size, self.color)
+        draw_space_invader(window, self.x, self.y, HAZARD_SIZES[self.kind], HAZARD_COLORS[self.kind])
 
 class Upgrade:
-    def __init__(self, upgrade_type):
-        self.type = upgrade_type
-        self.color = UPGRADES[upgrade_type]["color"]
-        self.size = 30
-        self.pos = [random.randint(0, width - self.size), -self.size]
-        self.speed = 3
+    __slots__ = ("kind", "x", "y")
+    size = UPGRADE_SIZE
+    speed = UPGRADE_SPEED
+
+    def __init__(self, upgrade_type, x=None, rng=random):
+        self.kind = UPGRADE_CODES[upgrade_type]
+        self.x = rng.randint(0, width - self.size) if x is None else x
+        self.y = -self.size
+
+    @property
+    def type(self):
+        return UPGRADE_TYPES[self.kind]
+
+    @property
+    def color(self):
+        return UPGRADE_COLORS[self.kind]
+
+    # pos is a copy; move the upgrade through x and y
+    @property
+    def pos(self):
+        return [self.x, self.y]
+
+    @pos.setter
+    def pos(self, pos):
+        self.x, self.y = pos
 
     def update(self):
-        self.pos[1] += self.speed
+        self.y += self.speed
 
     def draw(self):
-        if self.type == "shield":
-            self.draw_shield()
-        elif self.type == "speed":
-            self.draw_speed()
-        elif self.type == "shrink":
-            self.draw_shrink()
-        elif self.type == "invincibility":
-            self.draw_invincibility()
-        elif self.type == "magnet":
-            self.draw_magnet()
-
-    def draw_shield(self):
-        center_x = self.pos[0] + self.size // 2
-        center_y = self.pos[1] + self.size // 2
-        radius = self.size // 2
-
-        pygame.draw.circle(window, self.color, (center_x, center_y), radius, 2)
-        points = [
-            (center_x - radius // 2, center_y + radius // 2),
-            (center_x, center_y - radius // 2),
-            (center_x + radius // 2, center_y + radius // 2)
-        ]
-        pygame.draw.polygon(window, self.color, points, 2)
-        pygame.draw.line(window, self.color, (center_x, center_y + radius // 2), (center_x, center_y + radius - 2), 2)
-
-    def draw_speed(self):
-        center_x = self.pos[0] + self.size // 2
-        center_y = self.pos[1] + self.size // 2
-        radius = self.size // 2
-
-        pygame.draw.circle(window, self.color, (center_x, center_y), radius, 2)
-        points = [
-            (center_x - radius // 2, center_y),
-            (center_x + radius // 2, center_y - radius // 4),
-            (center_x + radius // 2, center_y + radius // 4)
-        ]
-        pygame.draw.polygon(window, self.color, points)
-
-    def draw_shrink(self):
-        center_x = self.pos[0] + self.size // 2
-        center_y = self.pos[1] + self.size // 2
-        radius = self.size // 2
-
-        pygame.draw.circle(window, self.color, (center_x, center_y), radius, 2)
-        pygame.draw.line(window, self.color, (center_x - radius // 2, center_y - radius // 2), (center_x + radius // 2, center_y + radius // 2), 2)
-        pygame.draw.line(window, self.color, (center_x + radius // 2, center_y - radius // 2), (center_x - radius // 2, center_y + radius // 2), 2)
-
-    def draw_invincibility(self):
-        center_x = self.pos[0] + self.size // 2
-        center_y = self.pos[1] + self.size // 2
-        radius = self.size // 2
-
-        pygame.draw.circle(window, self.color, (center_x, center_y), radius, 2)
-        pygame.draw.circle(window, self.color, (center_x, center_y), radius // 2, 2)
-        for i in range(8):
-            angle = i * math.pi / 4
-            x = center_x + int(radius * 0.8 * math.cos(angle))
-            y = center_y + int(radius * 0.8 * math.sin(angle))
-            pygame.draw.circle(window, self.color, (x, y), 2)
-
-    def draw_magnet(self):
-        center_x = self.pos[0] + self.size // 2
-        center_y = self.pos[1] + self.size // 2
-        radius = self.size // 2
-
-        pygame.draw.circle(window, self.color, (center_x, center_y), radius, 2)
-        pygame.draw.arc(window, self.color, (center_x - radius // 2, center_y - radius // 2, radius, radius), math.pi / 2, 3 * math.pi / 2, 2)
-        pygame.draw.arc(window, self.color, (center_x - radius // 2, center_y - radius // 2, radius, radius), -math.pi / 2, math.pi / 2, 2)
-        pygame.draw.line(window, self.color, (center_x - radius // 2, center_y - radius // 4), (center_x - radius // 2, center_y + radius // 4), 2)
-        pygame.draw.line(window, self.color, (center_x + radius // 2, center_y - radius // 4), (center_x + radius // 2, center_y + radius // 4), 2)
+        draw_upgrade(self.kind, self.x, self.y)
+
+# Upgrade icons are drawn from plain values, so a FrameSnapshot can be drawn
+# the same way as the live Upgrades
+def draw_shield_icon(color, center_x, center_y, radius):
+    pygame.draw.circle(window, color, (center_x, center_y), radius, 2)
+    points = [
+        (center_x - radius // 2, center_y + radius // 2),
+        (center_x, center_y - radius // 2),
+        (center_x + radius // 2, center_y + radius // 2)
+    ]
+    pygame.draw.polygon(window, color, points, 2)
+    pygame.draw.line(window, color, (center_x, center_y + radius // 2), (center_x, center_y + radius - 2), 2)
+
+def draw_speed_icon(color, center_x, center_y, radius):
+    pygame.draw.circle(window, color, (center_x, center_y), radius, 2)
+    points = [
+        (center_x - radius // 2, center_y),
+        (center_x + radius // 2, center_y - radius // 4),
+        (center_x + radius // 2, center_y + radius // 4)
+    ]
+    pygame.draw.polygon(window, color, points)
+
+def draw_shrink_icon(color, center_x, center_y, radius):
+    pygame.draw.circle(window, color, (center_x, center_y), radius, 2)
+    pygame.draw.line(window, color, (center_x - radius // 2, center_y - radius // 2), (center_x + radius // 2, center_y + radius // 2), 2)
+    pygame.draw.line(window, color, (center_x + radius // 2, center_y - radius // 2), (center_x - radius // 2, center_y + radius // 2), 2)
+
+def draw_invincibility_icon(color, center_x, center_y, radius):
+    pygame.draw.circle(window, color, (center_x, center_y), radius, 2)
+    pygame.draw.circle(window, color, (center_x, center_y), radius // 2, 2)
+    for i in range(8):
+        angle = i * math.pi / 4
+        x = center_x + int(radius * 0.8 * math.cos(angle))
+        y = center_y + int(radius * 0.8 * math.sin(angle))
+        pygame.draw.circle(window, color, (x, y), 2)
+
+def draw_magnet_icon(color, center_x, center_y, radius):
+    pygame.draw.circle(window, color, (center_x, center_y), radius, 2)
+    pygame.draw.arc(window, color, (center_x - radius // 2, center_y - radius // 2, radius, radius), math.pi / 2, 3 * math.pi / 2, 2)
+    pygame.draw.arc(window, color, (center_x - radius // 2, center_y - radius // 2, radius, radius), -math.pi / 2, math.pi / 2, 2)
+    pygame.draw.line(window, color, (center_x - radius // 2, center_y - radius // 4), (center_x - radius // 2, center_y + radius // 4), 2)
+    pygame.draw.line(window, color, (center_x + radius // 2, center_y - radius // 4), (center_x + radius // 2, center_y + radius // 4), 2)
+
+UPGRADE_ICONS = {
+    "shield": draw_shield_icon,
+    "speed": draw_speed_icon,
+    "shrink": draw_shrink_icon,
+    "invincibility": draw_invincibility_icon,
+    "magnet": draw_magnet_icon,
+}
+
+def draw_upgrade(kind, x, y):
+    draw_icon = UPGRADE_ICONS.get(UPGRADE_TYPES[kind])
+    if draw_icon is not None:
+        size = UPGRADE_SIZE
+        draw_icon(UPGRADE_COLORS[kind], x + size // 2, y + size // 2, size // 2)
 
 def create_gradient_surface(size, color1, color2):
     surface = pygame.Surface(size, pygame.SRCALPHA)
@@ -251,9 +310,17 @@ def draw_glowing_circle(surface, color, pos, radius):
         pygame.draw.circle(surface, glow_color, pos, r)
     pygame.draw.circle(surface, color[:3], pos, radius)  # Use only RGB values for the final circle
 
+# Fonts are loaded once per size; opening one every frame is slow and leaks
+_fonts = {}
+
+def get_font(size):
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
 def draw_text(text, color, x, y, size=36, align="left"):
-    font = pygame.font.Font(None, size)
-    text_surface = font.render(text, True, color)
+    text_surface = get_font(size).render(text, True, color)
     text_rect = text_surface.get_rect()
     
     if align == "left":
@@ -342,23 +409,18 @@ def draw_power_ups(power_up_list):
         
         draw_glowing_circle(window, color, (power_up[0] + power_up_size // 2, power_up[1] + power_up_size // 2), power_up_size // 2 + size_offset)
 
-def draw_player(player):
-    global player_trail
+def draw_player(player, trail):
     # Draw trail
-    player_trail.insert(0, player.pos.copy())
-    if len(player_trail) > 10:
-        player_trail.pop()
-    
-    for i, trail_pos in enumerate(player_trail):
+    for i, trail_pos in enumerate(trail):
         alpha = 255 - i * 25
         trail_color = (*blue, alpha)
         trail_size = player.size - i * 2
         draw_glowing_circle(window, blue, (int(trail_pos[0] + player.size // 2), int(trail_pos[1] + player.size // 2)), trail_size // 2)
     
     if player.shield:
-        draw_glowing_circle(window, yellow, (int(player.pos[0] + player.size // 2), int(player.pos[1] + player.size // 2)), player.size // 2 + 5)
+        draw_glowing_circle(window, yellow, (int(player.x + player.size // 2), int(player.y + player.size // 2)), player.size // 2 + 5)
     
-    player.draw()
+    pygame.draw.rect(window, white, (player.x, player.y, player.size, player.size))
 
 def drop_enemies(enemy_list):
     if len(enemy_list) < 10 and random.random() < 0.1:
@@ -426,14 +488,35 @@ def detect_collision(pos1, pos2, size1, size2):
     
     return x_collision and y_collision
 
-def create_particles(x, y, color):
+# Whether two boxes moving in straight lines from start to end overlap at any
+# point during the tick. Catches fast hazards that would otherwise pass
+# through the player between two frames.
+def swept_collision(start1, end1, size1, start2, end2, size2):
+    enter, leave = -math.inf, math.inf
+    for axis in (0, 1):
+        # Box 1 relative to box 2 overlaps while -size1 < offset < size2
+        offset = start1[axis] - start2[axis]
+        velocity = (end1[axis] - start1[axis]) - (end2[axis] - start2[axis])
+        if velocity == 0:
+            if not -size1 < offset < size2:
+                return False
+            continue
+        t0 = (-size1 - offset) / velocity
+        t1 = (size2 - offset) / velocity
+        if t0 > t1:
+            t0, t1 = t1, t0
+        enter = max(enter, t0)
+        leave = min(leave, t1)
+    return enter < leave and enter < 1 and leave > 0
+
+def create_particles(x, y, color, rng=random):
     num_particles = 20
     for _ in range(num_particles):
-        particle_x = x + random.randint(-10, 10)
-        particle_y = y + random.randint(-10, 10)
-        particle_size = random.randint(2, 5)
-        particle_speed = [random.uniform(-2, 2), random.uniform(-2, 2)]
-        particle_life = random.randint(20, 40)
+        particle_x = x + rng.randint(-10, 10)
+        particle_y = y + rng.randint(-10, 10)
+        particle_size = rng.randint(2, 5)
+        particle_speed = [rng.uniform(-2, 2), rng.uniform(-2, 2)]
+        particle_life = rng.randint(20, 40)
         particle_list.append([particle_x, particle_y, particle_size, particle_speed, color, particle_life])
 
 def update_particles():
@@ -444,9 +527,10 @@ def update_particles():
         if particle[5] <= 0:
             particle_list.remove(particle)
 
-def draw_particles():
-    for particle in particle_list:
-        pygame.draw.circle(window, particle[4], (int(particle[0]), int(particle[1])), particle[2])
+# particles are (x, y, size, color)
+def draw_particles(particles):
+    for x, y, size, color in particles:
+        pygame.draw.circle(window, color, (int(x), int(y)), size)
 
 def draw_stars():
     for star in stars:
@@ -457,18 +541,40 @@ def move_stars():
     for i, star in enumerate(stars):
         stars[i] = ((star[0] - 0.5) % width, (star[1] + (1 + star[2])) % height, star[2])
 
-# Add this function
+# Power-up effects: (apply, expire) callbacks run when an upgrade is collected
+# and when its timer runs out. New upgrade types only need an entry here and
+# in UPGRADES.
+def activate_shield(player):
+    player.shield = True
+
+def reset_speed(player):
+    player.speed = PLAYER_SPEED
+
+def reset_size(player):
+    player.size = PLAYER_SIZE
+
+def activate_invincibility(player):
+    player.invincible = True
+
+def deactivate_invincibility(player):
+    player.invincible = False
+
+def activate_magnet(player):
+    player.magnet = True
+
+def deactivate_magnet(player):
+    player.magnet = False
+
+UPGRADE_EFFECTS = {
+    "shield": (activate_shield, None),
+    "speed": (Player.increase_speed, reset_speed),
+    "shrink": (Player.shrink, reset_size),
+    "invincibility": (activate_invincibility, deactivate_invincibility),
+    "magnet": (activate_magnet, deactivate_magnet),
+}
+
 def apply_upgrade(player, upgrade_type):
-    if upgrade_type == "shield":
-        player.shield = True
-    elif upgrade_type == "speed":
-        player.increase_speed()
-    elif upgrade_type == "shrink":
-        player.shrink()
-    elif upgrade_type == "invincibility":
-        player.invincible = True
-    elif upgrade_type == "magnet":
-        player.magnet = True
+    UPGRADE_EFFECTS[upgrade_type][0](player)
 
 def draw_heart(surface, x, y, width, height):
     color = (255, 0, 0)  # Red color for hearts
@@ -485,65 +591,192 @@ def draw_heart(surface, x, y, width, height):
     ]
     pygame.draw.polygon(surface, color, points)
 
-def draw_hearts(health, x, y, size=30):
+def draw_hearts(health, x, y, size=30, surface=None):
+    if surface is None:
+        surface = window
     for i in range(health):
-        pygame.draw.polygon(window, red, [
+        pygame.draw.polygon(surface, red, [
             (x + i * (size + 5), y + size // 4),
             (x + i * (size + 5) + size // 2, y),
             (x + i * (size + 5) + size, y + size // 4),
             (x + i * (size + 5) + size // 2, y + size)
         ])
-        pygame.draw.circle(window, red, (x + i * (size + 5) + size // 4, y + size // 4), size // 4)
-        pygame.draw.circle(window, red, (x + i * (size + 5) + size * 3 // 4, y + size // 4), size // 4)
-
-def game_loop():
-    global score, high_score, level, enemy_list, enemy_speed, paused, particle_list, player_trail
+        pygame.draw.circle(surface, red, (x + i * (size + 5) + size // 4, y + size // 4), size // 4)
+        pygame.draw.circle(surface, red, (x + i * (size + 5) + size * 3 // 4, y + size // 4), size // 4)
 
-    player = Player()
-    hazards = []
-    upgrades = []
-    score = 0
-    level = 0
-    star_system = STAR_SYSTEMS[level % len(STAR_SYSTEMS)]
-    particle_list = []
-    player_trail = []
+HEART_SIZE = 30
 
-    level_threshold = 50
-    spawn_rate = 0.05
-
-    # Power-up timers
-    power_up_timers = {upgrade: 0 for upgrade in UPGRADES if "duration" in UPGRADES[upgrade]}
-
-    running = True
-    while running:
+# Score, level, hearts and power-up timers on a transparent layer of their own.
+# A field is redrawn only when the value it shows changes, and the layer is
+# composited onto the window in one blits() call covering just the fields.
+class Hud:
+    def __init__(self):
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.values = {}  # field -> value currently drawn
+        self.rects = {}  # field -> area it covers
+        self.blits = None  # (surface, dest, area) for each field, in one blits() call
+        self.power_up_lines = 0
+
+    def _changed(self, field, value):
+        if field in self.values and self.values[field] == value:
+            return False
+        rect = self.rects.pop(field, None)
+        if rect is not None:
+            self.surface.fill((0, 0, 0, 0), rect)
+        self.values[field] = value
+        self.blits = None
+        return True
+
+    def _text(self, field, text, color, x, y):
+        text_surface = get_font(36).render(text, True, color)
+        self.rects[field] = self.surface.blit(text_surface, (x, y))
+
+    def update(self, score, level, star_system, health, power_ups):
+        if self._changed("score", score):
+            self._text("score", f"Score: {score}", white, 10, 10)
+        if self._changed("level", (level, star_system)):
+            self._text("level", f"Level: {level + 1} - {star_system}", white, 10, 50)
+        if self._changed("health", health):
+            x = width - 110
+            draw_hearts(health, x, 10, HEART_SIZE, self.surface)
+            self.rects["health"] = pygame.Rect(x, 10, max(health, 0) * (HEART_SIZE + 5), HEART_SIZE + 1)
+
+        # power_ups is a list of (name, seconds left), seconds None for untimed
+        for i in range(max(len(power_ups), self.power_up_lines)):
+            value = power_ups[i] if i < len(power_ups) else None
+            field = ("power_up", i)
+            if self._changed(field, value) and value is not None:
+                name, seconds = value
+                status = "Active" if seconds is None else f"{seconds}s"
+                self._text(field, f"{name.capitalize()}: {status}", UPGRADES[name]["color"], 10, 90 + i * 30)
+        self.power_up_lines = len(power_ups)
+
+        if self.blits is None:
+            self.blits = [(self.surface, rect, rect) for rect in self.rects.values()]
+
+    def draw(self, target):
+        target.blits(self.blits, False)
+
+hud = Hud()
+
+def read_controls(keys):
+    controls = 0
+    if keys[pygame.K_LEFT]:
+        controls |= LEFT
+    if keys[pygame.K_RIGHT]:
+        controls |= RIGHT
+    if keys[pygame.K_SPACE]:
+        controls |= SPECIAL
+    return controls
+
+KEY_BITS = {pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT, pygame.K_SPACE: SPECIAL}
+POLL_INTERVAL = 0.001
+latency_meter = LatencyMeter()
+# The last few seconds of the current game, for the game-over screen
+replay_buffer = ReplayBuffer()
+
+# Handle events until the next frame is due, stamping each as it arrives.
+# Returns False if the window was closed.
+def poll_input(sampler, deadline):
+    while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                return score
+                return False
+            if event.type == pygame.KEYDOWN and event.key in KEY_BITS:
+                sampler.press(KEY_BITS[event.key], time.perf_counter())
+            elif event.type == pygame.KEYUP and event.key in KEY_BITS:
+                sampler.release(KEY_BITS[event.key], time.perf_counter())
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return True
+        time.sleep(min(remaining, POLL_INTERVAL))
+
+# One game's simulation state. score, level, particle_list and player_trail
+# stay module globals. The game is seeded and records one byte of controls
+# per tick, so it can be replayed exactly from (seed, inputs). Games from
+# before swept collisions replay with swept=False, games from before the
+# spawn scheduler with scheduled=False, which rolls for spawns every tick, and
+# games from before collision masks with masked=False, where any overlap of
+# the bounding boxes is a hit. Each game draws from its own RNG, seeded with
+# its seed, and leaves the random module alone.
+class Game:
+    def __init__(self, seed=None, swept=True, scheduled=True, masked=True):
+        global score, level, particle_list, player_trail
+
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.swept = swept
+        self.masked = masked
+        self.inputs = bytearray()
+
+        self.player = Player()
+        self.hazards = []
+        self.upgrades = []
+        score = 0
+        level = 0
+        self.star_system = STAR_SYSTEMS[level % len(STAR_SYSTEMS)]
+        particle_list = []
+        player_trail = Trail()
+
+        self.level_threshold = LEVEL_THRESHOLD
+        self.spawn_rate = spawn_rate_for_level(level)
+        self.spawns = SpawnScheduler(seed) if scheduled else None
+
+        # Power-up timers
+        self.effects = EffectScheduler(self.player, UPGRADE_EFFECTS)
+
+    # Advance one tick; returns False once the player has run out of health
+    def step(self, controls):
+        global score, level
+
+        self.inputs.append(controls)
+        player = self.player
+        hazards = self.hazards
+        upgrades = self.upgrades
+
+        # Particles drawn last frame move on
+        update_particles()
+
+        player_start = (player.x, player.y)
 
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] and player.pos[0] > 0:
-            player.pos[0] -= player.speed
-        if keys[pygame.K_RIGHT] and player.pos[0] < width - player.size:
-            player.pos[0] += player.speed
+        # Keys held for part of the tick move the player part of a step
+        move = controls >> MOVE_SHIFT
+        speed = player.speed * move / MOVE_STEPS if move else player.speed
+        if controls & LEFT and player.x > 0:
+            player.x -= speed
+        if controls & RIGHT and player.x < width - player.size:
+            player.x += speed
 
         # Level up check
-        if score >= (level + 1) * level_threshold:
+        if score >= (level + 1) * self.level_threshold:
             level += 1
-            star_system = STAR_SYSTEMS[level % len(STAR_SYSTEMS)]
-            for hazard_type in HAZARDS:
-                HAZARDS[hazard_type]["speed"] += 0.1
-            spawn_rate = min(0.05 * (1 + level * 0.05), 0.3)
+            self.star_system = STAR_SYSTEMS[level % len(STAR_SYSTEMS)]
+            self.spawn_rate = spawn_rate_for_level(level)
+            if self.spawns is not None:
+                self.spawns.set_level(level)
 
         # Spawn hazards and upgrades
-        if random.random() < spawn_rate:
-            hazards.append(Hazard(random.choice(list(HAZARDS.keys()))))
-        if random.random() < 0.01:
-            upgrades.append(Upgrade(random.choice(list(UPGRADES.keys()))))
+        if self.spawns is not None:
+            hazard, upgrade = self.spawns.pop()
+            if hazard is not None:
+                hazards.append(Hazard(HAZARD_TYPES[hazard[0]], level, hazard[1]))
+            if upgrade is not None:
+                upgrades.append(Upgrade(UPGRADE_TYPES[upgrade[0]], upgrade[1]))
+        else:
+            rng = self.rng
+            if rng.random() < self.spawn_rate:
+                hazards.append(Hazard(rng.choice(HAZARD_TYPES), level, rng=rng))
+            if rng.random() < UPGRADE_SPAWN_RATE:
+                upgrades.append(Upgrade(rng.choice(UPGRADE_TYPES), rng=rng))
 
         # Update positions and check for dodged hazards
+        hazard_starts = {}
         for hazard in hazards[:]:
-            hazard.update(player.pos)
-            if hazard.pos[1] > height:
+            hazard_starts[hazard] = (hazard.x, hazard.y)
+            hazard.update((player.x, player.y))
+            if hazard.y > height:
                 hazards.remove(hazard)
                 score += 1
                 player.combo += 1
@@ -553,126 +786,321 @@ def game_loop():
         # Update power-ups
         for upgrade in upgrades[:]:
             upgrade.update()
-            if upgrade.pos[1] > height:
+            if upgrade.y > height:
                 upgrades.remove(upgrade)
 
         # Check collisions
-        player_rect = pygame.Rect(player.pos[0], player.pos[1], player.size, player.size)
+        player_pos = (player.x, player.y)
         for hazard in hazards[:]:
-            if player_rect.colliderect(pygame.Rect(hazard.pos[0], hazard.pos[1], hazard.size, hazard.size)):
+            hazard_pos = (hazard.x, hazard.y)
+            if ((detect_collision(player_pos, hazard_pos, player.size, hazard.size)
+                    or self.swept and swept_collision(player_start, player_pos, player.size,
+                                                      hazard_starts[hazard], hazard_pos, hazard.size))
+                    and (not self.masked or self.touches(hazard_table(hazard.kind, hazard.size),
+                                                         hazard_starts[hazard], hazard_pos, player_start))):
                 if not player.invincible:
                     if player.shield:
                         player.shield = False
                     else:
                         player.health -= 1
                         player.combo = 0
-                    create_particles(player.pos[0] + player.size // 2, player.pos[1] + player.size // 2, red)
+                    create_particles(player.x + player.size // 2, player.y + player.size // 2, red, self.rng)
                     if player.health <= 0:
-                        return score
+                        return False
                 hazards.remove(hazard)
 
         for upgrade in upgrades[:]:
-            if player_rect.colliderect(pygame.Rect(upgrade.pos[0], upgrade.pos[1], upgrade.size, upgrade.size)):
-                if "duration" in UPGRADES[upgrade.type]:
-                    power_up_timers[upgrade.type] = UPGRADES[upgrade.type]["duration"] * 60  # 60 FPS
-                apply_upgrade(player, upgrade.type)
-                create_particles(upgrade.pos[0] + upgrade.size // 2, upgrade.pos[1] + upgrade.size // 2, UPGRADES[upgrade.type]["color"])
+            upgrade_pos = (upgrade.x, upgrade.y)
+            if (detect_collision(player_pos, upgrade_pos, player.size, upgrade.size)
+                    and (not self.masked or self.touches(upgrade_table(upgrade.size), upgrade_pos, upgrade_pos,
+                                                         player_pos))):
+                duration = UPGRADES[upgrade.type].get("duration")
+                self.effects.activate(upgrade.type, duration and duration * FPS)
+                create_particles(upgrade.x + upgrade.size // 2, upgrade.y + upgrade.size // 2, UPGRADES[upgrade.type]["color"], self.rng)
                 upgrades.remove(upgrade)
 
         # Handle special ability
-        if keys[pygame.K_SPACE] and player.activate_special():
+        if controls & SPECIAL and player.activate_special():
             for hazard in hazards[:]:
-                create_particles(hazard.pos[0] + hazard.size // 2, hazard.pos[1] + hazard.size // 2, hazard.color)
+                create_particles(hazard.x + hazard.size // 2, hazard.y + hazard.size // 2, hazard.color, self.rng)
                 hazards.remove(hazard)
                 score += 1
 
-        # Apply power-up effects
-        for upgrade, timer in power_up_timers.items():
-            if timer > 0:
-                power_up_timers[upgrade] -= 1
-                if power_up_timers[upgrade] == 0:
-                    if upgrade == "speed":
-                        player.speed = 10
-                    elif upgrade == "shrink":
-                        player.size = 50
-                    elif upgrade == "invincibility":
-                        player.invincible = False
-                    elif upgrade == "magnet":
-                        player.magnet = False
-
-        if power_up_timers["speed"] > 0:
-            player.speed = min(player.speed, MAX_PLAYER_SPEED)
-        else:
-            player.speed = 10
-
-        if power_up_timers["shrink"] > 0:
-            player.size = max(player.size, MIN_PLAYER_SIZE)
-        else:
-            player.size = 50
-
-        player.invincible = power_up_timers["invincibility"] > 0
+        # Expire power-up effects whose timers ran out
+        self.effects.advance()
 
-        if power_up_timers["magnet"] > 0:
+        if player.magnet:
             # Implement magnet logic here
             for upgrade in upgrades:
-                dx = player.pos[0] - upgrade.pos[0]
-                dy = player.pos[1] - upgrade.pos[1]
+                dx = player.x - upgrade.x
+                dy = player.y - upgrade.y
                 dist = (dx**2 + dy**2)**0.5
-                if dist < 200:
-                    upgrade.pos[0] += dx / dist * 5
-                    upgrade.pos[1] += dy / dist * 5
-            power_up_timers["magnet"] -= 1
-
-        # Draw everything
-        window.blit(background, (0, 0))
-        draw_player(player)
-        for hazard in hazards:
-            hazard.draw()
-        for upgrade in upgrades:
-            upgrade.draw()
-        draw_particles()
-        update_particles()
-
-        # Display score, level, and power-up status
-        draw_text(f"Score: {score}", white, 10, 10)
-        draw_text(f"Level: {level + 1} - {star_system}", white, 10, 50)
-        draw_hearts(player.health, width - 110, 10)
-        
-        active_power_ups = [upgrade for upgrade, timer in power_up_timers.items() if timer > 0]
+                if dist < MAGNET_RANGE:
+                    upgrade.x += dx / dist * MAGNET_PULL
+                    upgrade.y += dy / dist * MAGNET_PULL
+
+        player_trail.push(player.x, player.y)
+        return True
+
+    # Whether the player touches a solid pixel of a shape whose bounding box
+    # it overlaps: at the end of the tick, or anywhere along the way when
+    # collisions are swept. table is the shape's mask from masks.py.
+    def touches(self, table, start, end, player_start):
+        player = self.player
+        player_end = (player.x, player.y)
+        if not self.swept:
+            start, player_start = end, player_end
+        return swept_overlaps(table, start, end, player_start, player_end, player.size)
+
+    # Hazards and upgrades due to spawn in the next `ticks` ticks, as lists of
+    # (tick, type, x); see SpawnScheduler.upcoming
+    def upcoming_spawns(self, ticks):
+        if self.spawns is None:
+            return [], []
+        return self.spawns.upcoming(ticks)
+
+    # An immutable copy of everything draw_frame needs, safe to hand to
+    # another thread while the simulation moves on
+    def frame(self, stamps=(), alive=True):
+        player = self.player
+        power_ups = [(upgrade, self.effects.remaining(upgrade) // FPS)
+                     for upgrade in TIMED_UPGRADES if self.effects.is_active(upgrade)]
         if player.shield:
-            active_power_ups.append("shield")
-        for i, power_up in enumerate(active_power_ups):
-            if power_up == "shield":
-                draw_text(f"{power_up.capitalize()}: Active", UPGRADES[power_up]["color"], 10, 90 + i * 30)
-            else:
-                draw_text(f"{power_up.capitalize()}: {power_up_timers[power_up]//60}s", UPGRADES[power_up]["color"], 10, 90 + i * 30)
+            power_ups.append(("shield", None))
+        return FrameSnapshot(
+            len(self.inputs), alive, score, level, self.star_system,
+            PlayerFrame(player.x, player.y, player.size, player.shield, player.health),
+            tuple(player_trail),
+            tuple([(hazard.kind, hazard.x, hazard.y) for hazard in self.hazards]),
+            tuple([(upgrade.kind, upgrade.x, upgrade.y) for upgrade in self.upgrades]),
+            tuple([(p[0], p[1], p[2], p[4]) for p in particle_list]),
+            tuple(power_ups), stamps)
 
-        pygame.display.flip()
-        pygame.time.Clock().tick(60)
+    def draw(self):
+        draw_frame(self.frame())
+
+def draw_frame(frame):
+    # Draw everything
+    window.blit(background, (0, 0))
+    draw_player(frame.player, frame.trail)
+    for kind, x, y in frame.hazards:
+        draw_space_invader(window, x, y, HAZARD_SIZES[kind], HAZARD_COLORS[kind])
+    for kind, x, y in frame.upgrades:
+        draw_upgrade(kind, x, y)
+    draw_particles(frame.particles)
+
+    # Display score, level, and power-up status
+    hud.update(frame.score, frame.level, frame.star_system, frame.player.health, frame.power_ups)
+    hud.draw(window)
+
+# Plays one game, a tick every frame_time seconds. The pacing is separate
+# from FPS, which also sets the game's timers; frame_time=0 runs flat out.
+def game_loop(seed=None, frame_time=1 / FPS):
+    global current_game
+
+    game = current_game = Game(seed)
+    sampler = ControlSampler(time.perf_counter(), read_controls(pygame.key.get_pressed()))
+    deadline = time.perf_counter()
+    replay_buffer.clear()
 
+    while True:
+        # Wait out the frame while collecting input, then sample it as late
+        # as possible, right before the simulation needs it
+        deadline += frame_time
+        if not poll_input(sampler, deadline):
+            return score
+        now = time.perf_counter()
+        if now - deadline > frame_time:
+            # Fell behind; don't try to catch up with a burst of frames
+            deadline = now
+
+        if not game.step(sampler.sample(now)):
+            replay_buffer.capture(game.frame(alive=False))
+            return score
+
+        frame = game.frame()
+        draw_frame(frame)
+        pygame.display.flip()
+        latency_meter.record(sampler.sampled, time.perf_counter())
+        replay_buffer.capture(frame)
+
+# Latest-frame mailbox between the simulation and render threads. The
+# simulation publishes each FrameSnapshot into the back slot while the render
+# thread draws the one it took last; frames the renderer was too slow for
+# are dropped, not queued, and hand their input stamps on to the next.
+class FrameBuffer:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._latest = None
+        self._taken = True
+        self.closed = False
+
+    def publish(self, frame):
+        with self._condition:
+            if not self._taken:
+                frame = frame._replace(stamps=self._latest.stamps + frame.stamps)
+            self._latest = frame
+            self._taken = False
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+    # Returns a frame newer than tick, or None if none arrives within timeout
+    def take(self, tick, timeout):
+        with self._condition:
+            self._condition.wait_for(lambda: self.closed or self._latest is not None and self._latest.tick > tick,
+                                     timeout)
+            frame = self._latest
+            if frame is None or frame.tick <= tick:
+                return None
+            self._taken = True
+            return frame
+
+# Steps a game on its own thread, one tick every frame_time seconds,
+# and publishes a FrameSnapshot after every step, capturing it into replay
+# if given. The sampler is shared with the thread polling input; hold lock
+# while using it.
+class Simulation(threading.Thread):
+    def __init__(self, game, sampler, frame_time, replay=None):
+        super().__init__(daemon=True)
+        self.game = game
+        self.sampler = sampler
+        self.frame_time = frame_time
+        self.replay = replay
+        self.lock = threading.Lock()
+        self.frames = FrameBuffer()
+        self.stopped = threading.Event()
+        # What ended the thread if the game raised; pipelined_game_loop
+        # raises it again once the thread is joined
+        self.error = None
+
+    def run(self):
+        frame_time = self.frame_time
+        deadline = time.perf_counter()
+        try:
+            while not self.stopped.is_set():
+                deadline += frame_time
+                remaining = deadline - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+                now = time.perf_counter()
+                if now - deadline > frame_time:
+                    deadline = now
+                with self.lock:
+                    controls = self.sampler.sample(now)
+                    stamps = tuple(self.sampler.sampled)
+                alive = self.game.step(controls)
+                frame = self.game.frame(stamps, alive)
+                self.frames.publish(frame)
+                if self.replay is not None:
+                    self.replay.capture(frame)
+                if not alive:
+                    break
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.frames.close()
+
+# game_loop with the simulation on a second thread. This thread polls input
+# and draws the newest frame whenever one is ready, so a slow flip or a
+# heavy frame no longer holds up the next physics step. Pygame releases the
+# GIL inside its blits, fills and flips, which is where the overlap comes from.
+def pipelined_game_loop(seed=None, frame_time=1 / FPS):
+    global current_game
+
+    game = current_game = Game(seed)
+    sampler = ControlSampler(time.perf_counter(), read_controls(pygame.key.get_pressed()))
+    replay_buffer.clear()
+    simulation = Simulation(game, sampler, frame_time, replay_buffer)
+    simulation.start()
+    drawn = 0
+    try:
+        while True:
+            with simulation.lock:
+                if not poll_input(sampler, 0):
+                    break
+            frame = simulation.frames.take(drawn, POLL_INTERVAL)
+            if frame is None:
+                if simulation.frames.closed:
+                    break
+                continue
+            drawn = frame.tick
+            draw_frame(frame)
+            pygame.display.flip()
+            latency_meter.record(frame.stamps, time.perf_counter())
+            if not frame.alive:
+                break
+    finally:
+        simulation.stopped.set()
+        simulation.join()
+    if simulation.error is not None:
+        raise simulation.error
     return score
 
-def show_game_over_screen(final_score):
+# Plays the frames in replay at normal speed; any key skips the rest.
+# Returns False if the window was closed.
+def play_replay(replay):
+    clock = pygame.time.Clock()
+    for frame in replay.frames():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.KEYDOWN:
+                return True
+        draw_frame(frame)
+        draw_text("REPLAY", red, width // 2, height // 2, size=50, align="center")
+        pygame.display.flip()
+        clock.tick(FPS)
+    return True
+
+# What a shared leaderboard raises when it cannot be reached or refuses a
+# request. An outage should not end the game; LeaderboardClient keeps the
+# scores it could not send for its next flush, and if the leaderboard is
+# still down when the game quits, close_db stores them locally.
+LEADERBOARD_ERRORS = (OSError, RuntimeError)
+
+def submit_score(final_score):
+    try:
+        insert_score(final_score)
+    except LEADERBOARD_ERRORS as e:
+        print("Warning: could not submit the score:", e)
+
+def draw_game_over_screen(final_score):
     window.fill(black)
     draw_text("GAME OVER", red, width // 2, height // 8, size=50, align="center")
     draw_text(f"Your Score: {final_score}", white, width // 2, height // 4, align="center")
     draw_text(f"Final Level: {level + 1} - {STAR_SYSTEMS[level % len(STAR_SYSTEMS)]}", white, width // 2, height // 3, align="center")
     
-    top_scores = get_top_scores()
+    try:
+        top_scores = get_top_scores()
+        highest_score, highest_date = get_highest_score()
+    except LEADERBOARD_ERRORS as e:
+        print("Warning: could not read the leaderboard:", e)
+        top_scores, highest_score = [], None
     for i, (top_score, date) in enumerate(top_scores, 1):
         date_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
         formatted_date = date_obj.strftime("%Y-%m-%d %H:%M")
         score_text = f"{i}. {top_score:5d} - {formatted_date}"
         draw_text(score_text, white, width // 2, height // 2 - 40 + i * 30, align="center")
     
-    highest_score, highest_date = get_highest_score()
-    highest_date_obj = datetime.strptime(highest_date, "%Y-%m-%d %H:%M:%S")
-    formatted_highest_date = highest_date_obj.strftime("%Y-%m-%d %H:%M")
-    draw_text(f"Highest Score: {highest_score} - {formatted_highest_date}", green, width // 2, height - 100, align="center")
+    if highest_score is None:
+        draw_text("Leaderboard unavailable", green, width // 2, height - 100, align="center")
+    else:
+        highest_date_obj = datetime.strptime(highest_date, "%Y-%m-%d %H:%M:%S")
+        formatted_highest_date = highest_date_obj.strftime("%Y-%m-%d %H:%M")
+        draw_text(f"Highest Score: {highest_score} - {formatted_highest_date}", green, width // 2, height - 100, align="center")
     
+    if len(replay_buffer):
+        draw_text("Press R to watch the replay", white, width // 2, height - 145, align="center")
     draw_text("Press ENTER to play again or ESC to quit", white, width // 2, height - 50, align="center")
     
     pygame.display.flip()
+
+def show_game_over_screen(final_score):
+    draw_game_over_screen(final_score)
     
     waiting = True
     while waiting:
@@ -684,15 +1112,37 @@ def show_game_over_screen(final_score):
                     return True
                 elif event.key == pygame.K_ESCAPE:
                     return False
+                elif event.key == pygame.K_r and len(replay_buffer):
+                    if not play_replay(replay_buffer):
+                        return False
+                    draw_game_over_screen(final_score)
 
     return True
 
 if __name__ == "__main__":
-    high_score = get_high_score()
+    try:
+        high_score = get_high_score()
+    except LEADERBOARD_ERRORS as e:
+        print("Warning: could not read the leaderboard:", e)
+        high_score = 0
     show_start_screen()
+    record_dir = os.environ.get("SPACE_DODGER_RECORD_DIR")
+    # SPACE_DODGER_REPLAY_DIR keeps the last seconds of every game, for bug reports
+    replay_dir = os.environ.get("SPACE_DODGER_REPLAY_DIR")
+    # SPACE_DODGER_PIPELINE=1 runs the simulation and rendering on separate threads
+    loop = pipelined_game_loop if os.environ.get("SPACE_DODGER_PIPELINE") else game_loop
     while True:
-        final_score = game_loop()
-        insert_score(final_score)  # Always insert the score
+        final_score = loop()
+        submit_score(final_score)  # Always insert the score
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+            save_recording(os.path.join(record_dir, datetime.now().strftime("game-%Y%m%d-%H%M%S.sdrec")),
+                           current_game.seed, current_game.inputs)
+        if replay_dir:
+            os.makedirs(replay_dir, exist_ok=True)
+            save_replay(os.path.join(replay_dir, datetime.now().strftime("game-%Y%m%d-%H%M%S.sdrpl")), replay_buffer)
+        if os.environ.get("SPACE_DODGER_LATENCY"):
+            print("Input-to-flip latency:", latency_meter.summary())
         if final_score > high_score:
             high_score = final_score
         if not show_game_over_screen(final_score):
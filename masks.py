@@ -0,0 +1,125 @@
+# Pixel collision masks for the drawn shapes. Hazards are drawn as space
+# invaders (see draw_space_invader in main.py), with gaps above the body and
+# between the tentacles, and upgrades as circles, so their bounding boxes
+# overlap the player before anything visible does.
+#
+# Each shape is rasterised once per (kind, size) into a summed-area table,
+# so asking whether a box touches any solid pixel takes four lookups however
+# big the overlap. The same tables serve Game.step one hazard at a time and
+# the vectorised env in batches. Masks only refine a hit; callers test the
+# bounding boxes first and ask here about the few that overlap.
+import math
+
+import numpy as np
+
+from rules import HAZARD_SIZES, UPGRADE_SIZE
+
+_tables = {}
+
+# The rectangles draw_space_invader fills, as (x, y, width, height)
+def invader_mask(size):
+    mask = np.zeros((size, size), dtype=bool)
+    for x, y, w, h in ((0, size // 4, size, size // 2),  # body
+                       (size // 4, 0, size // 2, size // 4),  # head
+                       (0, size // 2, size // 4, size // 2),  # tentacles
+                       (size * 3 // 4, size // 2, size // 4, size // 2)):
+        mask[y:y + h, x:x + w] = True
+    return mask
+
+# Pixels whose centres fall inside the circle an upgrade is drawn in
+def disc_mask(size):
+    centre = np.arange(size) + 0.5 - size / 2
+    return centre[:, None] ** 2 + centre[None, :] ** 2 <= (size / 2) ** 2
+
+def summed_area(mask):
+    table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int32)
+    table[1:, 1:] = mask.cumsum(0).cumsum(1)
+    return table
+
+# Summed-area table for a hazard of the given kind (index into HAZARD_TYPES)
+# and size. Every hazard type is drawn with the same glyph, but the key keeps
+# room for types that are not. Tables are lists of rows, which index several
+# times faster than NumPy arrays one value at a time.
+def hazard_table(kind, size):
+    key = ("hazard", kind, int(size))
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = summed_area(invader_mask(int(size))).tolist()
+    return table
+
+def upgrade_table(size=UPGRADE_SIZE):
+    key = ("upgrade", int(size))
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = summed_area(disc_mask(int(size))).tolist()
+    return table
+
+# Whether a solid box of side box_size at (bx, by) overlaps a solid pixel of
+# the shape at (x, y). Pixel (i, j) covers [x + j, x + j + 1) by
+# [y + i, y + i + 1); touching edges do not count, as with detect_collision.
+def overlaps(table, x, y, bx, by, box_size):
+    n = len(table) - 1
+    j0 = max(math.floor(bx - x), 0)
+    j1 = min(math.ceil(bx + box_size - x), n)
+    i0 = max(math.floor(by - y), 0)
+    i1 = min(math.ceil(by + box_size - y), n)
+    if j0 >= j1 or i0 >= i1:
+        return False
+    top = table[i0]
+    bottom = table[i1]
+    return bottom[j1] - top[j1] - bottom[j0] + top[j0] > 0
+
+# overlaps() along straight-line moves from start to end, sampled often
+# enough that the two never move more than a pixel apart between samples.
+# The start itself is not tested; it was the end of the previous tick.
+def swept_overlaps(table, start, end, box_start, box_end, box_size):
+    x0, y0 = start
+    bx0, by0 = box_start
+    dx, dy = end[0] - x0, end[1] - y0
+    bdx, bdy = box_end[0] - bx0, box_end[1] - by0
+    steps = max(1, math.ceil(max(abs(dx - bdx), abs(dy - bdy))))
+    for k in range(1, steps + 1):
+        t = k / steps
+        if overlaps(table, x0 + dx * t, y0 + dy * t, bx0 + bdx * t, by0 + bdy * t, box_size):
+            return True
+    return False
+
+# Tables for every hazard kind at its standard size stacked into one array,
+# padded to the largest, for the batched tests below
+def hazard_tables():
+    tables = _tables.get("hazards")
+    if tables is None:
+        n = max(HAZARD_SIZES) + 1
+        tables = np.zeros((len(HAZARD_SIZES), n, n), dtype=np.int32)
+        for kind, size in enumerate(HAZARD_SIZES):
+            table = np.array(hazard_table(kind, size), dtype=np.int32)
+            tables[kind, :size + 1, :size + 1] = table
+            # Extend the last row and column, so lookups past a smaller
+            # shape's edge count what is inside it
+            tables[kind, size + 1:, :size + 1] = table[-1]
+            tables[kind, :, size + 1:] = tables[kind, :, size:size + 1]
+        _tables["hazards"] = tables
+    return tables
+
+# overlaps() for flat arrays of candidates; tables is a stack of summed-area
+# tables indexed by index, and sizes the box size of each candidate
+def overlaps_batch(tables, index, sizes, x, y, bx, by, box_size):
+    sizes = np.minimum(sizes, tables.shape[1] - 1)
+    j0 = np.clip(np.floor(bx - x), 0, sizes).astype(np.int64)
+    j1 = np.clip(np.ceil(bx + box_size - x), 0, sizes).astype(np.int64)
+    i0 = np.clip(np.floor(by - y), 0, sizes).astype(np.int64)
+    i1 = np.clip(np.ceil(by + box_size - y), 0, sizes).astype(np.int64)
+    total = tables[index, i1, j1] - tables[index, i0, j1] - tables[index, i1, j0] + tables[index, i0, j0]
+    return (j0 < j1) & (i0 < i1) & (total > 0)
+
+# swept_overlaps() for flat arrays of candidates
+def swept_overlaps_batch(tables, index, sizes, x0, y0, x1, y1, bx0, by0, bx1, by1, box_size):
+    dx, dy = x1 - x0, y1 - y0
+    bdx, bdy = bx1 - bx0, by1 - by0
+    steps = np.maximum(1, np.ceil(np.maximum(np.abs(dx - bdx), np.abs(dy - bdy))))
+    hit = np.zeros(len(x0), dtype=bool)
+    for k in range(1, int(steps.max(initial=1)) + 1):
+        t = np.minimum(k / steps, 1.0)
+        hit |= overlaps_batch(tables, index, sizes, x0 + dx * t, y0 + dy * t, bx0 + bdx * t, by0 + bdy * t,
+                              box_size)
+    return hit
@@ -0,0 +1,110 @@
+# Render a recorded game to numbered PNGs or raw RGB frame streams without a
+# window, using the same drawing code as the live game.
+#
+#   python render_offline.py RECORDING OUT_DIR [--format png|raw] [--workers N] [--chunk-size N]
+#
+# Frame N is the screen the live game showed after tick N. Long recordings
+# are split into chunks that render in parallel worker processes. Each worker
+# replays the simulation from the seed up to its chunk without drawing, which
+# costs far less than rendering.
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from recording import load_recording
+from rules import width, height
+
+FORMATS = ("png", "raw")
+DEFAULT_CHUNK_SIZE = 600  # 10 seconds of play
+
+def frame_path(out_dir, frame):
+    return os.path.join(out_dir, f"frame_{frame:06d}.png")
+
+def chunk_path(out_dir, start):
+    return os.path.join(out_dir, f"frames_{start:06d}.rgb")
+
+def render_chunk(recording, start, stop, out_dir, fmt="png"):
+    # Import here so worker processes pick up the dummy video driver
+    import pygame
+    import main
+
+    game = main.Game(recording.seed, recording.swept, recording.scheduled, recording.masked)
+    rendered = 0
+    stream = open(chunk_path(out_dir, start), "wb") if fmt == "raw" else None
+    try:
+        for tick in range(stop):
+            if not game.step(recording.inputs[tick]):
+                break
+            if tick < start:
+                continue
+            game.draw()
+            if stream is None:
+                pygame.image.save(main.window, frame_path(out_dir, tick))
+            else:
+                stream.write(pygame.image.tobytes(main.window, "RGB"))
+            rendered += 1
+    finally:
+        if stream is not None:
+            stream.close()
+    return start, rendered
+
+def _render_chunk_task(task):
+    return render_chunk(*task)
+
+def render_recording(recording, out_dir, fmt="png", workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(recording, start, min(start + chunk_size, len(recording)), out_dir, fmt)
+             for start in range(0, len(recording), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(tasks) <= 1:
+        results = [render_chunk(*task) for task in tasks]
+    else:
+        # spawn, not fork: SDL state does not survive a fork
+        pool = multiprocessing.get_context("spawn").Pool(min(workers, len(tasks)))
+        try:
+            results = pool.map(_render_chunk_task, tasks)
+        finally:
+            # Let workers exit on their own; SDL swallows the SIGTERM from terminate()
+            pool.close()
+            pool.join()
+
+    frames = sum(rendered for _, rendered in results)
+    meta = {
+        "seed": recording.seed,
+        "format": fmt,
+        "frames": frames,
+        "width": width,
+        "height": height,
+        "chunks": [{"start": start, "frames": rendered} for start, rendered in results if rendered],
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return frames
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a recorded Space Dodger game offline")
+    parser.add_argument("recording")
+    parser.add_argument("out_dir")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    recording = load_recording(args.recording)
+    start = time.perf_counter()
+    frames = render_recording(recording, args.out_dir, args.format, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {frames} frames in {elapsed:.2f}s ({frames / 60 / elapsed:.1f}x real time)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
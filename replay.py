@@ -0,0 +1,193 @@
+# Instant replay of the last few seconds of a game.
+#
+# ReplayBuffer keeps a compact binary record of every tick's FrameSnapshot in
+# a ring bounded both in ticks and in bytes, so the game-over screen can draw
+# the run up to the player's death again and a bug report can carry it. A
+# full 800x600 surface is close to 2MB; a record is a few hundred bytes:
+#
+#   header      tick, score, level, player x/y/size/health, flags, counts
+#   power-ups   seconds left on each timed upgrade, 255 when it is off
+#   hazards     kinds, then x and y columns as doubles, which the glyphs need
+#               to land on the same pixels
+#   upgrades    the same
+#   particles   int16 x and y columns (draw_particles truncates them anyway),
+#               sizes and color codes
+#
+# The trail is not stored; it is rebuilt from the player positions of the
+# ticks before, so the oldest few frames in the ring have a shorter one.
+# SPACE_DODGER_REPLAY_SECONDS and SPACE_DODGER_REPLAY_KB set the bounds.
+# Nothing in here may import pygame or main.
+import os
+import struct
+import sys
+from array import array
+from collections import deque, namedtuple
+
+from rules import FPS, STAR_SYSTEMS, TIMED_UPGRADES, PARTICLE_COLORS, PARTICLE_COLOR_CODES
+
+# tick counts the steps taken, stamps are the input events the last step
+# sampled, and hazards, upgrades and particles are plain tuples
+PlayerFrame = namedtuple("PlayerFrame", "x y size shield health")
+FrameSnapshot = namedtuple("FrameSnapshot", "tick alive score level star_system player trail hazards upgrades "
+                                            "particles power_ups stamps")
+
+REPLAY_SECONDS = float(os.environ.get("SPACE_DODGER_REPLAY_SECONDS", 5))
+REPLAY_BUDGET = int(os.environ.get("SPACE_DODGER_REPLAY_KB", 512)) * 1024
+
+REPLAY_MAGIC = b"SDRPL"
+REPLAY_VERSION = 1
+_FILE_HEADER = struct.Struct("<5sBI")
+_LENGTH = struct.Struct("<I")
+_RECORD = struct.Struct("<IqHdddbBBHBH")
+_ALIVE, _SHIELD = 1, 2
+_OFF = 255
+_TIMERS_OFF = bytes([_OFF] * len(TIMED_UPGRADES))
+_TIMER_SLOTS = {name: slot for slot, name in enumerate(TIMED_UPGRADES)}
+
+class ReplayBuffer:
+    def __init__(self, seconds=REPLAY_SECONDS, budget=REPLAY_BUDGET):
+        if budget <= 0:
+            raise ValueError(f"Replay budget must be positive, got {budget}")
+        self.records = deque(maxlen=max(1, round(seconds * FPS)))
+        self.budget = budget
+        # Bytes held by the records, counting each one's object overhead
+        self.size = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def clear(self):
+        self.records.clear()
+        self.size = 0
+
+    def capture(self, frame):
+        self.push(encode(frame))
+
+    def push(self, record):
+        records = self.records
+        if len(records) == records.maxlen:
+            self.size -= sys.getsizeof(records[0])
+        records.append(record)
+        self.size += sys.getsizeof(record)
+        while self.size > self.budget and len(records) > 1:
+            self.size -= sys.getsizeof(records.popleft())
+
+    # The buffered ticks as FrameSnapshots, oldest first
+    def frames(self):
+        trail = deque()
+        for record in self.records:
+            frame, trail_length = decode(record)
+            # The tick the player dies on ends before the trail moves on
+            if frame.alive:
+                trail.appendleft((frame.player.x, frame.player.y))
+            while len(trail) > trail_length:
+                trail.pop()
+            yield frame._replace(trail=tuple(trail))
+
+def encode(frame):
+    player = frame.player
+    hazards = frame.hazards
+    upgrades = frame.upgrades
+    particles = frame.particles
+    flags = (_ALIVE if frame.alive else 0) | (_SHIELD if player.shield else 0)
+    timers = _TIMERS_OFF
+    if frame.power_ups:
+        timers = bytearray(timers)
+        for name, seconds in frame.power_ups:
+            if name in _TIMER_SLOTS:
+                # Whole seconds, as the HUD shows them
+                timers[_TIMER_SLOTS[name]] = min(max(int(seconds), 0), _OFF - 1)
+    parts = [
+        _RECORD.pack(frame.tick, frame.score, frame.level, player.x, player.y, player.size, player.health, flags,
+                     len(frame.trail), len(hazards), len(upgrades), len(particles)),
+        timers,
+    ]
+    for entities in (hazards, upgrades):
+        if entities:
+            kinds, xs, ys = zip(*entities)
+            parts.append(_columns("{0}B{0}d{0}d", len(entities)).pack(*kinds, *xs, *ys))
+    if particles:
+        xs, ys, sizes, colors = zip(*particles)
+        parts.append(_columns("{0}h{0}h{0}B{0}B", len(particles)).pack(
+            *map(int, xs), *map(int, ys), *sizes, *map(PARTICLE_COLOR_CODES.__getitem__, colors)))
+    return b"".join(parts)
+
+# Structs for runs of count entities, one column after another. Counts stay
+# small, so there are never many of them.
+_structs = {}
+
+def _columns(layout, count):
+    key = (layout, count)
+    packer = _structs.get(key)
+    if packer is None:
+        packer = _structs[key] = struct.Struct("<" + layout.format(count))
+    return packer
+
+def _column(typecode, data, offset, count):
+    values = array(typecode)
+    values.frombytes(data[offset:offset + values.itemsize * count])
+    return values, offset + values.itemsize * count
+
+# A record back to (FrameSnapshot with an empty trail, trail length)
+def decode(record):
+    (tick, score, level, x, y, size, health, flags, trail_length, hazard_count, upgrade_count,
+     particle_count) = _RECORD.unpack_from(record)
+    offset = _RECORD.size
+    timers = record[offset:offset + len(TIMED_UPGRADES)]
+    offset += len(TIMED_UPGRADES)
+    power_ups = [(name, seconds) for name, seconds in zip(TIMED_UPGRADES, timers) if seconds != _OFF]
+    if flags & _SHIELD:
+        power_ups.append(("shield", None))
+
+    entities = []
+    for count in (hazard_count, upgrade_count):
+        kinds = record[offset:offset + count]
+        xs, offset = _column("d", record, offset + count, count)
+        ys, offset = _column("d", record, offset, count)
+        entities.append(tuple(zip(kinds, xs, ys)))
+    xs, offset = _column("h", record, offset, particle_count)
+    ys, offset = _column("h", record, offset, particle_count)
+    sizes = record[offset:offset + particle_count]
+    colors = [PARTICLE_COLORS[code] for code in record[offset + particle_count:offset + 2 * particle_count]]
+    if offset + 2 * particle_count != len(record):
+        raise ValueError("Replay record is corrupt")
+
+    frame = FrameSnapshot(tick, bool(flags & _ALIVE), score, level, STAR_SYSTEMS[level % len(STAR_SYSTEMS)],
+                          PlayerFrame(x, y, size, bool(flags & _SHIELD), health), (), entities[0], entities[1],
+                          tuple(zip(xs, ys, sizes, colors)), tuple(power_ups), ())
+    return frame, trail_length
+
+def save_replay(path, replay):
+    with open(path, "wb") as f:
+        f.write(_FILE_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, len(replay.records)))
+        for record in replay.records:
+            f.write(_LENGTH.pack(len(record)))
+            f.write(record)
+
+# Loads a saved replay into a buffer big enough to hold all of it
+def load_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        magic, version, count = _FILE_HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError(f"{path} is not a Space Dodger replay")
+    if magic != REPLAY_MAGIC:
+        raise ValueError(f"{path} is not a Space Dodger replay")
+    if version != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {version}")
+    records = []
+    offset = _FILE_HEADER.size
+    for _ in range(count):
+        if offset + _LENGTH.size > len(data):
+            raise ValueError(f"{path} is truncated")
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        if offset + length > len(data):
+            raise ValueError(f"{path} is truncated")
+        records.append(data[offset:offset + length])
+        offset += length
+    replay = ReplayBuffer(max(1, count) / FPS, sum(map(sys.getsizeof, records)) or 1)
+    for record in records:
+        replay.push(record)
+    return replay
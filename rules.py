@@ -0,0 +1,89 @@
+# Game rules shared by the pygame front end (main.py) and the headless
+# environments (env.py). Nothing in here may import pygame.
+
+# Playfield
+width, height = 800, 600
+FPS = 60
+
+# Controls, recorded as one byte of bits per tick
+LEFT = 1
+RIGHT = 2
+SPECIAL = 4
+# The top bits hold how much of the tick the movement key was down, in
+# MOVE_STEPS-ths. 0 means the whole tick, which is what older recordings hold.
+MOVE_SHIFT = 3
+MOVE_STEPS = 32
+
+# Set up colors
+black = (0, 0, 0)
+white = (255, 255, 255)
+red = (255, 60, 60)
+blue = (0, 100, 255)
+green = (0, 255, 100)
+yellow = (255, 255, 0)
+purple = (200, 0, 200)
+
+STAR_SYSTEMS = [
+    "Sol", "Alpha Centauri", "Sirius", "Betelgeuse", "Andromeda",
+    "Orion", "Pleiades", "Cygnus", "Cassiopeia", "Galactic Core",
+    "Nebula X", "Quasar Y", "Black Hole Z", "Supernova Remnant",
+    "Neutron Star Cluster", "Gamma Ray Burst", "Dark Matter Cloud"
+]
+HAZARDS = {
+    "asteroid": {"speed": 5, "size": 50, "color": (139, 69, 19)},
+    "comet": {"speed": 7, "size": 40, "color": (100, 149, 237)},
+    "alien": {"speed": 6, "size": 60, "color": (50, 205, 50)},
+    "homing": {"speed": 4, "size": 45, "color": (255, 0, 0)},
+    "splitting": {"speed": 5, "size": 55, "color": (255, 165, 0)},
+}
+
+# Add this after the HAZARDS dictionary
+UPGRADES = {
+    "shield": {"color": yellow},  # Remove duration for shield
+    "speed": {"color": blue, "duration": 7},
+    "shrink": {"color": green, "duration": 12},
+    "invincibility": {"color": white, "duration": 5},
+    "magnet": {"color": (128, 128, 128), "duration": 15},
+}
+
+# Player
+PLAYER_SIZE = 50
+PLAYER_SPEED = 10
+PLAYER_HEALTH = 3
+MAX_PLAYER_SPEED = 15  # Reduced from 20
+MIN_PLAYER_SIZE = 30  # Minimum size the player can shrink to
+
+# Hazards, upgrades and levels
+LEVEL_THRESHOLD = 50
+LEVEL_SPEEDUP = 0.1  # Added to every hazard's speed per level
+HOMING_COOLDOWN = 60  # 1 second at 60 FPS
+UPGRADE_SIZE = 30
+UPGRADE_SPEED = 3
+UPGRADE_SPAWN_RATE = 0.01
+MAGNET_RANGE = 200
+MAGNET_PULL = 5
+
+# Type codes let every entity share one copy of its type's metadata
+HAZARD_TYPES = tuple(HAZARDS)
+HAZARD_CODES = {hazard_type: code for code, hazard_type in enumerate(HAZARD_TYPES)}
+HAZARD_SIZES = tuple(HAZARDS[hazard_type]["size"] for hazard_type in HAZARD_TYPES)
+HAZARD_COLORS = tuple(HAZARDS[hazard_type]["color"] for hazard_type in HAZARD_TYPES)
+HOMING = HAZARD_CODES["homing"]
+
+UPGRADE_TYPES = tuple(UPGRADES)
+UPGRADE_CODES = {upgrade_type: code for code, upgrade_type in enumerate(UPGRADE_TYPES)}
+UPGRADE_COLORS = tuple(UPGRADES[upgrade_type]["color"] for upgrade_type in UPGRADE_TYPES)
+TIMED_UPGRADES = tuple(upgrade for upgrade in UPGRADES if "duration" in UPGRADES[upgrade])
+
+# Particles carry their color; snapshots and replays store it as an index
+# into the colors in play
+PARTICLE_COLORS = (red,) + UPGRADE_COLORS + HAZARD_COLORS
+PARTICLE_COLOR_CODES = {color: code for code, color in reversed(list(enumerate(PARTICLE_COLORS)))}
+
+def hazard_speed(hazard_type, level):
+    speed = HAZARDS[hazard_type]["speed"]
+    # Level 0 keeps the int speed; a float would add 24 bytes per hazard
+    return speed + LEVEL_SPEEDUP * level if level else speed
+
+def spawn_rate_for_level(level):
+    return min(0.05 * (1 + level * 0.05), 0.3)
@@ -0,0 +1,183 @@
+# Compact binary snapshots of a running game.
+#
+# A snapshot holds everything the simulation depends on: the Game and its
+# Player, hazards, upgrades and effect timers, the module globals score,
+# level, particle_list and player_trail, and the game's RNG. Restoring one
+# puts all of that back, so a snapshot can resume a session or fork any
+# number of what-if branches:
+#
+#     data = snapshot(main.current_game)
+#     for inputs in candidates:
+#         game = restore(data)
+#         ...step game with inputs...
+import random
+import struct
+from array import array
+
+import main
+from effects import EffectScheduler
+from spawns import SpawnScheduler
+from rules import STAR_SYSTEMS, UPGRADE_TYPES, UPGRADE_CODES, PARTICLE_COLORS, PARTICLE_COLOR_CODES, spawn_rate_for_level
+
+SNAPSHOT_MAGIC = b"SDSN"
+SNAPSHOT_VERSION = 2
+
+_HEADER = struct.Struct("<4sBQqiqIIIIBBBB")
+_PLAYER = struct.Struct("<dddqBdq")
+_HAZARD = struct.Struct("<Bdddq")
+_UPGRADE = struct.Struct("<Bdd")
+_PARTICLE = struct.Struct("<dddddBq")
+_EFFECT = struct.Struct("<Bq")
+_RNG_TAIL = struct.Struct("<Bd")
+_RNG_WORDS = 625
+
+_SHIELD, _INVINCIBLE, _MULTI_SHOT, _MAGNET = 1, 2, 4, 8
+# Game.swept, Game.masked and whether spawns are scheduled ride in the player flags
+_SWEPT, _SCHEDULED, _MASKED = 16, 32, 64
+
+def _array(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+def snapshot(game):
+    trail = main.player_trail
+    player = game.player
+    effects = game.effects
+    _, rng_words, gauss_next = game.rng.getstate()
+
+    flags = ((_SHIELD if player.shield else 0) | (_INVINCIBLE if player.invincible else 0)
+             | (_MULTI_SHOT if player.multi_shot else 0) | (_MAGNET if player.magnet else 0)
+             | (_SWEPT if game.swept else 0) | (_SCHEDULED if game.spawns is not None else 0)
+             | (_MASKED if game.masked else 0))
+    parts = [
+        _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, game.seed, main.score, main.level, effects.tick,
+                     len(game.inputs), len(game.hazards), len(game.upgrades), len(main.particle_list),
+                     len(effects.expiries), len(trail.xs), trail.head, trail.length),
+        _PLAYER.pack(player.size, player.x, player.y, player.health, flags, player.speed, player.combo),
+        struct.pack("<dq", player.special_charge, game.spawns.level_start if game.spawns is not None else 0),
+    ]
+    parts.extend([_HAZARD.pack(hazard.kind, hazard.speed, hazard.x, hazard.y, hazard.homing_cooldown)
+                  for hazard in game.hazards])
+    parts.extend([_UPGRADE.pack(upgrade.kind, upgrade.x, upgrade.y) for upgrade in game.upgrades])
+    color_codes = PARTICLE_COLOR_CODES
+    parts.extend([_PARTICLE.pack(p[0], p[1], p[3][0], p[3][1], p[2], color_codes[p[4]], p[5])
+                  for p in main.particle_list])
+    parts.extend([_EFFECT.pack(UPGRADE_CODES[name], expiry) for name, expiry in effects.expiries.items()])
+    parts.append(trail.xs.tobytes())
+    parts.append(trail.ys.tobytes())
+    parts.append(array("I", rng_words).tobytes())
+    parts.append(_RNG_TAIL.pack(gauss_next is not None, gauss_next or 0.0))
+    parts.append(game.inputs)
+    return b"".join(parts)
+
+def restore(data):
+    data = memoryview(data)
+    try:
+        (magic, version, seed, score, level, tick, input_count, hazard_count, upgrade_count,
+         particle_count, effect_count, trail_capacity, trail_head, trail_length) = _HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError("Snapshot is truncated")
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a Space Dodger snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    expected = (_HEADER.size + _PLAYER.size + 16 + hazard_count * _HAZARD.size + upgrade_count * _UPGRADE.size
+                + particle_count * _PARTICLE.size + effect_count * _EFFECT.size + 16 * trail_capacity
+                + 4 * _RNG_WORDS + _RNG_TAIL.size + input_count)
+    if len(data) != expected:
+        raise ValueError(f"Snapshot is {len(data)} bytes, expected {expected}")
+    offset = _HEADER.size
+
+    player = main.Player.__new__(main.Player)
+    (player.size, player.x, player.y, player.health, flags, player.speed,
+     player.combo) = _PLAYER.unpack_from(data, offset)
+    offset += _PLAYER.size
+    player.special_charge, level_start = struct.unpack_from("<dq", data, offset)
+    offset += 16
+    player.shield = bool(flags & _SHIELD)
+    player.invincible = bool(flags & _INVINCIBLE)
+    player.multi_shot = bool(flags & _MULTI_SHOT)
+    player.magnet = bool(flags & _MAGNET)
+
+    hazards = []
+    end = offset + hazard_count * _HAZARD.size
+    for kind, speed, x, y, cooldown in _HAZARD.iter_unpack(data[offset:end]):
+        hazard = main.Hazard.__new__(main.Hazard)
+        hazard.kind = kind
+        hazard.speed = speed
+        hazard.x = x
+        hazard.y = y
+        hazard.homing_cooldown = cooldown
+        hazards.append(hazard)
+    offset = end
+
+    upgrades = []
+    end = offset + upgrade_count * _UPGRADE.size
+    for kind, x, y in _UPGRADE.iter_unpack(data[offset:end]):
+        upgrade = main.Upgrade.__new__(main.Upgrade)
+        upgrade.kind = kind
+        upgrade.x = x
+        upgrade.y = y
+        upgrades.append(upgrade)
+    offset = end
+
+    end = offset + particle_count * _PARTICLE.size
+    particles = [[x, y, int(size), [vx, vy], PARTICLE_COLORS[color], life]
+                 for x, y, vx, vy, size, color, life in _PARTICLE.iter_unpack(data[offset:end])]
+    offset = end
+
+    effects = EffectScheduler(player, main.UPGRADE_EFFECTS)
+    effects.tick = tick
+    end = offset + effect_count * _EFFECT.size
+    for code, expiry in _EFFECT.iter_unpack(data[offset:end]):
+        effects.expiries[UPGRADE_TYPES[code]] = expiry
+    effects.heap = sorted((expiry, name) for name, expiry in effects.expiries.items())
+    offset = end
+
+    trail = main.Trail(trail_capacity)
+    trail.xs = _array("d", data[offset:offset + 8 * trail_capacity])
+    offset += 8 * trail_capacity
+    trail.ys = _array("d", data[offset:offset + 8 * trail_capacity])
+    offset += 8 * trail_capacity
+    trail.head = trail_head
+    trail.length = trail_length
+
+    rng_words = tuple(_array("I", data[offset:offset + 4 * _RNG_WORDS]))
+    offset += 4 * _RNG_WORDS
+    has_gauss, gauss_next = _RNG_TAIL.unpack_from(data, offset)
+    offset += _RNG_TAIL.size
+
+    game = main.Game.__new__(main.Game)
+    game.seed = seed
+    game.rng = random.Random()
+    game.rng.setstate((3, rng_words, gauss_next if has_gauss else None))
+    game.swept = bool(flags & _SWEPT)
+    game.masked = bool(flags & _MASKED)
+    game.inputs = bytearray(data[offset:])
+    game.player = player
+    game.hazards = hazards
+    game.upgrades = upgrades
+    game.star_system = STAR_SYSTEMS[level % len(STAR_SYSTEMS)]
+    game.level_threshold = main.LEVEL_THRESHOLD
+    game.spawn_rate = spawn_rate_for_level(level)
+    game.effects = effects
+    # The spawn queue is not stored; it regenerates from the seed
+    game.spawns = SpawnScheduler(seed, level, level_start, len(game.inputs)) if flags & _SCHEDULED else None
+
+    main.score = score
+    main.level = level
+    main.particle_list = particles
+    main.player_trail = trail
+    main.current_game = game
+    return game
+
+# Restore a snapshot, play inputs on it and report (score, level, alive)
+def branch(data, inputs):
+    game = restore(data)
+    alive = True
+    for controls in inputs:
+        if not game.step(controls):
+            alive = False
+            break
+    return main.score, main.level, alive
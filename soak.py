@@ -0,0 +1,254 @@
+# Long-running soak test. Plays the game with a scripted survival policy for
+# hours of game time, under the SDL dummy driver or fully headless, and looks
+# for slow degradation:
+#
+#   python soak.py --hours 4 --report soak.json [--headless] [--realtime]
+#
+# Every --interval frames it records traced memory, live object counts by
+# type, frame-time percentiles and the sizes of the long-lived game state.
+# Series that keep growing are flagged in the JSON report, and the exit
+# status is 1 when any growth or frame-time threshold is exceeded.
+import argparse
+import gc
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import Counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from rules import FPS, LEFT, RIGHT, width
+
+DEFAULT_INTERVAL = 60 * FPS  # one minute of play
+DEFAULT_WARMUP = 2
+# A series counts as growing when at least this share of its steps go up
+MONOTONIC_FRACTION = 0.8
+TOP_TYPES = 15
+TOP_ALLOCATIONS = 10
+
+# How far above the player a hazard counts as a threat
+LOOKAHEAD = 200
+MARGIN = 10
+# Moves ahead the policy looks when picking where to go
+REACH = 12
+
+# Head for the least threatened spot within reach, preferring short moves
+def survival_policy(game):
+    player = game.player
+    threats = [(hazard.x, hazard.x + hazard.size, player.y - hazard.y)
+               for hazard in game.hazards
+               if -hazard.size < player.y - hazard.y < LOOKAHEAD + hazard.size]
+    if not threats:
+        # Drift back to the middle so there is room to dodge either way
+        center = (width - player.size) / 2
+        if player.x < center - player.speed:
+            return RIGHT
+        if player.x > center + player.speed:
+            return LEFT
+        return 0
+
+    def danger(x):
+        return sum(1 / max(distance, 1) for left, right, distance in threats
+                   if left - MARGIN < x + player.size and x < right + MARGIN)
+
+    best_cost, best_move = math.inf, 0
+    for move in range(-REACH, REACH + 1):
+        x = player.x + move * player.speed
+        if 0 <= x <= width - player.size:
+            cost = danger(x) + abs(move) * 1e-4
+            if cost < best_cost:
+                best_cost, best_move = cost, move
+    return LEFT if best_move < 0 else RIGHT if best_move > 0 else 0
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def object_counts():
+    gc.collect()
+    return Counter(type(obj).__name__ for obj in gc.get_objects())
+
+# Traced memory, leaving out what the harness itself keeps around
+def traced_kib():
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+    snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+    return sum(stat.size for stat in snapshot.statistics("filename")) / 1024
+
+# Least-squares slope per hour of play and the share of steps that increased
+def trend(hours, values):
+    n = len(values)
+    if n < 2:
+        return 0.0, 0.0
+    mean_t = sum(hours) / n
+    mean_v = sum(values) / n
+    spread = sum((t - mean_t) ** 2 for t in hours)
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in zip(hours, values)) / spread if spread else 0.0
+    rising = sum(b > a for a, b in zip(values, values[1:])) / (n - 1)
+    return slope, rising
+
+def growth(hours, values, limit):
+    slope, rising = trend(hours, values)
+    return {
+        "first": values[0] if values else None,
+        "last": values[-1] if values else None,
+        "per_hour": round(slope, 3),
+        "rising": round(rising, 3),
+        "flagged": len(values) > 2 and rising >= MONOTONIC_FRACTION and slope > limit,
+    }
+
+def run_soak(hours=1.0, interval=DEFAULT_INTERVAL, warmup=DEFAULT_WARMUP, seed=0, headless=False,
+             realtime=False, trace=True, max_memory_growth=1024.0, max_object_growth=1000.0,
+             max_frame_drift=1.0, max_p99_ms=1000 / FPS):
+    import main
+    pygame = main.pygame
+
+    frames_total = int(hours * 3600 * FPS)
+    clock = pygame.time.Clock() if realtime else None
+    if trace:
+        tracemalloc.start()
+
+    game = main.current_game = main.Game(seed)
+    games = 1
+    frame_times = array("d")
+    samples = []
+    type_series = {}
+    baseline = None
+    start = time.perf_counter()
+
+    for frame in range(1, frames_total + 1):
+        began = time.perf_counter()
+        if not game.step(survival_policy(game)):
+            game = main.current_game = main.Game(seed + games)
+            games += 1
+        if not headless:
+            pygame.event.pump()
+            game.draw()
+            pygame.display.flip()
+        frame_times.append(time.perf_counter() - began)
+        if clock is not None:
+            clock.tick(FPS)
+
+        if frame % interval and frame != frames_total:
+            continue
+        memory = round(traced_kib(), 1) if trace else None
+        counts = object_counts()
+        index = len(samples)
+        for name, count in counts.items():
+            type_series.setdefault(name, array("q", bytes(8 * index))).append(count)
+        for series in type_series.values():
+            if len(series) == index:
+                series.append(0)
+        times_ms = [t * 1000 for t in frame_times]
+        samples.append({
+            "frame": frame,
+            "hours": round(frame / FPS / 3600, 4),
+            "wall_s": round(time.perf_counter() - start, 2),
+            "games": games,
+            "traced_kib": memory,
+            "objects": sum(counts.values()),
+            "frame_ms": {
+                "p50": round(percentile(times_ms, 0.50), 3),
+                "p95": round(percentile(times_ms, 0.95), 3),
+                "p99": round(percentile(times_ms, 0.99), 3),
+                "max": round(max(times_ms), 3),
+            },
+            "hazards": len(game.hazards),
+            "particles": len(main.particle_list),
+            "trail": len(main.player_trail),
+            "inputs": len(game.inputs),
+            "fonts": len(main._fonts),
+        })
+        frame_times = array("d")
+        del counts
+        if trace and index == warmup:
+            baseline = tracemalloc.take_snapshot()
+
+    steady = samples[warmup:]
+    hours_axis = [sample["hours"] for sample in steady]
+    report_growth = {
+        "objects": growth(hours_axis, [sample["objects"] for sample in steady], max_object_growth),
+        "frame_p99_ms": growth(hours_axis, [sample["frame_ms"]["p99"] for sample in steady], max_frame_drift),
+        # Text sizes are fixed, so the font cache must stop growing after warmup
+        "fonts": growth(hours_axis, [sample["fonts"] for sample in steady], 0),
+    }
+    if trace:
+        report_growth["traced_kib"] = growth(hours_axis, [sample["traced_kib"] for sample in steady],
+                                             max_memory_growth)
+    growing_types = {}
+    for name, series in type_series.items():
+        result = growth(hours_axis, series[warmup:].tolist(), max_object_growth)
+        if result["flagged"]:
+            growing_types[name] = result
+
+    top_allocations = []
+    if trace:
+        if baseline is not None:
+            final = tracemalloc.take_snapshot()
+            ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+            for stat in final.filter_traces(ignore).compare_to(baseline.filter_traces(ignore), "lineno")[:TOP_ALLOCATIONS]:
+                frame_info = stat.traceback[0]
+                top_allocations.append({"site": f"{frame_info.filename}:{frame_info.lineno}",
+                                        "size_diff_kib": round(stat.size_diff / 1024, 1),
+                                        "count_diff": stat.count_diff})
+        tracemalloc.stop()
+
+    violations = [f"{name} grows by {result['per_hour']} per hour"
+                  for name, result in report_growth.items() if result["flagged"]]
+    violations.extend(f"{name} objects grow by {result['per_hour']} per hour" for name, result in growing_types.items())
+    worst_p99 = max((sample["frame_ms"]["p99"] for sample in steady), default=0)
+    if max_p99_ms and worst_p99 > max_p99_ms:
+        violations.append(f"frame time p99 {worst_p99}ms exceeds {max_p99_ms:.1f}ms")
+
+    return {
+        "config": {"hours": hours, "interval": interval, "warmup": warmup, "seed": seed, "headless": headless,
+                   "realtime": realtime, "tracemalloc": trace, "max_memory_growth": max_memory_growth,
+                   "max_object_growth": max_object_growth, "max_frame_drift": max_frame_drift,
+                   "max_p99_ms": max_p99_ms},
+        "frames": frames_total,
+        "games": games,
+        "wall_s": round(time.perf_counter() - start, 2),
+        "samples": samples,
+        "objects_by_type": dict(object_counts().most_common(TOP_TYPES)),
+        "growth": report_growth,
+        "growing_types": growing_types,
+        "top_allocations": top_allocations,
+        "violations": violations,
+        "ok": not violations,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test Space Dodger for memory and frame-time drift")
+    parser.add_argument("--hours", type=float, default=1.0, help="hours of game time to play")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="frames between samples")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="samples to skip before looking for growth")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--headless", action="store_true", help="simulate only, without drawing")
+    parser.add_argument("--realtime", action="store_true", help="cap the frame rate at FPS")
+    parser.add_argument("--no-tracemalloc", dest="trace", action="store_false")
+    parser.add_argument("--max-memory-growth", type=float, default=1024.0, help="KiB per hour")
+    parser.add_argument("--max-object-growth", type=float, default=1000.0, help="objects per hour")
+    parser.add_argument("--max-frame-drift", type=float, default=1.0, help="p99 ms per hour")
+    parser.add_argument("--max-p99-ms", type=float, default=1000 / FPS, help="0 disables the check")
+    parser.add_argument("--report", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_soak(args.hours, args.interval, args.warmup, args.seed, args.headless, args.realtime,
+                      args.trace, args.max_memory_growth, args.max_object_growth, args.max_frame_drift,
+                      args.max_p99_ms)
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    for violation in report["violations"]:
+        print(f"FAIL: {violation}", file=sys.stderr)
+    return 0 if report["ok"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+from collections import deque
+from itertools import takewhile
+
+import numpy as np
+
+from rules import width, HAZARD_TYPES, HAZARD_SIZES, UPGRADE_TYPES, UPGRADE_SIZE, UPGRADE_SPAWN_RATE, spawn_rate_for_level
+
+# Ticks of spawn events generated at a time
+SPAWN_CHUNK = 600
+
+_HAZARD_STREAM = 0
+_UPGRADE_STREAM = 1
+_HAZARD_SIZE_TABLE = np.array(HAZARD_SIZES)
+_UPGRADE_SIZE_TABLE = np.full(len(UPGRADE_TYPES), UPGRADE_SIZE)
+
+# Spawn events for one game, generated ahead of time in chunks with NumPy and
+# queued as (tick, (kind, x)) so each tick only has to look at the front of the
+# queue. Every chunk comes from its own stream seeded by (seed, level, chunk),
+# so a scheduler can be rebuilt at any tick from seed, level, level_start and
+# tick alone. Hazard events depend on the level's spawn rate and are thrown
+# away and regenerated when the level changes; lookahead past a level-up is a
+# forecast, not a promise. Nothing is generated until the first pop or
+# upcoming call, so restoring a snapshot does not pay for a chunk.
+class SpawnScheduler:
+    def __init__(self, seed, level=0, level_start=0, tick=0):
+        self.seed = seed
+        self.tick = tick
+        self.level = level
+        self.level_start = level_start
+        self.hazards = deque()
+        self.upgrades = deque()
+        # Hazard chunks count from the start of the level, upgrade chunks from tick 0
+        self.hazard_chunk = (tick - level_start) // SPAWN_CHUNK
+        self.hazard_end = level_start + self.hazard_chunk * SPAWN_CHUNK
+        self.upgrade_chunk = tick // SPAWN_CHUNK
+        self.upgrade_end = self.upgrade_chunk * SPAWN_CHUNK
+        # pop only looks at these on most ticks: the tick of the next hazard
+        # and upgrade, and the first tick not yet generated for both queues.
+        # Starting them at tick sends the first pop through _catch_up.
+        self.fill_end = self.hazard_due = self.upgrade_due = tick
+
+    def _generate(self, key, start, rate, sizes):
+        rng = np.random.default_rng((self.seed,) + key)
+        ticks = np.flatnonzero(rng.random(SPAWN_CHUNK) < rate) + start
+        kind = rng.integers(0, len(sizes), len(ticks))
+        x = (rng.random(len(ticks)) * (width - sizes[kind] + 1)).astype(np.int64)
+        return zip(ticks.tolist(), zip(kind.tolist(), x.tolist()))
+
+    def _extend_hazards(self):
+        self.hazards.extend(self._generate((_HAZARD_STREAM, self.level, self.hazard_chunk), self.hazard_end,
+                                           spawn_rate_for_level(self.level), _HAZARD_SIZE_TABLE))
+        self.hazard_chunk += 1
+        self.hazard_end += SPAWN_CHUNK
+
+    def _extend_upgrades(self):
+        self.upgrades.extend(self._generate((_UPGRADE_STREAM, 0, self.upgrade_chunk), self.upgrade_end,
+                                            UPGRADE_SPAWN_RATE, _UPGRADE_SIZE_TABLE))
+        self.upgrade_chunk += 1
+        self.upgrade_end += SPAWN_CHUNK
+
+    def _fill(self, until):
+        while self.hazard_end < until:
+            self._extend_hazards()
+        while self.upgrade_end < until:
+            self._extend_upgrades()
+
+    # Generates events up to `until`, drops any before the current tick and
+    # updates the ticks pop watches
+    def _catch_up(self, until):
+        self._fill(until)
+        hazards = self.hazards
+        upgrades = self.upgrades
+        while hazards and hazards[0][0] < self.tick:
+            hazards.popleft()
+        while upgrades and upgrades[0][0] < self.tick:
+            upgrades.popleft()
+        self.fill_end = min(self.hazard_end, self.upgrade_end)
+        self.hazard_due = hazards[0][0] if hazards else self.hazard_end
+        self.upgrade_due = upgrades[0][0] if upgrades else self.upgrade_end
+
+    def set_level(self, level):
+        self.level = level
+        self.level_start = self.tick
+        self.hazards.clear()
+        self.hazard_chunk = 0
+        self.hazard_end = self.fill_end = self.hazard_due = self.tick
+
+    # Returns the (kind, x) of this tick's hazard and upgrade, or None, and
+    # moves on to the next tick
+    def pop(self):
+        tick = self.tick
+        if tick >= self.fill_end:
+            self._catch_up(tick + 1)
+        self.tick = tick + 1
+        hazard = upgrade = None
+        if tick == self.hazard_due:
+            hazards = self.hazards
+            hazard = hazards.popleft()[1]
+            self.hazard_due = hazards[0][0] if hazards else self.hazard_end
+        if tick == self.upgrade_due:
+            upgrades = self.upgrades
+            upgrade = upgrades.popleft()[1]
+            self.upgrade_due = upgrades[0][0] if upgrades else self.upgrade_end
+        return hazard, upgrade
+
+    # Spawns due in the next `ticks` ticks as (tick, type, x) lists of hazards
+    # and upgrades, assuming the level does not change
+    def upcoming(self, ticks):
+        end = self.tick + ticks
+        self._catch_up(end)
+        hazards = [(tick, HAZARD_TYPES[kind], x) for tick, (kind, x) in takewhile(lambda e: e[0] < end, self.hazards)]
+        upgrades = [(tick, UPGRADE_TYPES[kind], x) for tick, (kind, x) in takewhile(lambda e: e[0] < end, self.upgrades)]
+        return hazards, upgrades
@@ -0,0 +1,56 @@
+import unittest
+from controls import ControlSampler, LatencyMeter
+from rules import LEFT, RIGHT, SPECIAL, MOVE_SHIFT, MOVE_STEPS
+
+def fraction(controls):
+    return (controls >> MOVE_SHIFT) / MOVE_STEPS
+
+class TestControlSampler(unittest.TestCase):
+    def test_held_keys_move_a_full_step(self):
+        sampler = ControlSampler(0.0, held=LEFT)
+        self.assertEqual(sampler.sample(1.0), LEFT)
+        self.assertEqual(sampler.sample(2.0), LEFT)
+        sampler.press(RIGHT, 2.5)
+        self.assertEqual(sampler.sample(3.0), LEFT | 16 << MOVE_SHIFT)
+        self.assertEqual(sampler.sample(4.0), LEFT | RIGHT)
+
+    def test_short_tap_moves_part_of_a_step(self):
+        sampler = ControlSampler(0.0)
+        sampler.press(RIGHT, 0.25)
+        sampler.release(RIGHT, 0.5)
+        controls = sampler.sample(1.0)
+        self.assertEqual(controls & (LEFT | RIGHT), RIGHT)
+        self.assertEqual(fraction(controls), 0.25)
+        self.assertEqual(sampler.sample(2.0), 0)
+
+    def test_instant_tap_is_not_lost(self):
+        sampler = ControlSampler(0.0)
+        sampler.press(LEFT, 0.5)
+        sampler.release(LEFT, 0.5)
+        self.assertEqual(sampler.sample(1.0), LEFT | 1 << MOVE_SHIFT)
+
+    def test_special_fires_on_tap(self):
+        sampler = ControlSampler(0.0)
+        sampler.press(SPECIAL, 0.1)
+        sampler.release(SPECIAL, 0.2)
+        self.assertEqual(sampler.sample(1.0), SPECIAL)
+        self.assertEqual(sampler.sample(2.0), 0)
+
+    def test_key_repeat_keeps_first_press(self):
+        sampler = ControlSampler(0.0)
+        sampler.press(LEFT, 0.5)
+        sampler.press(LEFT, 0.9)
+        self.assertEqual(fraction(sampler.sample(1.0)), 0.5)
+        self.assertEqual(sampler.sampled, [0.5, 0.9])
+
+    def test_latency_meter(self):
+        meter = LatencyMeter(capacity=3)
+        self.assertEqual(meter.summary(), {"count": 0})
+        meter.record([1.0, 1.01], 1.02)
+        meter.record([2.0, 2.002], 2.004)
+        summary = meter.summary()
+        self.assertEqual(summary["count"], 3)
+        self.assertEqual(summary["max_ms"], 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
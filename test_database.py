@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
 import sqlite3
 from database import init_db, insert_score, get_high_score, get_top_scores, get_highest_score, close_db
+from database import open_db, export_scores, import_scores
 
 class TestDatabase(unittest.TestCase):
     def setUp(self):
@@ -58,5 +61,93 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(len(top_scores), 5)
         self.assertEqual([score for score, _ in top_scores], [600, 500, 400, 300, 200])
 
+    def test_export_import_round_trip(self):
+        for score in [100, 200, 300]:
+            insert_score(score)
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("scores.csv", "scores.jsonl"):
+                path = os.path.join(tmp, name)
+                self.assertEqual(export_scores(path, chunk_size=2), 3)
+                # Everything exported is already present
+                self.assertEqual(import_scores(path, chunk_size=2), (0, 3, 0))
+            self.conn.execute("DELETE FROM high_scores")
+            self.assertEqual(import_scores(os.path.join(tmp, "scores.jsonl")), (3, 0, 0))
+        self.assertEqual([score for score, _ in get_top_scores()], [300, 200, 100])
+
+    def test_import_dedupes_and_validates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runs.csv")
+            with open(path, "w") as f:
+                f.write("score,date,run\n"
+                        "500,2024-05-01 12:00:00,a\n"
+                        "500,2024-05-01 12:00:00,a\n"
+                        "500,2024-05-01 12:00:00,b\n"
+                        "-1,2024-05-01 12:00:00,c\n"
+                        "abc,2024-05-01 12:00:00,d\n"
+                        "400,2024-13-01 12:00:00,e\n"
+                        "400,2024-05-01,f\n"
+                        "400\n"
+                        "400,2024-05-01 12:00:01,g\n")
+            self.assertEqual(import_scores(path, chunk_size=3), (3, 1, 5))
+            self.assertEqual(import_scores(path, chunk_size=3), (0, 4, 5))
+        self.assertEqual(get_top_scores(), [(500, "2024-05-01 12:00:00"), (500, "2024-05-01 12:00:00"),
+                                            (400, "2024-05-01 12:00:01")])
+
+    def test_import_keeps_runs_in_the_same_second(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runs.csv")
+            with open(path, "w") as f:
+                f.write("score,date\n" + "7,2024-05-01 12:00:00\n" * 3)
+            self.assertEqual(import_scores(path), (3, 0, 0))
+            export_scores(path)
+            self.assertEqual(import_scores(path), (0, 3, 0))
+
+    def test_insert_after_import(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runs.csv")
+            with open(path, "w") as f:
+                f.write("".join(f"{score},2024-05-01 12:00:{i:02d}\n" for i, score in enumerate([5] * 6 + [9, 8])))
+            self.assertEqual(import_scores(path), (8, 0, 0))
+        # The table now holds history, so nothing is trimmed
+        insert_score(7)
+        insert_score(3)
+        scores = sorted(score for (score,) in self.conn.execute("SELECT score FROM high_scores"))
+        self.assertEqual(scores, [3] + [5] * 6 + [7, 8, 9])
+
+    def test_full_board_replaces_one_lowest_score(self):
+        for score in [100, 100, 200, 300, 400]:
+            insert_score(score)
+        insert_score(150)
+        self.assertEqual([score for score, _ in get_top_scores()], [400, 300, 200, 150, 100])
+
+    def test_old_database_gets_run_ids(self):
+        self.conn.execute("DROP TABLE high_scores")
+        self.conn.execute("CREATE TABLE high_scores (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          "score INTEGER NOT NULL, date TEXT NOT NULL)")
+        self.conn.execute("INSERT INTO high_scores (score, date) VALUES (5, '2024-05-01 12:00:00'), "
+                          "(5, '2024-05-01 12:00:00')")
+        open_db(':memory:')
+        runs = [run for (run,) in self.conn.execute("SELECT run FROM high_scores")]
+        self.assertEqual(len(set(runs)), 2)
+        self.assertTrue(all(runs))
+
+    def test_import_validates_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runs.jsonl")
+            with open(path, "w") as f:
+                f.write('{"score": 500, "date": "2024-05-01 12:00:00"}\n'
+                        '{"score": 3.7, "date": "2024-05-01 12:00:00"}\n'
+                        '{"score": true, "date": "2024-05-01 12:00:00"}\n'
+                        '{"score": "400", "date": "2024-05-01 12:00:00"}\n'
+                        '{"score": 400}\n'
+                        'not json\n'
+                        '{"score": 400, "date": "2024-05-01 12:00:01"}\n')
+            self.assertEqual(import_scores(path), (2, 0, 5))
+        self.assertEqual(get_top_scores(), [(500, "2024-05-01 12:00:00"), (400, "2024-05-01 12:00:01")])
+
+    def test_import_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            import_scores("scores.xml")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from effects import EffectScheduler
+
+class Target:
+    def __init__(self):
+        self.log = []
+
+def effect(name):
+    return (lambda target: target.log.append(f"apply {name}"),
+            lambda target: target.log.append(f"expire {name}"))
+
+class TestEffectScheduler(unittest.TestCase):
+    def setUp(self):
+        self.target = Target()
+        self.effects = EffectScheduler(self.target, {
+            "speed": effect("speed"),
+            "magnet": effect("magnet"),
+            "shield": (lambda target: target.log.append("apply shield"), None),
+        })
+
+    def test_effect_expires_after_duration(self):
+        self.effects.activate("speed", 3)
+        self.assertTrue(self.effects.is_active("speed"))
+        self.assertEqual(self.effects.remaining("speed"), 3)
+        self.effects.advance()
+        self.effects.advance()
+        self.assertEqual(self.effects.remaining("speed"), 1)
+        self.assertEqual(self.target.log, ["apply speed"])
+        self.effects.advance()
+        self.assertFalse(self.effects.is_active("speed"))
+        self.assertEqual(self.effects.remaining("speed"), 0)
+        self.assertEqual(self.target.log, ["apply speed", "expire speed"])
+
+    def test_reactivation_extends_effect(self):
+        self.effects.activate("speed", 2)
+        self.effects.advance()
+        self.effects.activate("speed", 2)
+        self.effects.advance()
+        self.assertTrue(self.effects.is_active("speed"))
+        self.effects.advance()
+        self.assertFalse(self.effects.is_active("speed"))
+        self.assertEqual(self.target.log.count("expire speed"), 1)
+
+    def test_effects_expire_independently(self):
+        self.effects.activate("magnet", 5)
+        self.effects.activate("speed", 2)
+        self.effects.advance(2)
+        self.assertEqual(self.target.log[-1], "expire speed")
+        self.assertTrue(self.effects.is_active("magnet"))
+        self.effects.advance(3)
+        self.assertEqual(self.target.log[-1], "expire magnet")
+
+    def test_untimed_effect_applies_once(self):
+        self.effects.activate("shield")
+        self.effects.advance(100)
+        self.assertEqual(self.target.log, ["apply shield"])
+        self.assertFalse(self.effects.is_active("shield"))
+
+if __name__ == '__main__':
+    unittest.main()
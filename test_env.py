@@ -0,0 +1,209 @@
+import unittest
+import numpy as np
+from env import VectorSpaceDodgerEnv, SpaceDodgerEnv, LEFT, RIGHT, PLAYER_Y, HAZARD_CELL, PLAYER_CELL
+from rules import HOMING, MOVE_SHIFT, HAZARD_CODES, UPGRADE_CODES, PLAYER_HEALTH, TIMED_UPGRADES, width
+
+class TestVectorSpaceDodgerEnv(unittest.TestCase):
+    def setUp(self):
+        self.env = VectorSpaceDodgerEnv(4, seed=0)
+        self.env.reset()
+
+    def place_hazard(self, env_index, hazard_type, x, y, slot=0):
+        kind = HAZARD_CODES[hazard_type]
+        self.env.hazard_x[env_index, slot] = x
+        self.env.hazard_y[env_index, slot] = y
+        self.env.hazard_size[env_index, slot] = 50
+        self.env.hazard_speed[env_index, slot] = 5
+        self.env.hazard_kind[env_index, slot] = kind
+        self.env.hazard_active[env_index, slot] = True
+
+    def test_observation_shapes(self):
+        obs, _ = self.env.reset()
+        self.assertEqual(obs["player"].shape, (4, 4))
+        self.assertEqual(obs["effects"].shape, (4, len(TIMED_UPGRADES)))
+        self.assertEqual(obs["hazards"].shape, (4, 32, 3))
+        self.assertEqual(obs["upgrades"].shape, (4, 4, 3))
+        self.assertTrue((obs["hazards"][..., 2] == -1).all())
+
+    def test_actions_move_players_independently(self):
+        self.env.step(np.array([0, LEFT, RIGHT, LEFT | RIGHT]))
+        self.assertEqual(list(self.env.player_x), [width // 2, width // 2 - 10, width // 2 + 10, width // 2])
+
+    def test_partial_tick_moves(self):
+        self.env.step(np.array([LEFT | 16 << MOVE_SHIFT, RIGHT | 8 << MOVE_SHIFT, 0, RIGHT]))
+        self.assertEqual(list(self.env.player_x), [width // 2 - 5, width // 2 + 2.5, width // 2, width // 2 + 10])
+
+    def test_seeded_runs_are_reproducible(self):
+        other = VectorSpaceDodgerEnv(4, seed=0)
+        for _ in range(200):
+            obs, _, _, _, _ = self.env.step(RIGHT)
+            other_obs, _, _, _, _ = other.step(RIGHT)
+        for key in obs:
+            np.testing.assert_array_equal(obs[key], other_obs[key])
+
+    def test_dodged_hazard_scores(self):
+        self.place_hazard(1, "asteroid", 0, 598)
+        _, rewards, _, _, _ = self.env.step(0)
+        self.assertEqual(rewards[1], 1)
+        self.assertEqual(self.env.combo[1], 1)
+        self.assertFalse(self.env.hazard_active[1, 0])
+
+    def test_combo_bonus(self):
+        self.env.combo[0] = 9
+        self.place_hazard(0, "asteroid", 0, 598)
+        self.env.step(0)
+        self.assertEqual(self.env.score[0], 2)
+
+    def test_collision_uses_shield_then_health(self):
+        self.env.shield[2] = True
+        self.place_hazard(2, "asteroid", width // 2, PLAYER_Y - 10, slot=0)
+        self.place_hazard(2, "comet", width // 2 + 5, PLAYER_Y - 10, slot=1)
+        self.env.step(0)
+        self.assertFalse(self.env.shield[2])
+        self.assertEqual(self.env.health[2], PLAYER_HEALTH - 1)
+        self.assertEqual(self.env.health[0], PLAYER_HEALTH)
+
+    def test_fast_hazard_cannot_pass_through_player(self):
+        # Starts above the player and ends below it without overlapping at either end
+        self.place_hazard(0, "comet", width // 2, PLAYER_Y - 60)
+        self.env.hazard_speed[0, 0] = 150
+        self.env.step(0)
+        self.assertEqual(self.env.health[0], PLAYER_HEALTH - 1)
+        self.assertFalse(self.env.hazard_active[0, 0])
+
+    def test_frame_skip_advances_several_ticks(self):
+        env = VectorSpaceDodgerEnv(2, seed=0, frame_skip=4)
+        env.player_speed[1] = 30
+        env.hazard_x[1, 0] = width // 2 - 65
+        env.hazard_y[1, 0] = PLAYER_Y
+        env.hazard_size[1, 0] = 50
+        env.hazard_speed[1, 0] = 5
+        env.hazard_active[1, 0] = True
+        env.step(np.array([LEFT, LEFT]))
+        self.assertEqual(list(env.ticks), [4, 4])
+        self.assertEqual(env.player_x[0], width // 2 - 40)
+        # The player moves from right of the hazard to left of it during the step
+        self.assertEqual(env.health[1], PLAYER_HEALTH - 1)
+        with self.assertRaises(ValueError):
+            VectorSpaceDodgerEnv(1, frame_skip=0)
+
+    def spawn(self, env, rate):
+        roll, kind, x = env._timeline(env.frame_skip)[:3]
+        env.spawn_tick += env.frame_skip
+        env._spawn_hazards(roll < rate, kind, x)
+
+    def test_spawns_per_tick_do_not_depend_on_frame_skip(self):
+        for level in (0, 20, 100):
+            rate = min(0.05 * (1 + level * 0.05), 0.3)
+            per_tick = []
+            for frame_skip in (1, 8):
+                env = VectorSpaceDodgerEnv(1000, seed=level, frame_skip=frame_skip)
+                spawned = 0
+                for _ in range(80 // frame_skip):
+                    env.hazard_active[:] = False
+                    self.spawn(env, rate)
+                    spawned += env.hazard_active.sum()
+                per_tick.append(spawned / 80000)
+            self.assertAlmostEqual(per_tick[0], rate, delta=0.006)
+            self.assertAlmostEqual(per_tick[1], rate, delta=0.006)
+
+    def test_later_spawns_in_a_step_start_higher(self):
+        env = VectorSpaceDodgerEnv(200, seed=1, frame_skip=8)
+        self.spawn(env, 0.3)
+        active = env.hazard_active
+        ticks = (-env.hazard_y[active] - env.hazard_size[active]) / env.hazard_speed[active]
+        self.assertTrue(np.allclose(ticks, np.round(ticks)))
+        self.assertEqual(set(np.round(ticks).astype(int)), set(range(8)))
+
+    def test_lookahead_forecasts_spawns(self):
+        env = VectorSpaceDodgerEnv(50, max_hazards=64, max_upgrades=16, seed=3, lookahead=100)
+        _, info = env.reset()
+        self.assertEqual(info["upcoming_hazards"].shape, (50, 100, 2))
+        forecast = info
+        for _ in range(150):
+            hazards, upgrades = env.hazard_active.copy(), env.upgrade_active.copy()
+            env.health[:] = PLAYER_HEALTH
+            _, _, _, _, info = env.step(0)
+            # Each step spawns what the forecast had for its tick
+            for active, before, kind, x, upcoming in (
+                    (env.hazard_active, hazards, env.hazard_kind, env.hazard_x, forecast["upcoming_hazards"]),
+                    (env.upgrade_active, upgrades, env.upgrade_kind, env.upgrade_x, forecast["upcoming_upgrades"])):
+                rows, slots = np.nonzero(active & ~before)
+                expected = upcoming[:, 0]
+                self.assertEqual(list(rows), list(np.nonzero(expected[:, 0] >= 0)[0]))
+                np.testing.assert_array_equal(kind[rows, slots], expected[rows, 0])
+                # Homing hazards have already turned towards the player
+                still = kind[rows, slots] != HOMING
+                np.testing.assert_array_equal(x[rows, slots][still], expected[rows, 1][still])
+            # and the rest of the window moves up a tick
+            np.testing.assert_array_equal(info["upcoming_upgrades"][:, :-1], forecast["upcoming_upgrades"][:, 1:])
+            forecast = info
+
+    def test_single_env_lookahead(self):
+        env = SpaceDodgerEnv(seed=0, lookahead=10)
+        _, info = env.reset()
+        self.assertEqual(info["upcoming_hazards"].shape, (10, 2))
+        self.assertEqual(env.step(0)[4]["upcoming_upgrades"].shape, (10, 2))
+
+    def test_collision_needs_drawn_pixels(self):
+        # Beside the alien's head its bounding box is empty
+        for masked, y, health in ((True, 35, PLAYER_HEALTH), (False, 35, PLAYER_HEALTH - 1),
+                                  (True, 20, PLAYER_HEALTH - 1)):
+            env = VectorSpaceDodgerEnv(1, seed=0, masked=masked)
+            env.hazard_x[0, 0] = width // 2 - 50
+            env.hazard_y[0, 0] = PLAYER_Y + y
+            env.hazard_size[0, 0] = 60
+            env.hazard_kind[0, 0] = HAZARD_CODES["alien"]
+            env.hazard_active[0, 0] = True
+            env.step(0)
+            self.assertEqual(env.health[0], health)
+
+    def test_terminated_envs_autoreset(self):
+        self.env.health[3] = 1
+        self.env.score[3] = 7
+        self.place_hazard(3, "asteroid", width // 2, PLAYER_Y - 10)
+        _, _, terminated, _, info = self.env.step(0)
+        self.assertTrue(terminated[3])
+        self.assertEqual(info["final_score"][3], 7)
+        self.assertEqual(self.env.health[3], PLAYER_HEALTH)
+        self.assertEqual(self.env.score[3], 0)
+
+    def test_upgrade_timer_expires(self):
+        slot = TIMED_UPGRADES.index("speed")
+        self.env.upgrade_x[0, 0] = width // 2
+        self.env.upgrade_y[0, 0] = PLAYER_Y
+        self.env.upgrade_kind[0, 0] = UPGRADE_CODES["speed"]
+        self.env.upgrade_active[0, 0] = True
+        self.env.step(0)
+        self.assertEqual(self.env.player_speed[0], 15)
+        self.env.timers[0, slot] = 1
+        self.env.step(0)
+        self.assertEqual(self.env.player_speed[0], 10)
+
+    def test_grid_observation(self):
+        env = VectorSpaceDodgerEnv(2, obs_mode="grid", seed=0)
+        env.hazard_x[0, 0] = 0
+        env.hazard_y[0, 0] = 0
+        env.hazard_size[0, 0] = 50
+        env.hazard_active[0, 0] = True
+        grid = env._observe()
+        self.assertEqual(grid.shape, (2, 15, 20))
+        self.assertEqual(grid[0, 0, 0], HAZARD_CELL)
+        self.assertEqual(grid[0, 1, 1], HAZARD_CELL)
+        self.assertEqual(grid[0, 2, 2], 0)
+        self.assertEqual(grid[1, 0, 0], 0)
+        self.assertEqual(grid[0, PLAYER_Y // 40, (width // 2) // 40], PLAYER_CELL)
+
+class TestSpaceDodgerEnv(unittest.TestCase):
+    def test_single_env_step(self):
+        env = SpaceDodgerEnv()
+        obs, _ = env.reset(seed=3)
+        self.assertEqual(obs["hazards"].shape, (32, 3))
+        obs, reward, terminated, truncated, _ = env.step(LEFT)
+        self.assertIsInstance(reward, float)
+        self.assertFalse(terminated)
+        self.assertFalse(truncated)
+        self.assertEqual(obs["player"][0], width // 2 - 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+
+from rules import HOMING, HAZARD_SIZES, MAGNET_RANGE, height
+import kernels
+from kernels import (move_hazards_numpy, move_hazards_loop, pull_upgrades_numpy, pull_upgrades_loop,
+                     hazard_hits_numpy, hazard_hits_loop)
+
+PLAYER_Y = 500
+
+def hazard_state(rng, shape):
+    kind = rng.integers(0, len(HAZARD_SIZES), shape)
+    kind[:, ::3] = HOMING
+    return [rng.uniform(0, 750, shape), rng.uniform(-50, height, shape), rng.uniform(3, 12, shape),
+            rng.integers(-2, 4, shape), kind, rng.random(shape) < 0.8]
+
+class TestKernels(unittest.TestCase):
+    # The loop versions are what Numba compiles; run as plain Python they
+    # must match the NumPy versions exactly, as must whichever version is in use
+    def test_move_hazards_versions_agree(self):
+        rng = np.random.default_rng(0)
+        for ticks in (1, 3):
+            state = hazard_state(rng, (6, 40))
+            player_x = rng.uniform(0, 750, 6)
+            numpy_state = [a.copy() for a in state]
+            loop_state = [a.copy() for a in state]
+            used_state = [a.copy() for a in state]
+            move_hazards_numpy(*numpy_state, player_x, PLAYER_Y, ticks)
+            move_hazards_loop(*loop_state, player_x, PLAYER_Y, ticks)
+            kernels.move_hazards(*used_state, player_x, PLAYER_Y, ticks)
+            for a, b, c in zip(numpy_state, loop_state, used_state):
+                np.testing.assert_array_equal(a, b)
+                np.testing.assert_array_equal(a, c)
+            self.assertFalse(np.array_equal(numpy_state[1], state[1]))
+
+    def test_pull_upgrades_versions_agree(self):
+        rng = np.random.default_rng(1)
+        x = rng.uniform(0, 800, (8, 4))
+        y = rng.uniform(PLAYER_Y - MAGNET_RANGE, PLAYER_Y, (8, 4))
+        active = rng.random((8, 4)) < 0.7
+        magnet = np.arange(8) % 2 == 0
+        player_x = rng.uniform(0, 750, 8)
+        x[0, 0], y[0, 0], player_x[0] = 100.0, PLAYER_Y, 100.0  # already on the player
+        numpy_xy = (x.copy(), y.copy())
+        loop_xy = (x.copy(), y.copy())
+        used_xy = (x.copy(), y.copy())
+        pull_upgrades_numpy(*numpy_xy, active, magnet, player_x, PLAYER_Y, 10)
+        pull_upgrades_loop(*loop_xy, active, magnet, player_x, PLAYER_Y, 10)
+        kernels.pull_upgrades(*used_xy, active, magnet, player_x, PLAYER_Y, 10)
+        for a, b, c in zip(numpy_xy, loop_xy, used_xy):
+            np.testing.assert_array_equal(a, b)
+            np.testing.assert_array_equal(a, c)
+        np.testing.assert_array_equal(numpy_xy[0][1], x[1])
+        self.assertTrue((numpy_xy[0] != x).any())
+
+    def test_hazard_hits_versions_agree(self):
+        rng = np.random.default_rng(2)
+        n = 2000
+        size = rng.choice(HAZARD_SIZES, n).astype(float)
+        x0 = rng.uniform(200, 400, n)
+        y0 = rng.uniform(PLAYER_Y - 200, PLAYER_Y + 50, n)
+        x = x0 + rng.choice([0.0, 5.0, -20.0], n)
+        y = y0 + rng.choice([0.0, 8.0, 150.0], n)
+        player_x0 = rng.uniform(200, 400, n)
+        player_x = player_x0 + rng.choice([0.0, 10.0, -10.0], n)
+        player_size = rng.choice([50.0, 40.0], n)
+        args = (player_x0, player_x, PLAYER_Y, player_size, x0, y0, x, y, size)
+        hits = hazard_hits_numpy(*args)
+        np.testing.assert_array_equal(hazard_hits_loop(*args), hits)
+        np.testing.assert_array_equal(kernels.hazard_hits(*args), hits)
+        self.assertTrue(0 < hits.sum() < n)
+
+if __name__ == '__main__':
+    unittest.main()
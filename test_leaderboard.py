@@ -0,0 +1,114 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import ANY
+import database
+from leaderboard import LeaderboardServer, LeaderboardClient, parse_address
+
+class TestLeaderboard(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.server = LeaderboardServer(os.path.join(self.dir.name, "scores.db"), port=0)
+        self.address = self.server.start()
+        self.client = LeaderboardClient(self.address, batch_size=3, flush_interval=60)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        self.dir.cleanup()
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("example:1234"), ("example", 1234))
+        self.assertEqual(parse_address(":1234"), ("127.0.0.1", 1234))
+
+    def test_submissions_are_batched(self):
+        other = LeaderboardClient(self.address, cache_ttl=0)
+        self.addCleanup(other.close)
+        self.client.insert_score(100)
+        self.client.insert_score(200)
+        self.assertEqual(other.get_high_score(), 0)
+        self.client.insert_score(150)
+        self.assertEqual(other.get_high_score(), 200)
+
+    def test_reads_flush_pending_scores(self):
+        for score in [100, 200, 150, 300, 250, 400]:
+            self.client.insert_score(score)
+        self.assertEqual([score for score, _ in self.client.get_top_scores()], [400, 300, 250, 200, 150])
+        highest_score, date = self.client.get_highest_score()
+        self.assertEqual(highest_score, 400)
+        self.assertIsNotNone(date)
+
+    def test_reads_are_cached(self):
+        other = LeaderboardClient(self.address, batch_size=1)
+        self.addCleanup(other.close)
+        self.assertEqual(self.client.get_high_score(), 0)
+        other.insert_score(500)
+        self.assertEqual(self.client.get_high_score(), 0)
+        self.client._cache.clear()
+        self.assertEqual(self.client.get_high_score(), 500)
+
+    def test_pipelined_requests(self):
+        results = self.client.request({"op": "submit", "scores": [10, 20]}, {"op": "high"}, {"op": "top", "limit": 1})
+        self.assertEqual(results[0], 2)
+        self.assertEqual(results[1], 20)
+        self.assertEqual(results[2][0][0], 20)
+
+    def test_errors_are_reported(self):
+        with self.assertRaises(RuntimeError):
+            self.client.request({"op": "drop"})
+        self.assertEqual(self.client.get_high_score(), 0)
+
+    def test_failed_flush_keeps_the_batch(self):
+        self.client.insert_score(100)
+        self.client.insert_score(200)
+        self.server.stop()
+        with self.assertRaises(OSError):
+            self.client.insert_score(300)
+        self.assertEqual(self.client._pending, [100, 200, 300])
+        self.server = LeaderboardServer(os.path.join(self.dir.name, "scores.db"), port=0)
+        self.client.address = self.server.start()
+        self.client.insert_score(400)
+        self.assertEqual(self.client._pending, [])
+        self.assertEqual([score for score, _ in self.client.get_top_scores()], [400, 300, 200, 100])
+
+    def test_stop_hangs_up_on_clients(self):
+        self.assertEqual(self.client.get_high_score(), 0)
+        with self.assertNoLogs("asyncio"):
+            self.server.stop()
+
+    def test_reconnects_after_server_restart(self):
+        self.assertEqual(self.client.get_high_score(), 0)
+        self.server.stop()
+        self.server = LeaderboardServer(os.path.join(self.dir.name, "scores.db"), port=self.address[1])
+        self.server.start()
+        # The pooled connection is closed; the flush retries on a new one
+        self.client.insert_scores([5, 6, 7])
+        self.assertEqual(self.client.unsent(), [])
+        self.assertEqual(self.client.get_high_score(), 7)
+
+    def test_scores_are_kept_locally_when_the_leaderboard_is_down_at_exit(self):
+        local = os.path.join(self.dir.name, "local.db")
+        database.init_db(local, leaderboard_address=f"{self.address[0]}:{self.address[1]}")
+        database.insert_score(70)
+        database.insert_score(90)
+        self.server.stop()
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            database.close_db()
+        self.assertIn("keeping 2 scores", stderr.getvalue())
+        connection = database.open_db(local)
+        self.addCleanup(connection.close)
+        self.assertEqual(database.query_top_scores(connection), [(90, ANY), (70, ANY)])
+
+    def test_database_api_uses_leaderboard_backend(self):
+        database.init_db(leaderboard_address=f"{self.address[0]}:{self.address[1]}")
+        self.addCleanup(database.close_db)
+        database.insert_score(70)
+        database.insert_score(90)
+        self.assertEqual(database.get_high_score(), 90)
+        self.assertEqual([score for score, _ in database.get_top_scores()], [90, 70])
+        self.assertEqual(database.get_highest_score()[0], 90)
+
+if __name__ == '__main__':
+    unittest.main()
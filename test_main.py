@@ -1,17 +1,8 @@
 import unittest
 from unittest.mock import patch, MagicMock
-import sys
-import os
 import random
 
-# Set the environment variable to disable print statements
-os.environ['PYTEST_CURRENT_TEST'] = 'yes'
-
-# Mock the entire pygame module
-sys.modules['pygame'] = MagicMock()
-import pygame
-
-# Now import main after mocking pygame
+from testsupport import pygame
 import main
 
 class TestGameFunctions(unittest.TestCase):
@@ -114,6 +105,19 @@ class TestGameFunctions(unittest.TestCase):
         self.assertEqual(main.UPGRADES["magnet"]["duration"], 15)
         self.assertNotIn("duration", main.UPGRADES["shield"])
 
+    def test_upgrade_effects_expire(self):
+        self.assertEqual(set(main.UPGRADE_EFFECTS), set(main.UPGRADES))
+        player = main.Player()
+        effects = main.EffectScheduler(player, main.UPGRADE_EFFECTS)
+        effects.activate("speed", 2)
+        effects.activate("invincibility", 1)
+        self.assertGreater(player.speed, 10)
+        self.assertTrue(player.invincible)
+        effects.advance()
+        self.assertFalse(player.invincible)
+        effects.advance()
+        self.assertEqual(player.speed, 10)
+
     @patch('main.get_top_scores')
     @patch('main.get_highest_score')
     @patch('pygame.event.get')
@@ -141,6 +145,33 @@ class TestGameFunctions(unittest.TestCase):
         
         self.assertFalse(result)
 
+    @patch('main.insert_score', side_effect=ConnectionRefusedError)
+    @patch('main.get_top_scores', side_effect=ConnectionRefusedError)
+    @patch('main.draw_text')
+    def test_leaderboard_outage_does_not_end_the_game(self, mock_draw_text, mock_get_top_scores, mock_insert_score):
+        main.submit_score(100)
+        mock_insert_score.assert_called_once_with(100)
+        main.draw_game_over_screen(100)
+        texts = [call.args[0] for call in mock_draw_text.call_args_list]
+        self.assertIn("Leaderboard unavailable", texts)
+
+    @patch('main.play_replay', return_value=True)
+    @patch('main.get_top_scores', return_value=[])
+    @patch('main.get_highest_score', return_value=(100, '2023-05-01 12:00:00'))
+    @patch('pygame.event.get')
+    @patch('main.draw_text')
+    def test_game_over_screen_plays_replay(self, mock_draw_text, mock_event_get, mock_get_highest_score,
+                                           mock_get_top_scores, mock_play_replay):
+        replay = main.ReplayBuffer()
+        replay.capture(main.Game(2).frame())
+        mock_event_get.side_effect = [
+            [MagicMock(type=pygame.KEYDOWN, key=pygame.K_r)],
+            [MagicMock(type=pygame.KEYDOWN, key=pygame.K_RETURN)]
+        ]
+        with patch('main.replay_buffer', replay):
+            self.assertTrue(main.show_game_over_screen(100))
+        mock_play_replay.assert_called_once_with(replay)
+
     @patch('pygame.event.get')
     @patch('main.draw_text')
     def test_show_start_screen(self, mock_draw_text, mock_event_get):
@@ -227,6 +258,216 @@ class TestGameFunctions(unittest.TestCase):
         self.assertEqual(hazard.pos[0], initial_pos[0])  # X position should not change during cooldown
         self.assertGreater(hazard.pos[1], initial_pos[1])  # Y position should increase
 
+    def test_player_trail_ring_buffer(self):
+        trail = main.Trail(3)
+        self.assertEqual(list(trail), [])
+        for x in range(5):
+            trail.push(x, x * 2)
+        self.assertEqual(len(trail), 3)
+        self.assertEqual(list(trail), [(4, 8), (3, 6), (2, 4)])
+        trail.clear()
+        self.assertEqual(len(trail), 0)
+
+    def test_entities_share_type_metadata(self):
+        hazard = main.Hazard("homing")
+        upgrade = main.Upgrade("magnet")
+        self.assertFalse(hasattr(hazard, "__dict__"))
+        self.assertFalse(hasattr(upgrade, "__dict__"))
+        self.assertFalse(hasattr(main.Player(), "__dict__"))
+        self.assertEqual(main.HAZARD_TYPES[hazard.kind], "homing")
+        self.assertEqual(main.UPGRADE_TYPES[upgrade.kind], "magnet")
+        self.assertIs(upgrade.color, main.UPGRADES["magnet"]["color"])
+
+    def test_game_replays_from_seed_and_inputs(self):
+        global_state = random.getstate()
+
+        def run(seed, inputs):
+            game = main.Game(seed)
+            for controls in inputs:
+                if not game.step(controls):
+                    break
+            return (main.score, main.level, game.player.pos, game.player.health,
+                    [hazard.pos for hazard in game.hazards], [upgrade.pos for upgrade in game.upgrades])
+
+        game = main.Game(7)
+        rng = random.Random(1)
+        for _ in range(400):
+            if not game.step(rng.choice([0, main.LEFT, main.RIGHT])):
+                break
+        expected = (main.score, main.level, game.player.pos, game.player.health,
+                    [hazard.pos for hazard in game.hazards], [upgrade.pos for upgrade in game.upgrades])
+        self.assertEqual(run(game.seed, game.inputs), expected)
+        # Games draw from their own RNGs, not the random module's
+        self.assertEqual(random.getstate(), global_state)
+
+    def test_other_random_use_does_not_change_a_game(self):
+
+        def play(ticks, other_draws):
+            # Unscheduled games roll for spawns every tick, so draw the most
+            game = main.Game(4, scheduled=False)
+            controls = random.Random(5)
+            for _ in range(ticks):
+                game.player.health = 3
+                game.step(controls.choice([0, main.LEFT, main.RIGHT]))
+                for _ in range(other_draws):
+                    random.random()
+            return ([(hazard.kind, hazard.pos) for hazard in game.hazards],
+                    [(upgrade.kind, upgrade.pos) for upgrade in game.upgrades], main.score, main.particle_list)
+
+        self.assertEqual(play(300, 3), play(300, 0))
+
+    def test_game_step_moves_player(self):
+        game = main.Game(3)
+        game.step(main.LEFT)
+        self.assertEqual(game.player.x, main.width // 2 - game.player.speed)
+        game.step(main.RIGHT)
+        self.assertEqual(game.player.x, main.width // 2)
+        self.assertEqual(bytes(game.inputs), bytes([main.LEFT, main.RIGHT]))
+        self.assertEqual(list(main.player_trail)[0], (game.player.x, game.player.y))
+
+    def test_game_step_moves_part_of_a_step(self):
+        game = main.Game(3)
+        game.step(main.RIGHT | 8 << main.MOVE_SHIFT)
+        self.assertEqual(game.player.x, main.width // 2 + game.player.speed / 4)
+
+    @patch('main.draw_hearts')
+    @patch('main.get_font')
+    def test_hud_redraws_only_changed_fields(self, mock_get_font, mock_draw_hearts):
+        hud = main.Hud()
+        render = mock_get_font.return_value.render
+        hud.update(10, 0, "Sol", 3, [("speed", 5)])
+        self.assertEqual(render.call_count, 3)
+        self.assertEqual(mock_draw_hearts.call_count, 1)
+        hud.update(10, 0, "Sol", 3, [("speed", 5)])
+        self.assertEqual(render.call_count, 3)
+        hud.update(11, 0, "Sol", 3, [("speed", 4)])
+        self.assertEqual(render.call_count, 5)
+        hud.update(11, 0, "Sol", 2, [])
+        self.assertEqual(render.call_count, 5)
+        self.assertEqual(mock_draw_hearts.call_count, 2)
+        self.assertEqual(set(hud.rects), {"score", "level", "health"})
+
+    def test_swept_collision(self):
+        # A 200px move straight through a 40px hazard overlaps at neither end
+        self.assertFalse(main.detect_collision((300, 500), (300, 560), 30, 40))
+        self.assertTrue(main.swept_collision((300, 500), (300, 500), 30, (300, 360), (300, 560), 40))
+        self.assertFalse(main.swept_collision((300, 500), (300, 500), 30, (400, 360), (400, 560), 40))
+        # Both moving: the player slides right while the hazard falls past
+        self.assertTrue(main.swept_collision((250, 500), (290, 500), 30, (300, 440), (300, 560), 40))
+        self.assertFalse(main.swept_collision((200, 500), (210, 500), 30, (300, 440), (300, 560), 40))
+        # Touching edges is not a collision, as with detect_collision
+        self.assertFalse(main.swept_collision((0, 0), (0, 0), 30, (30, 0), (30, 0), 30))
+
+    def test_game_catches_fast_hazards(self):
+        for swept, health in ((True, main.PLAYER_HEALTH - 1), (False, main.PLAYER_HEALTH)):
+            game = main.Game(5, swept=swept, scheduled=False)
+            game.spawn_rate = 0
+            hazard = main.Hazard("comet")
+            hazard.x = game.player.x
+            hazard.y = game.player.y - 50
+            hazard.speed = 150
+            game.hazards = [hazard]
+            game.step(0)
+            self.assertEqual(game.player.health, health)
+
+    def test_game_hits_only_drawn_pixels(self):
+        # Beside the alien's head its bounding box is empty
+        for masked, y, health in ((True, 35, main.PLAYER_HEALTH), (False, 35, main.PLAYER_HEALTH - 1),
+                                  (True, 20, main.PLAYER_HEALTH - 1)):
+            game = main.Game(5, masked=masked)
+            game.spawns = None
+            game.spawn_rate = 0
+            hazard = main.Hazard("alien")
+            hazard.x = game.player.x - 50
+            hazard.y = game.player.y + y
+            hazard.speed = 0
+            game.hazards = [hazard]
+            game.upgrades = []
+            game.step(0)
+            self.assertEqual(game.player.health, health)
+            self.assertEqual(len(game.hazards), int(health == main.PLAYER_HEALTH))
+
+    def test_game_collects_upgrades_by_their_circle(self):
+        for masked, collected in ((True, False), (False, True)):
+            game = main.Game(5, masked=masked)
+            game.spawns = None
+            game.spawn_rate = 0
+            game.hazards = []
+            # Only the corner outside the circle reaches the player
+            upgrade = main.Upgrade("speed", game.player.x + 47)
+            upgrade.y = game.player.y - 27 - upgrade.speed
+            game.upgrades = [upgrade]
+            game.step(0)
+            self.assertEqual(not game.upgrades, collected)
+
+    def test_scheduled_spawns_match_lookahead(self):
+        main.score = main.level = 0
+        game = main.Game(11)
+        game.player.invincible = True
+        hazards, upgrades = game.upcoming_spawns(300)
+        self.assertTrue(hazards)
+        spawned = []
+        for tick in range(300):
+            before = set(map(id, game.hazards))
+            game.step(0)
+            spawned.extend((tick, hazard.type) for hazard in game.hazards if id(hazard) not in before)
+        self.assertEqual(main.level, 0)
+        # Homing hazards have already steered by the end of their first tick
+        self.assertEqual(spawned, [(tick, kind) for tick, kind, x in hazards])
+
+    def test_frame_snapshot_is_detached_from_game(self):
+        game = main.Game(3)
+        for _ in range(120):
+            game.step(main.LEFT)
+        game.effects.activate("speed", 120)
+        frame = game.frame((1.5,))
+        self.assertEqual((frame.tick, frame.alive, frame.score, frame.stamps), (120, True, main.score, (1.5,)))
+        self.assertEqual((frame.player.x, frame.player.y), (game.player.x, game.player.y))
+        self.assertEqual(frame.hazards, tuple((h.kind, h.x, h.y) for h in game.hazards))
+        self.assertEqual(frame.power_ups, (("speed", 2),))
+        game.step(main.RIGHT)
+        self.assertNotEqual(frame.trail[0], list(main.player_trail)[0])
+        self.assertEqual(frame.tick, 120)
+
+    def test_frame_buffer_keeps_latest_and_its_stamps(self):
+        frames = main.FrameBuffer()
+        self.assertIsNone(frames.take(0, 0))
+        frames.publish(main.FrameSnapshot(1, True, 0, 0, "", None, (), (), (), (), (), (0.1,)))
+        frames.publish(main.FrameSnapshot(2, True, 0, 0, "", None, (), (), (), (), (), (0.2,)))
+        frame = frames.take(0, 0)
+        # Frame 1 was never drawn, so its input goes out with frame 2
+        self.assertEqual((frame.tick, frame.stamps), (2, (0.1, 0.2)))
+        self.assertIsNone(frames.take(2, 0))
+        frames.publish(main.FrameSnapshot(3, True, 0, 0, "", None, (), (), (), (), (), (0.3,)))
+        self.assertEqual(frames.take(2, 0).stamps, (0.3,))
+        frames.close()
+        self.assertTrue(frames.closed)
+        self.assertIsNone(frames.take(3, 1))
+
+    def test_simulation_thread_publishes_until_game_over(self):
+        game = main.Game(4)
+        game.player.health = 1
+        hazard = main.Hazard("asteroid", x=game.player.x)
+        hazard.y = game.player.y - 100
+        game.hazards = [hazard]
+        replay = main.ReplayBuffer()
+        simulation = main.Simulation(game, main.ControlSampler(0.0), 0, replay)
+        simulation.start()
+        simulation.join(5)
+        self.assertFalse(simulation.is_alive())
+        self.assertTrue(simulation.frames.closed)
+        frame = simulation.frames.take(0, 0)
+        self.assertFalse(frame.alive)
+        self.assertEqual(frame.tick, len(game.inputs))
+        self.assertEqual(len(replay), len(game.inputs))
+        self.assertFalse(list(replay.frames())[-1].alive)
+
+    @patch('main.poll_input', return_value=True)
+    @patch('main.Game.step', side_effect=ValueError("broken step"))
+    def test_pipelined_loop_raises_simulation_errors(self, mock_step, mock_poll_input):
+        with self.assertRaisesRegex(ValueError, "broken step"):
+            main.pipelined_game_loop(4, frame_time=0)
+
     def test_combo_system(self):
         player = main.Player()
         self.assertEqual(player.combo, 0)
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+
+from rules import HAZARD_SIZES, UPGRADE_SIZE
+import masks
+from masks import (invader_mask, disc_mask, hazard_table, upgrade_table, hazard_tables, overlaps, swept_overlaps,
+                   overlaps_batch, swept_overlaps_batch)
+
+class TestMasks(unittest.TestCase):
+    def test_invader_mask_has_gaps(self):
+        mask = invader_mask(60)
+        # Beside the head and between the tentacles
+        self.assertFalse(mask[:15, :15].any())
+        self.assertFalse(mask[:15, 45:].any())
+        self.assertFalse(mask[45:, 15:45].any())
+        self.assertTrue(mask[15:45].all())
+        self.assertTrue(mask[:15, 15:45].all())
+        self.assertTrue(mask[45:, :15].all() and mask[45:, 45:].all())
+
+    def test_disc_mask(self):
+        mask = disc_mask(UPGRADE_SIZE)
+        self.assertTrue(mask[15, :].all() and mask[:, 15].all())
+        self.assertFalse(mask[0, 0] or mask[-1, -1])
+        self.assertTrue((mask == mask.T).all() and (mask == mask[::-1]).all())
+
+    def test_tables_are_cached(self):
+        self.assertIs(hazard_table(0, 50), hazard_table(0, 50))
+        self.assertIs(upgrade_table(), upgrade_table(UPGRADE_SIZE))
+        self.assertIs(hazard_tables(), hazard_tables())
+        self.assertEqual(hazard_table(2, 60)[-1][-1], invader_mask(60).sum())
+
+    def test_overlaps(self):
+        table = hazard_table(0, 60)
+        # In the gap beside the head, inside the bounding box
+        self.assertFalse(overlaps(table, 0, 0, 50, -35, 50))
+        self.assertTrue(overlaps(table, 0, 0, 50, -20, 50))
+        # Touching edges is not an overlap, as with detect_collision
+        self.assertFalse(overlaps(table, 0, 0, 60, 20, 50))
+        self.assertTrue(overlaps(table, 0, 0, 59.5, 20, 50))
+        self.assertFalse(overlaps(table, 0, 0, 0, 60, 50))
+        # A full square behaves like its bounding box
+        square = masks.summed_area(np.ones((40, 40), dtype=bool)).tolist()
+        rng = np.random.default_rng(0)
+        for x, y in rng.uniform(-60, 60, (200, 2)):
+            self.assertEqual(overlaps(square, 0, 0, x, y, 30), -30 < x < 40 and -30 < y < 40)
+
+    def test_swept_overlaps(self):
+        table = hazard_table(0, 60)
+        # Falls straight through the player between the two ends
+        self.assertFalse(overlaps(table, 0, -70, 0, 0, 50))
+        self.assertFalse(overlaps(table, 0, 70, 0, 0, 50))
+        self.assertTrue(swept_overlaps(table, (0, -70), (0, 70), (0, 0), (0, 0), 50))
+        # Passes down the gap beside the head
+        self.assertFalse(swept_overlaps(table, (50, -40), (50, -36), (0, 0), (0, 0), 50))
+
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(1)
+        count = 500
+        kind = rng.integers(0, len(HAZARD_SIZES), count)
+        sizes = np.array(HAZARD_SIZES, dtype=float)[kind]
+        x0, y0 = rng.uniform(-40, 60, count), rng.uniform(-80, 60, count)
+        x1, y1 = x0 + rng.uniform(-5, 5, count), y0 + rng.uniform(0, 40, count)
+        px0 = rng.uniform(-20, 20, count)
+        px1 = px0 + rng.uniform(-15, 15, count)
+        psize = rng.choice([30.0, 40.0, 50.0], count)
+        tables = hazard_tables()
+        now = overlaps_batch(tables, kind, sizes, x1, y1, px1, 0.0, psize)
+        swept = swept_overlaps_batch(tables, kind, sizes, x0, y0, x1, y1, px0, 0.0, px1, 0.0, psize)
+        for k in range(count):
+            table = hazard_table(kind[k], HAZARD_SIZES[kind[k]])
+            self.assertEqual(now[k], overlaps(table, x1[k], y1[k], px1[k], 0.0, psize[k]))
+            self.assertEqual(swept[k], swept_overlaps(table, (x0[k], y0[k]), (x1[k], y1[k]), (px0[k], 0.0),
+                                                      (px1[k], 0.0), psize[k]))
+        self.assertTrue(now.any() and not now.all())
+        self.assertTrue((swept >= now).all())
+
+if __name__ == "__main__":
+    unittest.main()
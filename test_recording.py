@@ -0,0 +1,57 @@
+import os
+import struct
+import tempfile
+import unittest
+from recording import Recording, save_recording, load_recording, RECORDING_MAGIC
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "game.sdrec")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        save_recording(self.path, 12345, bytearray([0, 1, 2, 3, 4]))
+        recording = load_recording(self.path)
+        self.assertIsInstance(recording, Recording)
+        self.assertEqual(recording.seed, 12345)
+        self.assertEqual(recording.inputs, bytes([0, 1, 2, 3, 4]))
+        self.assertEqual(len(recording), 5)
+        self.assertTrue(recording.swept)
+        self.assertTrue(recording.scheduled)
+        self.assertTrue(recording.masked)
+
+    def test_version_3_replays_without_masks(self):
+        with open(self.path, "wb") as f:
+            f.write(struct.pack("<5sBQI", RECORDING_MAGIC, 3, 7, 2) + bytes([1, 2]))
+        recording = load_recording(self.path)
+        self.assertTrue(recording.swept)
+        self.assertTrue(recording.scheduled)
+        self.assertFalse(recording.masked)
+
+    def test_version_1_replays_without_swept_collisions(self):
+        with open(self.path, "wb") as f:
+            f.write(struct.pack("<5sBQI", RECORDING_MAGIC, 1, 7, 2) + bytes([1, 2]))
+        recording = load_recording(self.path)
+        self.assertEqual(recording.version, 1)
+        self.assertFalse(recording.swept)
+        self.assertFalse(recording.scheduled)
+        self.assertFalse(recording.masked)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a recording at all")
+        with self.assertRaises(ValueError):
+            load_recording(self.path)
+
+    def test_rejects_truncated_recording(self):
+        save_recording(self.path, 1, bytes(10))
+        with open(self.path, "rb+") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        with self.assertRaises(ValueError):
+            load_recording(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+
+import testsupport
+import main
+from replay import ReplayBuffer, save_replay, load_replay
+
+def play(ticks, seed=9):
+    game = main.Game(seed)
+    inputs = random.Random(seed)
+    frames = []
+    for _ in range(ticks):
+        game.player.health = 3
+        alive = game.step(inputs.choice([0, main.LEFT, main.RIGHT]))
+        frames.append(game.frame(alive=alive))
+    return game, frames
+
+# What a replay gives back: particle positions are stored as the pixels
+# draw_particles truncates them to
+def replayed(frame):
+    return frame._replace(particles=tuple((int(x), int(y), size, color) for x, y, size, color in frame.particles))
+
+class TestReplay(unittest.TestCase):
+    def test_frames_round_trip(self):
+        game, frames = play(500)
+        replay = ReplayBuffer()
+        for frame in frames:
+            replay.capture(frame)
+        self.assertEqual(len(replay), main.FPS * 5)
+        replayed_frames = list(replay.frames())
+        self.assertEqual([frame.tick for frame in replayed_frames], list(range(201, 501)))
+        self.assertTrue(any(frame.particles for frame in replayed_frames))
+        self.assertTrue(any(frame.power_ups for frame in replayed_frames))
+        # The oldest frames only have the trail that fits in the ring
+        self.assertEqual(len(replayed_frames[0].trail), 1)
+        self.assertEqual(replayed_frames[main.TRAIL_LENGTH:],
+                         [replayed(frame) for frame in frames[-300 + main.TRAIL_LENGTH:]])
+
+    def test_death_frame_keeps_the_trail(self):
+        game, frames = play(30)
+        game.player.health = 1
+        hazard = main.Hazard("asteroid", x=game.player.x)
+        hazard.y = game.player.y - 10
+        game.hazards.append(hazard)
+        self.assertFalse(game.step(0))
+        frames.append(game.frame(alive=False))
+        replay = ReplayBuffer()
+        for frame in frames:
+            replay.capture(frame)
+        last = list(replay.frames())[-1]
+        self.assertFalse(last.alive)
+        self.assertEqual(last, replayed(frames[-1]))
+
+    def test_power_up_seconds_are_whole(self):
+        game, frames = play(5)
+        frame = frames[-1]._replace(power_ups=(("speed", 4.75), ("magnet", 300)))
+        replay = ReplayBuffer()
+        replay.capture(frame)
+        self.assertEqual(list(replay.frames())[-1].power_ups, (("speed", 4), ("magnet", 254)))
+
+    def test_ring_is_bounded(self):
+        game, frames = play(200)
+        replay = ReplayBuffer(seconds=1)
+        for frame in frames:
+            replay.capture(frame)
+        self.assertEqual(len(replay), main.FPS)
+        self.assertEqual(replay.size, sum(map(sys.getsizeof, replay.records)))
+
+        replay = ReplayBuffer(budget=4000)
+        for frame in frames:
+            replay.capture(frame)
+        self.assertLessEqual(replay.size, 4000)
+        self.assertGreater(len(replay), 1)
+        self.assertEqual(list(replay.frames())[-1].tick, 200)
+        replay.clear()
+        self.assertEqual((len(replay), replay.size), (0, 0))
+        with self.assertRaises(ValueError):
+            ReplayBuffer(budget=0)
+
+    def test_save_and_load(self):
+        game, frames = play(100)
+        replay = ReplayBuffer(seconds=1)
+        for frame in frames:
+            replay.capture(frame)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.sdrpl")
+            save_replay(path, replay)
+            loaded = load_replay(path)
+            self.assertEqual(list(loaded.frames()), list(replay.frames()))
+            with open(path, "rb") as f:
+                data = f.read()
+            with open(path, "wb") as f:
+                f.write(data[:-5])
+            with self.assertRaises(ValueError):
+                load_replay(path)
+            with open(path, "wb") as f:
+                f.write(b"not a replay")
+            with self.assertRaises(ValueError):
+                load_replay(path)
+
+if __name__ == '__main__':
+    unittest.main()
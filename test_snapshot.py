@@ -0,0 +1,96 @@
+import unittest
+import random
+
+import testsupport
+import main
+from snapshot import snapshot, restore, branch
+
+def state(game):
+    return (main.score, main.level, game.player.pos, game.player.size, game.player.speed,
+            game.player.health, game.player.shield, game.player.combo,
+            [(hazard.kind, hazard.pos, hazard.speed, hazard.homing_cooldown) for hazard in game.hazards],
+            [(upgrade.kind, upgrade.pos) for upgrade in game.upgrades],
+            [particle[:3] + particle[4:] for particle in main.particle_list],
+            list(main.player_trail), dict(game.effects.expiries), game.effects.tick)
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.game = main.Game(11)
+        self.inputs = random.Random(2)
+        for _ in range(300):
+            self.step(self.game)
+
+    def step(self, game):
+        # Keep the player alive so the run covers collisions and upgrades
+        game.player.health = 3
+        return game.step(self.inputs.choice([0, main.LEFT, main.RIGHT]))
+
+    def test_restore_reproduces_state(self):
+        self.game.effects.activate("magnet", 90)
+        main.create_particles(10, 10, main.UPGRADES["magnet"]["color"])
+        data = snapshot(self.game)
+        expected = state(self.game)
+        game = restore(data)
+        self.assertIsNot(game, self.game)
+        self.assertEqual(state(game), expected)
+        self.assertEqual(game.inputs, self.game.inputs)
+        self.assertIs(main.current_game, game)
+        self.assertTrue(game.swept)
+        self.game.swept = False
+        self.assertFalse(restore(snapshot(self.game)).swept)
+        self.assertTrue(game.masked)
+        self.game.masked = False
+        self.assertFalse(restore(snapshot(self.game)).masked)
+
+    def test_global_rng_is_left_alone(self):
+        global_state = random.getstate()
+        data = snapshot(self.game)
+        branch(data, [0] * 200)
+        game = restore(data)
+        for _ in range(200):
+            self.step(game)
+        self.assertEqual(random.getstate(), global_state)
+
+    def test_restored_game_continues_identically(self):
+        self.game.effects.activate("speed", 120)
+        data = snapshot(self.game)
+        rng_state = self.inputs.getstate()
+        for _ in range(400):
+            self.step(self.game)
+        expected = state(self.game)
+
+        self.inputs.setstate(rng_state)
+        game = restore(data)
+        for _ in range(400):
+            self.step(game)
+        self.assertEqual(state(game), expected)
+
+    def test_restored_spawn_schedule_continues_after_level_up(self):
+        main.score = (main.level + 1) * self.game.level_threshold
+        for _ in range(50):
+            self.step(self.game)
+        self.assertEqual(self.game.spawns.level_start, 300)
+        data = snapshot(self.game)
+        expected = self.game.upcoming_spawns(1000)
+        game = restore(data)
+        self.assertEqual(game.upcoming_spawns(1000), expected)
+        self.game.spawns = None
+        self.assertIsNone(restore(snapshot(self.game)).spawns)
+
+    def test_branches_fork_from_same_snapshot(self):
+        data = snapshot(self.game)
+        first = branch(data, [main.LEFT] * 100)
+        self.assertEqual(branch(data, [main.LEFT] * 100), first)
+        self.assertEqual(len(main.current_game.inputs), len(self.game.inputs) + 100)
+
+    def test_rejects_bad_data(self):
+        data = snapshot(self.game)
+        with self.assertRaises(ValueError):
+            restore(b"nope" + data[4:])
+        with self.assertRaises(ValueError):
+            restore(data[:-1])
+        with self.assertRaises(ValueError):
+            restore(data[:10])
+
+if __name__ == '__main__':
+    unittest.main()
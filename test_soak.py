@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch
+
+import testsupport
+import main
+from rules import LEFT, RIGHT
+from soak import survival_policy, growth, run_soak
+
+class TestSoak(unittest.TestCase):
+    def test_policy_dodges_hazard_overhead(self):
+        game = main.Game(1)
+        hazard = main.Hazard("asteroid")
+        hazard.x = game.player.x
+        hazard.y = game.player.y - 100
+        game.hazards = [hazard]
+        self.assertIn(survival_policy(game), (LEFT, RIGHT))
+        hazard.x = 0
+        game.player.x = 400
+        self.assertEqual(survival_policy(game), 0)
+
+    def test_growth_flags_only_steady_increase(self):
+        hours = [0.1 * i for i in range(10)]
+        self.assertTrue(growth(hours, [100 + 50 * i for i in range(10)], 100)["flagged"])
+        self.assertFalse(growth(hours, [100 + 5 * i for i in range(10)], 100)["flagged"])
+        noisy = [100, 300, 100, 300, 100, 300, 100, 300, 100, 400]
+        self.assertFalse(growth(hours, noisy, 100)["flagged"])
+
+    def test_headless_run_reports_samples(self):
+        report = run_soak(hours=600 / 60 / 3600, interval=100, warmup=1, headless=True, trace=True, max_p99_ms=0)
+        self.assertEqual(report["frames"], 600)
+        self.assertEqual([sample["frame"] for sample in report["samples"]], [100, 200, 300, 400, 500, 600])
+        self.assertIn("traced_kib", report["growth"])
+        self.assertEqual(report["ok"], not report["violations"])
+        self.assertFalse(report["growth"]["fonts"]["flagged"])
+
+    def test_font_cache_growth_is_flagged(self):
+        step = main.Game.step
+        def leaky_step(game, action):
+            main.get_font(len(main._fonts) + 1000)
+            return step(game, action)
+        self.addCleanup(main._fonts.clear)
+        with patch.object(main.Game, "step", leaky_step):
+            report = run_soak(hours=600 / 60 / 3600, interval=100, warmup=1, headless=True, trace=False)
+        self.assertTrue(report["growth"]["fonts"]["flagged"])
+        self.assertTrue(any(v.startswith("fonts grows by") for v in report["violations"]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from rules import HAZARD_TYPES, HAZARD_SIZES, HAZARD_CODES, width, spawn_rate_for_level
+from spawns import SpawnScheduler, SPAWN_CHUNK
+
+def play(scheduler, ticks):
+    return [scheduler.pop() for _ in range(ticks)]
+
+class TestSpawnScheduler(unittest.TestCase):
+    def test_same_seed_same_timeline(self):
+        self.assertEqual(play(SpawnScheduler(3), 2000), play(SpawnScheduler(3), 2000))
+        self.assertNotEqual(play(SpawnScheduler(3), 2000), play(SpawnScheduler(4), 2000))
+
+    def test_events_are_in_bounds(self):
+        events = [hazard for hazard, upgrade in play(SpawnScheduler(5, level=4), 3 * SPAWN_CHUNK) if hazard]
+        rate = len(events) / (3 * SPAWN_CHUNK)
+        self.assertAlmostEqual(rate, spawn_rate_for_level(4), delta=0.03)
+        for kind, x in events:
+            self.assertTrue(0 <= x <= width - HAZARD_SIZES[kind])
+        self.assertEqual({HAZARD_TYPES[kind] for kind, x in events}, set(HAZARD_CODES))
+
+    def test_generates_on_first_use(self):
+        scheduler = SpawnScheduler(8, level=2, level_start=300, tick=1000)
+        self.assertFalse(scheduler.hazards or scheduler.upgrades)
+        self.assertEqual(play(scheduler, 500), play(SpawnScheduler(8, 2, 300, 1000), 500))
+        self.assertGreaterEqual(scheduler.fill_end, 1500)
+
+    def test_upcoming_matches_pops(self):
+        scheduler = SpawnScheduler(8)
+        scheduler.pop()
+        hazards, upgrades = scheduler.upcoming(1500)
+        popped = play(scheduler, 1500)
+        self.assertEqual([(tick + 1, HAZARD_TYPES[event[0]], event[1]) for tick, (event, _) in enumerate(popped) if event],
+                         hazards)
+        self.assertEqual(len(upgrades), sum(upgrade is not None for _, upgrade in popped))
+
+    def test_rebuilt_mid_level_continues_identically(self):
+        scheduler = SpawnScheduler(9)
+        play(scheduler, 700)
+        scheduler.set_level(2)
+        play(scheduler, 900)
+        rebuilt = SpawnScheduler(9, scheduler.level, scheduler.level_start, scheduler.tick)
+        self.assertEqual(play(rebuilt, 1000), play(scheduler, 1000))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,12 @@
+# Shared setup for the tests that import main; import it before main. main
+# opens a window as it is imported, so they all run against this one pygame
+# mock, under pytest or unittest alike. A mock per module would leave main
+# bound to whichever module came first.
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Disables main's prints
+os.environ['PYTEST_CURRENT_TEST'] = 'yes'
+
+pygame = sys.modules['pygame'] = MagicMock()